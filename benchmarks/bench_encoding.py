@@ -0,0 +1,71 @@
+"""
+Formatting time of an audit log record: the default AuditLogFormatter
+(standard library json) versus AuditLogJSONFormatter per installed encoder.
+
+    PYTHONPATH=.:src DJANGO_SETTINGS_MODULE=tests.settings python benchmarks/bench_encoding.py
+"""
+import logging
+import timeit
+
+import django
+
+django.setup()
+
+from audit_log.formatter import AuditLogFormatter  # noqa: E402
+
+from django_audit_log.encoders import ENCODERS  # noqa: E402
+from django_audit_log.formatter import AuditLogJSONFormatter  # noqa: E402
+
+NUMBER = 2000
+
+
+def make_record(results):
+    record = logging.LogRecord('audit_log', logging.INFO, __file__, 1, 'List User', None, None)
+    record.audit = {
+        'http_request': {'method': 'GET', 'url': 'https://localhost/api/users/?page=1', 'user_agent': 'bench'},
+        'http_response': {
+            'status_code': 200,
+            'reason': 'OK',
+            'headers': {'Content-Type': 'application/json', 'Vary': 'Accept', 'Allow': 'GET, HEAD, OPTIONS'},
+        },
+        'user': {
+            'authenticated': True,
+            'email': 'user@host.com',
+            'roles': ['group%d' % i for i in range(10)],
+            'ip': '127.0.0.1',
+            'provider': {'name': 'django.contrib.auth.backends.ModelBackend', 'realm': ''},
+        },
+        'filter': {'object': 'User', 'kwargs': {"['email']": ['user']}},
+        'results': results,
+        'type': 'INFO',
+        'message': 'List User',
+    }
+    return record
+
+
+def main():
+    records = {
+        'small record': make_record(None),
+        'list of 1000 objects': make_record(
+            [{'id': i, 'username': 'user%d' % i, 'email': 'user%d@host.com' % i, 'active': True} for i in range(1000)]
+        ),
+    }
+    formatters = [('AuditLogFormatter (json)', AuditLogFormatter())]
+    for encoder_class in ENCODERS:
+        try:
+            formatters.append(
+                ('AuditLogJSONFormatter (%s)' % encoder_class.name, AuditLogJSONFormatter(encoder=encoder_class.name))
+            )
+        except ImportError:
+            pass
+
+    for record_name, record in records.items():
+        print(record_name)
+        number = NUMBER if record.audit['results'] is None else NUMBER // 20
+        for name, formatter in formatters:
+            duration = timeit.timeit(lambda: formatter.format(record), number=number)
+            print('  %-32s %10.1f us/record' % (name, duration / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+"""
+Overhead of the audit logging per request: every scenario runs the same view
+with and without AuditLogMiddleware and reports the added time, the added
+peak memory (tracemalloc) and the queries per request.
+
+    PYTHONPATH=.:src DJANGO_SETTINGS_MODULE=tests.settings python benchmarks/bench_overhead.py
+
+Store the results as a baseline, and compare a later run against it. The
+comparison fails (exit code 1) when a scenario adds queries, or its overhead
+or added memory grew more than the tolerance:
+
+    ... python benchmarks/bench_overhead.py --save benchmarks/baseline.json
+    ... python benchmarks/bench_overhead.py --compare benchmarks/baseline.json
+
+Timings depend on the machine, record the baseline on the machine that runs
+the comparison.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import django
+
+django.setup()
+
+from django.apps import apps  # noqa: E402
+from django.contrib.auth.models import AnonymousUser, Group, User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.serializers import ModelSerializer  # noqa: E402
+
+from django_audit_log.delivery import shutdown  # noqa: E402
+from django_audit_log.middleware import AuditLogMiddleware  # noqa: E402
+from django_audit_log.registry import logger_registry  # noqa: E402
+from django_audit_log.rest_framework.viewsets import AuditLogReadOnlyViewSet, AuditLogViewSet  # noqa: E402
+
+REPEAT = 7
+USERS = 1000
+GROUPS = 50
+
+
+class DevNullHandler(logging.StreamHandler):
+    def __init__(self):
+        super().__init__(open(os.devnull, 'w'))
+
+
+class UserSerializer(ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'email', 'is_active', 'date_joined')
+
+
+class UserViewSet(AuditLogReadOnlyViewSet):
+    queryset = User.objects.order_by('id')
+    serializer_class = UserSerializer
+    authentication_classes = []
+    permission_classes = []
+    audit_log_list_response = True
+
+
+class UserWriteViewSet(AuditLogViewSet):
+    queryset = User.objects.order_by('id')
+    serializer_class = UserSerializer
+    authentication_classes = []
+    permission_classes = []
+    audit_log_results_changes = True
+
+
+user_list = UserViewSet.as_view({'get': 'list'})
+user_create = UserWriteViewSet.as_view({'post': 'create'})
+user_update = UserWriteViewSet.as_view({'patch': 'partial_update'})
+usernames = ('new%d' % i for i in itertools.count())
+
+
+def view(request):
+    return HttpResponse()
+
+
+def list_users(request):
+    return user_list(request).render()
+
+
+def create_user(request):
+    return user_create(request).render()
+
+
+def update_user(request):
+    return user_update(request, pk=User.objects.get(username='benchmark').pk).render()
+
+
+def anonymous(path='/'):
+    request = RequestFactory().get(path, SERVER_NAME='localhost')
+    request.user = AnonymousUser()
+    request.session = {}
+    return request
+
+
+def authenticated(path='/'):
+    request = anonymous(path)
+    request.user = User.objects.get(username='benchmark')
+    return request
+
+
+def write(method, data):
+    request = getattr(RequestFactory(), method)(
+        '/', json.dumps(data), content_type='application/json', SERVER_NAME='localhost'
+    )
+    request.user = User.objects.get(username='benchmark')
+    request.session = {}
+    return request
+
+
+def create_request():
+    username = next(usernames)
+    return write('post', {'username': username, 'email': '%s@host.com' % username})
+
+
+def update_request():
+    return write('patch', {'email': '%s@host.com' % next(usernames)})
+
+
+DEVNULL = {'AUDIT_LOG_HANDLER_CALLABLE_PATH': '__main__.DevNullHandler'}
+
+# name, settings, request, view, requests per run
+SCENARIOS = [
+    ('exempt path', dict(DEVNULL, AUDIT_LOG_EXEMPT_URLS=[r'^health/']), lambda: anonymous('/health/'), view, 1000),
+    ('anonymous', DEVNULL, anonymous, view, 1000),
+    ('%d groups' % GROUPS, DEVNULL, authenticated, view, 500),
+    (
+        '%d groups, json formatter' % GROUPS,
+        dict(DEVNULL, AUDIT_LOG_FORMATTER_CALLABLE_PATH='django_audit_log.formatter.AuditLogJSONFormatter'),
+        authenticated,
+        view,
+        500,
+    ),
+    ('%d groups, queue' % GROUPS, dict(DEVNULL, AUDIT_LOG_ASYNC_DELIVERY=True), authenticated, view, 500),
+    ('list %d, list response' % USERS, DEVNULL, authenticated, list_users, 20),
+    (
+        'list %d, 10 results' % USERS,
+        dict(DEVNULL, AUDIT_LOG_RESULTS_MAX_ITEMS=10),
+        authenticated,
+        list_users,
+        20,
+    ),
+    ('create', DEVNULL, create_request, create_user, 200),
+    ('partial update, changes', DEVNULL, update_request, update_user, 200),
+]
+
+if apps.is_installed('django_audit_log.db'):
+    SCENARIOS.append(
+        (
+            '%d groups, database' % GROUPS,
+            {'AUDIT_LOG_HANDLER_CALLABLE_PATH': 'django_audit_log.db.handlers.DatabaseHandler'},
+            authenticated,
+            view,
+            500,
+        )
+    )
+
+
+def time_requests(get_response, make_request, number):
+    """
+    Seconds per request of one run.
+    """
+    requests = [make_request() for _ in range(number)]
+    start = time.perf_counter()
+    for request in requests:
+        get_response(request)
+    return (time.perf_counter() - start) / number
+
+
+def peak_memory(get_response, make_request, number):
+    """
+    Mean peak of the memory allocated while handling a request, in bytes.
+    """
+    total = 0
+    for _ in range(number):
+        request = make_request()
+        tracemalloc.start()
+        get_response(request)
+        total += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return total / number
+
+
+def count_queries(get_response, make_request, number):
+    requests = [make_request() for _ in range(number)]
+    with CaptureQueriesContext(connection) as context:
+        for request in requests:
+            get_response(request)
+    return len(context) / number
+
+
+def measure(get_response, make_request, number):
+    get_response(make_request())  # warm up
+    return {
+        'peak_bytes': peak_memory(get_response, make_request, min(number, 100)),
+        'queries': count_queries(get_response, make_request, min(number, 100)),
+    }
+
+
+def run(settings, make_request, get_response, number):
+    with override_settings(**settings):
+        audited_response = AuditLogMiddleware(get_response)
+        bare = measure(get_response, make_request, number)
+        audited = measure(audited_response, make_request, number)
+
+        # Alternate the runs, so that both suffer alike from other load on the machine
+        bare_runs, audited_runs = [], []
+        for _ in range(REPEAT):
+            bare_runs.append(time_requests(get_response, make_request, number))
+            audited_runs.append(time_requests(audited_response, make_request, number))
+
+        shutdown()
+        logger_registry.reset()
+
+    # The median of the runs for both, so the overhead is part of the time per request
+    overheads = [audited - bare for bare, audited in zip(bare_runs, audited_runs)]
+    return {
+        'us_per_request': round(statistics.median(audited_runs) * 1e6, 1),
+        'overhead_us': round(statistics.median(overheads) * 1e6, 1),
+        'overhead_kib': round((audited['peak_bytes'] - bare['peak_bytes']) / 1024, 1),
+        'queries': audited['queries'],
+        'overhead_queries': audited['queries'] - bare['queries'],
+    }
+
+
+def setup_database():
+    connection.creation.create_test_db(verbosity=0, serialize=False)
+    User.objects.bulk_create(
+        [User(username='user%d' % i, email='user%d@host.com' % i) for i in range(USERS - 1)]
+    )
+    user = User.objects.create_user(username='benchmark', email='benchmark@host.com')
+    user.groups.set([Group.objects.create(name='group%d' % i) for i in range(GROUPS)])
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the change of every scenario and return whether any regressed.
+    """
+    regressed = False
+    print('\n%-32s %16s %16s %10s' % ('compared to baseline', 'overhead us', 'overhead KiB', 'queries'))
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print('%-32s %16s' % (name, 'new'))
+            continue
+        slower = result['overhead_us'] > max(base['overhead_us'], 1) * (1 + tolerance)
+        larger = result['overhead_kib'] > max(base['overhead_kib'], 1) * (1 + tolerance)
+        more_queries = result['overhead_queries'] > base['overhead_queries']
+        print(
+            '%-32s %+15.0f%% %+15.0f%% %+10.2f %s'
+            % (
+                name,
+                _change(result['overhead_us'], base['overhead_us']),
+                _change(result['overhead_kib'], base['overhead_kib']),
+                result['overhead_queries'] - base['overhead_queries'],
+                'REGRESSION' if slower or larger or more_queries else '',
+            )
+        )
+        regressed = regressed or slower or larger or more_queries
+    return regressed
+
+
+def _change(value, base):
+    return (value - base) / abs(base) * 100 if base else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--save', metavar='PATH', help="Store the results as baseline")
+    parser.add_argument('--compare', metavar='PATH', help="Compare the results to a stored baseline")
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25, help="Allowed relative increase of the overhead (default 0.25)"
+    )
+    parser.add_argument('-k', dest='keyword', help="Only run the scenarios containing KEYWORD")
+    args = parser.parse_args()
+
+    setup_database()
+
+    results = {}
+    print('%-32s %14s %12s %13s %9s' % ('scenario', 'us/request', 'overhead us', 'overhead KiB', 'queries'))
+    for name, settings, make_request, get_response, number in SCENARIOS:
+        if args.keyword and args.keyword not in name:
+            continue
+        result = results[name] = run(settings, make_request, get_response, number)
+        print(
+            '%-32s %14.1f %12.1f %13.1f %9.2f'
+            % (name, result['us_per_request'], result['overhead_us'], result['overhead_kib'], result['queries'])
+        )
+
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            if compare(results, json.load(baseline_file), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
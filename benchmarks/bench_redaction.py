@@ -0,0 +1,110 @@
+"""
+Redaction of deeply nested logs: the compiled Redactor compared to a naive
+deepcopy and walk of the whole log, matching every path against the rules.
+
+    PYTHONPATH=.:src DJANGO_SETTINGS_MODULE=tests.settings python benchmarks/bench_redaction.py
+"""
+import copy
+import fnmatch
+import re
+import time
+
+import django
+
+django.setup()
+
+from django_audit_log.redaction import REDACTED, Redactor  # noqa: E402
+
+NUMBER = 50
+
+PATHS = [
+    'user.email',
+    'results.*.password',
+    'results.*.profile.addresses.*.iban',
+    'filter.kwargs.token',
+]
+PATTERNS = [r'\b\d{3}-\d{2}-\d{4}\b']
+
+
+def make_log(results, depth):
+    def nested(level):
+        if level == 0:
+            return {'value': 'leaf', 'number': level}
+        return {'level': level, 'child': nested(level - 1), 'siblings': [level] * 3}
+
+    return {
+        'user': {'username': 'john', 'email': 'john@example.com', 'roles': ['admin']},
+        'filter': {'object': 'User', 'kwargs': {'pk': '1', 'token': 'secret'}},
+        'results': [
+            {
+                'id': i,
+                'password': 'secret',
+                'profile': {
+                    'ssn': '123-45-6789' if i % 10 == 0 else 'none',
+                    'addresses': [{'city': 'Amsterdam', 'iban': 'NL91ABNA0417164300'}]
+                    * 2,
+                    'nested': nested(depth),
+                },
+            }
+            for i in range(results)
+        ],
+        'message': 'List User',
+    }
+
+
+def naive_redact(log, paths, patterns):
+    """
+    Copies the whole log and matches the path of every value to the rules.
+    """
+    pattern = re.compile('|'.join(patterns)) if patterns else None
+
+    def walk(value, path):
+        if any(fnmatch.fnmatchcase(path, rule) for rule in paths):
+            return REDACTED
+        if isinstance(value, dict):
+            for key in value:
+                value[key] = walk(value[key], '%s.%s' % (path, key) if path else key)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                value[index] = walk(item, '%s.%d' % (path, index))
+        elif isinstance(value, str) and pattern is not None:
+            return pattern.sub(REDACTED, value)
+        return value
+
+    return walk(copy.deepcopy(log), '')
+
+
+def timed(function):
+    start = time.perf_counter()
+    for _ in range(NUMBER):
+        function()
+    return (time.perf_counter() - start) / NUMBER * 1e6
+
+
+def main():
+    print(
+        '%-28s %-10s %14s %14s %9s'
+        % ('log', 'rules', 'naive us', 'compiled us', 'speedup')
+    )
+    for results, depth in ((10, 5), (100, 5), (100, 20), (1000, 10)):
+        log = make_log(results, depth)
+        for name, patterns in (('paths', []), ('+patterns', PATTERNS)):
+            redactor = Redactor(PATHS, patterns)
+            assert redactor.redact(log) == naive_redact(log, PATHS, patterns)
+
+            naive = timed(lambda: naive_redact(log, PATHS, patterns))
+            compiled = timed(lambda: redactor.redact(log))
+            print(
+                '%-28s %-10s %14.1f %14.1f %8.1fx'
+                % (
+                    '%d results, depth %d' % (results, depth),
+                    name,
+                    naive,
+                    compiled,
+                    naive / compiled,
+                )
+            )
+
+
+if __name__ == '__main__':
+    main()
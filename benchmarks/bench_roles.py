@@ -0,0 +1,68 @@
+"""
+Queries per audited request for the role resolution strategies.
+
+    PYTHONPATH=.:src DJANGO_SETTINGS_MODULE=tests.settings python benchmarks/bench_roles.py
+"""
+import time
+from unittest.mock import patch
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import Group, User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from django_audit_log.middleware import AuditLogMiddleware  # noqa: E402
+
+REQUESTS = 1000
+
+STRATEGIES = [
+    ('groups query (before)', None, False),
+    ('prefetched groups', None, True),
+    ('claim', 'django_audit_log.roles.get_roles_from_claim', False),
+    ('cache', 'django_audit_log.roles.get_roles_from_cache', False),
+]
+
+
+def run(roles_path, prefetched):
+    middleware = AuditLogMiddleware(lambda request: None)
+    factory = RequestFactory()
+    users = User.objects.all()
+    if prefetched:
+        users = users.prefetch_related('groups')
+
+    queries = 0
+    elapsed = 0
+    with patch('django_audit_log.app_settings.ROLES_CALLABLE_PATH', roles_path):
+        for _ in range(REQUESTS):
+            request = factory.get('/', SERVER_NAME='localhost')
+            request.user = users.get(username='benchmark')
+            request.session = {'roles': ['group%d' % i for i in range(10)]}
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                middleware.process_request(request)
+                elapsed += time.perf_counter() - start
+            queries += len(context)
+    return queries / REQUESTS, elapsed / REQUESTS * 1e6
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_user(username='benchmark')
+    user.groups.set([Group.objects.create(name='group%d' % i) for i in range(10)])
+    cache.clear()
+    run(None, False)  # warm up
+
+    print('%-24s %18s %14s' % ('strategy', 'queries/request', 'us/request'))
+    for name, roles_path, prefetched in STRATEGIES:
+        queries, duration = run(roles_path, prefetched)
+        print('%-24s %18.3f %14.1f' % (name, queries, duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -41,7 +41,9 @@ os.chdir(os.path.normpath(os.path.join(os.path.abspath(__file__), os.pardir)))
 
 install_requirements = [
     'django',
-    'datapunt-audit-log'
+    'datapunt-audit-log',
+    # Pulled in by Django >= 3.0 only, used by the async middleware
+    'asgiref>=3.2',
 ]
 
 test_requirements = [
@@ -51,6 +53,7 @@ test_requirements = [
 
 extra_requirements = {
     'dev': test_requirements + ['twine', 'bump2version'],
+    'orjson': ['orjson'],
 }
 
 setup(
@@ -69,6 +72,7 @@ setup(
     packages=find_packages(where='src'),
     package_dir={'': 'src'},
     install_requires=install_requirements,
+    python_requires='>=3.7',
 
     cmdclass={'test': PyTest},
     tests_require=test_requirements,
@@ -83,8 +87,9 @@ setup(
         'License :: OSI Approved :: Mozilla Public License 2.0 (MPL 2.0)',
         'Operating System :: OS Independent',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
         'Topic :: Internet :: WWW/HTTP',
         'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
         'Topic :: System :: Logging'
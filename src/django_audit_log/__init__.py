@@ -1,2 +1,4 @@
 __version_info__ = (0, 4, 0)
 __version__ = ".".join(map(str, __version_info__))
+
+default_app_config = 'django_audit_log.apps.DjangoAuditLogConfig'
@@ -0,0 +1,200 @@
+import logging
+import os
+import socket
+import socketserver
+import struct
+import time
+
+from django_audit_log import app_settings, metrics
+from django_audit_log.delivery import OVERFLOW_BLOCK, OVERFLOW_DROP
+from django_audit_log.handlers import make_formatted_record
+
+# Every log is sent as its length followed by the formatted log
+LENGTH = struct.Struct('>I')
+
+
+class AggregatorHandler(logging.Handler):
+    """
+    Sends the formatted logs over a Unix domain socket to the aggregator of
+    the host (see LogAggregator), which batches and ships the logs of all
+    worker processes through a single log handler.
+
+    When the aggregator is unavailable or does not keep up (the socket buffer
+    is full), the overflow policy determines what happens to a log:
+
+    'drop': discard the log, reconnecting at most every `retry_interval` seconds
+    'block': wait at most `timeout` seconds (None waits forever) for the aggregator
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        overflow_policy: str = None,
+        timeout: float = None,
+        retry_interval: float = None,
+    ):
+        super().__init__()
+        self.path = path or app_settings.AGGREGATOR_SOCKET
+        if not self.path:
+            raise ValueError("AggregatorHandler requires AUDIT_LOG_AGGREGATOR_SOCKET")
+        self.overflow_policy = (
+            overflow_policy or app_settings.AGGREGATOR_OVERFLOW_POLICY
+        )
+        if self.overflow_policy not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError("Unknown overflow policy: %s" % self.overflow_policy)
+        if timeout is None:
+            timeout = app_settings.AGGREGATOR_TIMEOUT
+        self.timeout = timeout
+        if retry_interval is None:
+            retry_interval = app_settings.AGGREGATOR_RETRY_INTERVAL
+        self.retry_interval = retry_interval
+
+        self.sent = 0
+        self.dropped = 0
+        self._socket = None
+        self._pid = None
+        self._retry_at = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            data = self.format(record).encode()
+        except Exception:
+            metrics.count(metrics.FAILED)
+            self.handleError(record)
+            return
+
+        if self._send(LENGTH.pack(len(data)) + data):
+            self.sent += 1
+        else:
+            self.dropped += 1
+            metrics.count(metrics.DROPPED)
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self._disconnect()
+        finally:
+            self.release()
+        super().close()
+
+    def get_stats(self) -> dict:
+        return {
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'connected': self._socket is not None,
+        }
+
+    def _send(self, frame: bytes) -> bool:
+        deadline = None
+        if self.overflow_policy == OVERFLOW_BLOCK and self.timeout is not None:
+            deadline = time.monotonic() + self.timeout
+
+        while not self._try_send(frame):
+            if self.overflow_policy == OVERFLOW_DROP:
+                return False
+            wait = self.retry_interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+            time.sleep(wait)
+        return True
+
+    def _try_send(self, frame: bytes) -> bool:
+        connection = self._connect()
+        if connection is None:
+            return False
+        try:
+            connection.sendall(frame)
+        except OSError:
+            # Possibly sent part of the log, the connection can not be used anymore
+            self._disconnect()
+            return False
+        return True
+
+    def _connect(self):
+        if self._pid != os.getpid():
+            # Forked, don't share the connection of the parent process
+            self._socket = None
+            self._pid = os.getpid()
+        if self._socket is not None:
+            return self._socket
+        if self.overflow_policy == OVERFLOW_DROP and time.monotonic() < self._retry_at:
+            return None
+
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.settimeout(self.retry_interval)
+            connection.connect(self.path)
+        except OSError:
+            connection.close()
+            self._retry_at = time.monotonic() + self.retry_interval
+            return None
+
+        # Dropping never waits for a full socket buffer
+        connection.settimeout(
+            0 if self.overflow_policy == OVERFLOW_DROP else self.timeout
+        )
+        self._socket = connection
+        return connection
+
+    def _disconnect(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class AggregatorRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads the logs of a single worker process connection.
+    """
+
+    def handle(self) -> None:
+        while True:
+            header = self.rfile.read(LENGTH.size)
+            if len(header) < LENGTH.size:
+                return
+            (length,) = LENGTH.unpack(header)
+            data = self.rfile.read(length)
+            if len(data) < length:
+                # The worker disconnected while sending the log
+                return
+            self.server.handler.handle(make_formatted_record(data.decode()))
+
+
+class LogAggregator(socketserver.ThreadingUnixStreamServer):
+    """
+    Receives the logs of the worker processes of a host on a Unix domain
+    socket and passes them to a single log handler (e.g. the
+    BatchingHTTPHandler), so the host holds one connection to the collector.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, handler: logging.Handler):
+        self.handler = handler
+        _remove_stale_socket(path)
+        super().__init__(path, AggregatorRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(path: str) -> None:
+    if not os.path.exists(path):
+        return
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError:
+        # Left behind by an aggregator that stopped
+        os.remove(path)
+    else:
+        raise OSError("An aggregator is already listening on %s" % path)
+    finally:
+        connection.close()
@@ -20,3 +20,180 @@ LOG_FORMATTER_CALLABLE_PATH = getattr(
 EXEMPT_URLS = getattr(settings, 'AUDIT_LOG_EXEMPT_URLS', [])
 
 assert type(EXEMPT_URLS) is list, "EXEMPT_URLS must be a list"
+
+# List of (namespaced) url names that will not be logged, e.g. ['health', 'api:metrics']
+EXEMPT_URL_NAMES = getattr(settings, 'AUDIT_LOG_EXEMPT_URL_NAMES', [])
+
+# Deliver logs asynchronously. The middleware only puts the finished record on a bounded in-memory queue,
+# a background worker thread formats it and passes it to the configured log handler.
+# Default: False (the log is formatted and emitted while processing the response)
+ASYNC_DELIVERY = getattr(settings, 'AUDIT_LOG_ASYNC_DELIVERY', False)
+
+# Maximum number of records waiting in the queue when ASYNC_DELIVERY is enabled
+QUEUE_SIZE = getattr(settings, 'AUDIT_LOG_QUEUE_SIZE', 10000)
+
+# What to do with a record when the queue is full:
+# 'drop': discard the record
+# 'block': wait (at most AUDIT_LOG_QUEUE_BLOCK_TIMEOUT seconds, None waits forever) for a free slot
+# 'sample': once the queue is filled up to AUDIT_LOG_QUEUE_SAMPLE_THRESHOLD (fraction of QUEUE_SIZE), only
+#           accept a AUDIT_LOG_QUEUE_SAMPLE_RATE fraction of the records. Records are dropped when the queue is full.
+QUEUE_OVERFLOW_POLICY = getattr(settings, 'AUDIT_LOG_QUEUE_OVERFLOW_POLICY', 'drop')
+QUEUE_BLOCK_TIMEOUT = getattr(settings, 'AUDIT_LOG_QUEUE_BLOCK_TIMEOUT', None)
+QUEUE_SAMPLE_THRESHOLD = getattr(settings, 'AUDIT_LOG_QUEUE_SAMPLE_THRESHOLD', 0.8)
+QUEUE_SAMPLE_RATE = getattr(settings, 'AUDIT_LOG_QUEUE_SAMPLE_RATE', 0.1)
+
+assert QUEUE_OVERFLOW_POLICY in (
+    'drop',
+    'block',
+    'sample',
+), "QUEUE_OVERFLOW_POLICY must be one of 'drop', 'block' or 'sample'"
+
+# Callable that determines the roles of the user, called with the request and the user.
+# Leave None to use the names of the user's groups (reusing prefetched groups when present).
+# Available: 'django_audit_log.roles.get_roles_from_claim' and 'django_audit_log.roles.get_roles_from_cache'
+ROLES_CALLABLE_PATH = getattr(settings, 'AUDIT_LOG_ROLES_CALLABLE_PATH', None)
+
+# Name of the claim (in request.auth, e.g. a JWT payload, or the session) holding the roles of the user
+ROLES_CLAIM = getattr(settings, 'AUDIT_LOG_ROLES_CLAIM', 'roles')
+
+# Cache alias and timeout (in seconds) used by get_roles_from_cache
+ROLES_CACHE = getattr(settings, 'AUDIT_LOG_ROLES_CACHE', 'default')
+ROLES_CACHE_TIMEOUT = getattr(settings, 'AUDIT_LOG_ROLES_CACHE_TIMEOUT', 300)
+
+# Only keep a reference to the request when the audit log is attached, and build the http_request
+# and user sections of the log when it is sent. Logs that are never sent (e.g. because the view
+# raised an exception) then cost almost nothing. Note that the user section reflects the user at
+# the time the log is sent. Default: False
+LAZY_RECORD = getattr(settings, 'AUDIT_LOG_LAZY_RECORD', False)
+
+# Callable returning the policy (see django_audit_log.policy.AuditLogPolicy) that decides which requests
+# are logged. Leave None to use an AuditLogPolicy configured with the settings below.
+POLICY_CALLABLE_PATH = getattr(settings, 'AUDIT_LOG_POLICY_CALLABLE_PATH', None)
+
+# Fraction (0.0 - 1.0) of the requests that is logged when no sampling rule matches. Default: 1.0 (everything)
+SAMPLING_RATE = getattr(settings, 'AUDIT_LOG_SAMPLING_RATE', 1.0)
+
+# Sampling rules, the first rule matching the request determines the sampling rate. A rule matches when all
+# of its optional conditions ('url_name', 'method' and 'status', single values or lists) match, e.g.
+# AUDIT_LOG_SAMPLING_RULES = [{'url_name': 'health', 'rate': 0.0}, {'method': 'GET', 'status': 200, 'rate': 0.1}]
+SAMPLING_RULES = getattr(settings, 'AUDIT_LOG_SAMPLING_RULES', [])
+
+# Requests that are logged regardless of sampling and rate limiting:
+# 'error' (status code >= 400), 'write' (unsafe http method) and/or 'authenticated' (authenticated user)
+ALWAYS_LOG = getattr(settings, 'AUDIT_LOG_ALWAYS_LOG', ['error', 'write'])
+
+# Maximum number of logged requests per client ip, as a (number of requests, period in seconds) tuple.
+# The limit is enforced per process. Default: None (no limit)
+RATE_LIMIT = getattr(settings, 'AUDIT_LOG_RATE_LIMIT', None)
+
+assert type(SAMPLING_RULES) is list, "SAMPLING_RULES must be a list"
+
+# Response headers added to the audit log. Leave None to add all headers except the AUDIT_LOG_RESPONSE_HEADERS_EXCLUDE
+# ones, or list the headers to add, e.g. AUDIT_LOG_RESPONSE_HEADERS = ['Content-Type', 'Content-Length', 'Location'].
+# The values of the AUDIT_LOG_RESPONSE_HEADERS_REDACT headers are replaced by '[redacted]'. Names are case insensitive.
+RESPONSE_HEADERS = getattr(settings, 'AUDIT_LOG_RESPONSE_HEADERS', None)
+RESPONSE_HEADERS_EXCLUDE = getattr(settings, 'AUDIT_LOG_RESPONSE_HEADERS_EXCLUDE', [])
+RESPONSE_HEADERS_REDACT = getattr(
+    settings, 'AUDIT_LOG_RESPONSE_HEADERS_REDACT', ['Set-Cookie']
+)
+
+# Values redacted from every audit log. Paths select values by their keys, '*' matches any key or list item, e.g.
+# AUDIT_LOG_REDACT_PATHS = ['user.email', 'results.*.password']. Patterns are regular expressions, the matching parts
+# of all string values are redacted, e.g. AUDIT_LOG_REDACT_PATTERNS = [r'\b\d{4}( ?\d{4}){3}\b'] (card numbers).
+REDACT_PATHS = getattr(settings, 'AUDIT_LOG_REDACT_PATHS', [])
+REDACT_PATTERNS = getattr(settings, 'AUDIT_LOG_REDACT_PATTERNS', [])
+
+# Paths redacted from the results and filter sections added by the Django Rest Framework viewsets of a model, by
+# model label, e.g. AUDIT_LOG_REDACT_MODEL_PATHS = {'auth.User': ['results.*.password', 'filter.kwargs.email']}
+REDACT_MODEL_PATHS = getattr(settings, 'AUDIT_LOG_REDACT_MODEL_PATHS', {})
+
+# Default limits for the results that the Django Rest Framework viewsets add to the audit log: the maximum
+# number of objects and the maximum (JSON encoded) size in bytes. Default: None (no limit)
+RESULTS_MAX_ITEMS = getattr(settings, 'AUDIT_LOG_RESULTS_MAX_ITEMS', None)
+RESULTS_MAX_BYTES = getattr(settings, 'AUDIT_LOG_RESULTS_MAX_BYTES', None)
+
+# JSON encoder used by django_audit_log.formatter.AuditLogJSONFormatter: 'orjson', 'msgspec', 'ujson' or 'json'.
+# Leave None to use the fastest installed encoder.
+JSON_ENCODER = getattr(settings, 'AUDIT_LOG_JSON_ENCODER', None)
+
+# Settings of django_audit_log.handlers.BatchingHTTPHandler, which POSTs the logs in batches as newline delimited
+# JSON to AUDIT_LOG_HTTP_URL. A batch is sent when it holds AUDIT_LOG_HTTP_BATCH_SIZE logs or when
+# AUDIT_LOG_HTTP_FLUSH_INTERVAL seconds have passed. Failed batches are retried AUDIT_LOG_HTTP_MAX_RETRIES times
+# with exponential backoff (starting at AUDIT_LOG_HTTP_BACKOFF seconds) and are then appended to the
+# AUDIT_LOG_HTTP_SPILL_PATH file (when set), which is sent as soon as the endpoint is available again.
+HTTP_URL = getattr(settings, 'AUDIT_LOG_HTTP_URL', None)
+HTTP_HEADERS = getattr(settings, 'AUDIT_LOG_HTTP_HEADERS', {})
+HTTP_BATCH_SIZE = getattr(settings, 'AUDIT_LOG_HTTP_BATCH_SIZE', 100)
+HTTP_FLUSH_INTERVAL = getattr(settings, 'AUDIT_LOG_HTTP_FLUSH_INTERVAL', 5.0)
+HTTP_TIMEOUT = getattr(settings, 'AUDIT_LOG_HTTP_TIMEOUT', 10.0)
+HTTP_GZIP = getattr(settings, 'AUDIT_LOG_HTTP_GZIP', True)
+HTTP_MAX_RETRIES = getattr(settings, 'AUDIT_LOG_HTTP_MAX_RETRIES', 3)
+HTTP_BACKOFF = getattr(settings, 'AUDIT_LOG_HTTP_BACKOFF', 0.5)
+HTTP_SPILL_PATH = getattr(settings, 'AUDIT_LOG_HTTP_SPILL_PATH', None)
+
+# Directory of the durable spool. When set, the logs are appended to memory-mapped segment files in this directory
+# instead of being passed to the configured log handler; the `drain_audit_log_spool` management command forwards
+# them to the handler. A segment holds AUDIT_LOG_SPOOL_SEGMENT_SIZE bytes and is flushed to disk every
+# AUDIT_LOG_SPOOL_FSYNC_INTERVAL seconds (0 leaves flushing to the operating system).
+SPOOL_PATH = getattr(settings, 'AUDIT_LOG_SPOOL_PATH', None)
+SPOOL_SEGMENT_SIZE = getattr(settings, 'AUDIT_LOG_SPOOL_SEGMENT_SIZE', 16 * 1024 * 1024)
+SPOOL_FSYNC_INTERVAL = getattr(settings, 'AUDIT_LOG_SPOOL_FSYNC_INTERVAL', 1.0)
+
+# Seconds the drain waits for new logs when the spool is empty, and the maximum number of logs it reads at once
+SPOOL_DRAIN_INTERVAL = getattr(settings, 'AUDIT_LOG_SPOOL_DRAIN_INTERVAL', 1.0)
+SPOOL_DRAIN_BATCH_SIZE = getattr(settings, 'AUDIT_LOG_SPOOL_DRAIN_BATCH_SIZE', 1000)
+
+# Unix domain socket of the per host aggregator (the `run_audit_log_aggregator` management command). When set, the
+# worker processes send the logs to the aggregator, which passes the logs of all workers to the configured log handler.
+AGGREGATOR_SOCKET = getattr(settings, 'AUDIT_LOG_AGGREGATOR_SOCKET', None)
+
+# What to do with a log when the aggregator is unavailable or does not keep up:
+# 'drop': discard the log, try to reconnect at most every AUDIT_LOG_AGGREGATOR_RETRY_INTERVAL seconds
+# 'block': wait at most AUDIT_LOG_AGGREGATOR_TIMEOUT seconds (None waits forever) for the aggregator
+AGGREGATOR_OVERFLOW_POLICY = getattr(
+    settings, 'AUDIT_LOG_AGGREGATOR_OVERFLOW_POLICY', 'drop'
+)
+AGGREGATOR_TIMEOUT = getattr(settings, 'AUDIT_LOG_AGGREGATOR_TIMEOUT', 1.0)
+AGGREGATOR_RETRY_INTERVAL = getattr(
+    settings, 'AUDIT_LOG_AGGREGATOR_RETRY_INTERVAL', 1.0
+)
+
+assert AGGREGATOR_OVERFLOW_POLICY in (
+    'drop',
+    'block',
+), "AGGREGATOR_OVERFLOW_POLICY must be one of 'drop' or 'block'"
+
+# Settings of django_audit_log.db.handlers.DatabaseHandler, which stores the logs in the database (add
+# 'django_audit_log.db' to INSTALLED_APPS). A batch of AUDIT_LOG_DB_BATCH_SIZE logs is inserted at once, at least
+# every AUDIT_LOG_DB_FLUSH_INTERVAL seconds, using the AUDIT_LOG_DB_ALIAS database.
+DB_ALIAS = getattr(settings, 'AUDIT_LOG_DB_ALIAS', 'default')
+DB_BATCH_SIZE = getattr(settings, 'AUDIT_LOG_DB_BATCH_SIZE', 500)
+DB_FLUSH_INTERVAL = getattr(settings, 'AUDIT_LOG_DB_FLUSH_INTERVAL', 1.0)
+
+# Partition the table by month (PostgreSQL only). Must be set before the migrations of 'django_audit_log.db' run.
+# The initial migration creates the partitions of the current month and the AUDIT_LOG_DB_PARTITIONS_AHEAD months
+# after it, the `create_audit_log_partitions` management command creates the partitions of later months.
+DB_PARTITIONED = getattr(settings, 'AUDIT_LOG_DB_PARTITIONED', False)
+DB_PARTITIONS_AHEAD = getattr(settings, 'AUDIT_LOG_DB_PARTITIONS_AHEAD', 3)
+
+# Number of days the `purge_audit_log` management command keeps the stored logs. Default: None (pass --days)
+DB_RETENTION_DAYS = getattr(settings, 'AUDIT_LOG_DB_RETENTION_DAYS', None)
+
+# Callable returning the sink that receives the metrics of the audit log pipeline (stage timings, emitted, dropped and
+# failed logs and the delivery queue depth), e.g. 'django_audit_log.metrics.SnapshotSink',
+# 'django_audit_log.metrics.StatsdSink' or 'django_audit_log.metrics.PrometheusSink'. Default: None (no metrics)
+METRICS_SINK_CALLABLE_PATH = getattr(
+    settings, 'AUDIT_LOG_METRICS_SINK_CALLABLE_PATH', None
+)
+METRICS_PREFIX = getattr(settings, 'AUDIT_LOG_METRICS_PREFIX', 'django_audit_log')
+METRICS_STATSD_HOST = getattr(settings, 'AUDIT_LOG_METRICS_STATSD_HOST', 'localhost')
+METRICS_STATSD_PORT = getattr(settings, 'AUDIT_LOG_METRICS_STATSD_PORT', 8125)
+
+# Coalesce the logs of repeated GET and HEAD requests with the same user, ip, path (with the query string),
+# filter and status within AUDIT_LOG_COALESCE_WINDOW seconds into a single log, with the count and the first and
+# last timestamps. The logs are sent when their window ends. Default: None (every request is logged separately)
+COALESCE_WINDOW = getattr(settings, 'AUDIT_LOG_COALESCE_WINDOW', None)
+
+# Maximum number of keys held while coalescing, the log of the least recently used key is sent when a new key
+# does not fit
+COALESCE_MAX_KEYS = getattr(settings, 'AUDIT_LOG_COALESCE_MAX_KEYS', 10000)
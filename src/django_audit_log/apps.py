@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class DjangoAuditLogConfig(AppConfig):
+    name = 'django_audit_log'
+    verbose_name = 'Audit log'
+
+    def ready(self):
+        from django_audit_log import signals
+
+        signals.connect_roles_cache_signals()
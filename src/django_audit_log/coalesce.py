@@ -0,0 +1,179 @@
+"""
+Coalescing of repeated reads (e.g. clients polling an endpoint) into a single
+log.
+
+With AUDIT_LOG_COALESCE_WINDOW, the logs of GET and HEAD requests are held
+back by key: the user, ip, method, path (with the query string), filter and
+status. Logs
+with the same key within the window are merged into the first log, which is
+sent when its window ends with a `coalesced` section: the count and the
+timestamps of the first and last request. A log that was not repeated is sent
+unchanged.
+
+At most AUDIT_LOG_COALESCE_MAX_KEYS keys are held, the least recently used
+key is sent when a new key does not fit.
+"""
+
+import datetime
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django_audit_log import app_settings, metrics
+
+READ_METHODS = frozenset(('GET', 'HEAD'))
+
+_UNRESOLVED = object()
+_coalescer = _UNRESOLVED
+_coalescer_lock = threading.Lock()
+
+
+class _Entry:
+    __slots__ = ('logger', 'record', 'count', 'last')
+
+    def __init__(self, logger: logging.Logger, record: logging.LogRecord):
+        self.logger = logger
+        self.record = record
+        self.count = 1
+        self.last = record.created
+
+
+class AuditLogCoalescer:
+    """
+    Holds the logs of each key for `window` seconds. A background thread
+    sends the logs of which the window ended.
+    """
+
+    thread_name = 'audit-log-coalescer'
+
+    def __init__(self, window: float, max_keys: int = 10000):
+        self.window = window
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=self.thread_name, daemon=True
+        )
+        self._thread.start()
+
+    def add(self, logger: logging.Logger, key: tuple, record: logging.LogRecord):
+        """
+        Merge the record into the held log of the key, or hold it when there is
+        none or the window of that log ended.
+        """
+        expired = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if record.created - entry.record.created < self.window:
+                    entry.count += 1
+                    entry.last = record.created
+                    self._entries.move_to_end(key)
+                    metrics.count(metrics.COALESCED)
+                    return
+                expired = self._entries.pop(key)
+            elif len(self._entries) >= self.max_keys:
+                expired = self._entries.popitem(last=False)[1]
+            self._entries[key] = _Entry(logger, record)
+
+        if expired is not None:
+            self._send(expired)
+
+    def flush(self, now: float = None) -> None:
+        """
+        Send the logs of which the window ended before `now`, all held logs
+        when `now` is None.
+        """
+        with self._lock:
+            if now is None:
+                expired = list(self._entries.values())
+                self._entries.clear()
+            else:
+                keys = [
+                    key
+                    for key, entry in self._entries.items()
+                    if now - entry.record.created >= self.window
+                ]
+                expired = [self._entries.pop(key) for key in keys]
+
+        for entry in expired:
+            self._send(entry)
+
+    def close(self) -> None:
+        """
+        Stop the thread and send all held logs.
+        """
+        if not self._closed.is_set():
+            self._closed.set()
+            self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.window):
+            self.flush(time.time())
+
+    def _send(self, entry: _Entry) -> None:
+        record = entry.record
+        if entry.count > 1:
+            record.audit['coalesced'] = {
+                'count': entry.count,
+                'first': _isoformat(record.created),
+                'last': _isoformat(entry.last),
+            }
+        entry.logger.handle(record)
+        metrics.count(metrics.EMITTED)
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+
+def get_key(extras: dict, path: str) -> tuple:
+    """
+    The key of the log with the `extras` sections, logs with the same key are
+    coalesced.
+    """
+    user = extras.get('user') or {}
+    http_request = extras.get('http_request') or {}
+    http_response = extras.get('http_response') or {}
+    return (
+        user.get('email'),
+        user.get('username'),
+        user.get('ip'),
+        http_request.get('method'),
+        path,
+        repr(extras.get('filter')),
+        http_response.get('status_code'),
+    )
+
+
+def get_coalescer():
+    """
+    The AuditLogCoalescer of the AUDIT_LOG_COALESCE_* settings, None when
+    coalescing is disabled.
+    """
+    global _coalescer
+    if _coalescer is _UNRESOLVED:
+        with _coalescer_lock:
+            if _coalescer is _UNRESOLVED:
+                window = app_settings.COALESCE_WINDOW
+                _coalescer = (
+                    AuditLogCoalescer(window, app_settings.COALESCE_MAX_KEYS)
+                    if window
+                    else None
+                )
+    return _coalescer
+
+
+def reset() -> None:
+    """
+    Send the held logs and resolve the coalescer from the settings again on
+    next use. Called by delivery.shutdown(), before the queues are stopped.
+    """
+    global _coalescer
+    with _coalescer_lock:
+        coalescer, _coalescer = _coalescer, _UNRESOLVED
+    if coalescer is not _UNRESOLVED and coalescer is not None:
+        coalescer.close()
@@ -0,0 +1 @@
+default_app_config = 'django_audit_log.db.apps.AuditLogDbConfig'
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class AuditLogDbConfig(AppConfig):
+    name = 'django_audit_log.db'
+    label = 'django_audit_log_db'
+    verbose_name = 'Audit log store'
@@ -0,0 +1,68 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+from django_audit_log.encoders import get_encoder
+
+CSV_FIELDS = (
+    'id',
+    'timestamp',
+    'level',
+    'message',
+    'method',
+    'url',
+    'status',
+    'user',
+    'ip',
+    'object_type',
+    'object_id',
+)
+
+
+class Echo:
+    """
+    File-like object returning what is written to it, to stream the rows
+    the csv writer writes.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_csv(queryset, chunk_size: int = 1000) -> StreamingHttpResponse:
+    """
+    Stream the entries as CSV, fetching `chunk_size` entries per query.
+    The payload is not exported (nor loaded).
+    """
+    writer = csv.writer(Echo())
+
+    def rows():
+        yield writer.writerow(CSV_FIELDS)
+        for entry in queryset.defer('payload').iterate(chunk_size):
+            yield writer.writerow([getattr(entry, field) for field in CSV_FIELDS])
+
+    return _streaming_response(rows(), 'text/csv', 'audit_log.csv')
+
+
+def export_ndjson(queryset, chunk_size: int = 1000) -> StreamingHttpResponse:
+    """
+    Stream the entries as newline delimited JSON, a line per entry holding
+    its id, timestamp and the logged audit section.
+    """
+    encoder = get_encoder()
+
+    def lines():
+        for entry in queryset.iterate(chunk_size):
+            yield encoder.encode(
+                {'id': entry.pk, 'timestamp': entry.timestamp, 'audit': entry.payload}
+            ) + b'\n'
+
+    return _streaming_response(lines(), 'application/x-ndjson', 'audit_log.ndjson')
+
+
+def _streaming_response(
+    content, content_type: str, filename: str
+) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    return response
@@ -0,0 +1,70 @@
+import datetime
+import json
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from django_audit_log import app_settings, metrics
+from django_audit_log.db.models import AuditLogEntry
+from django_audit_log.handlers import BatchingHandler
+
+
+class DatabaseHandler(BatchingHandler):
+    """
+    Stores the logs as AuditLogEntry rows, inserted with bulk_create in
+    batches by a background thread. The inserts use their own connection
+    (per thread), so they are not part of the transaction of the request and
+    a request that is rolled back keeps its log.
+
+    Defaults to the AUDIT_LOG_DB_* settings:
+
+        AUDIT_LOG_HANDLER_CALLABLE_PATH = 'django_audit_log.db.handlers.DatabaseHandler'
+    """
+
+    thread_name = 'audit-log-database-handler'
+
+    def __init__(
+        self, batch_size: int = None, flush_interval: float = None, using: str = None
+    ):
+        self.using = using or app_settings.DB_ALIAS
+        super().__init__(
+            batch_size or app_settings.DB_BATCH_SIZE,
+            flush_interval or app_settings.DB_FLUSH_INTERVAL,
+        )
+
+    def prepare(self, record: logging.LogRecord) -> AuditLogEntry:
+        audit = getattr(record, 'audit', None)
+        if audit is None:
+            # Formatted already, e.g. forwarded by the spool drain or the aggregator
+            audit = json.loads(record.getMessage()).get('audit', {})
+        return AuditLogEntry.from_audit(audit, _get_timestamp(record))
+
+    def _run(self) -> None:
+        try:
+            super()._run()
+        finally:
+            # Connections are per thread, close the connections of the background thread
+            connections.close_all()
+
+    def _ship(self, batch: list) -> None:
+        connection = connections[self.using]
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+        try:
+            AuditLogEntry.objects.using(self.using).bulk_create(batch)
+        except DatabaseError:
+            metrics.count(metrics.FAILED, len(batch))
+            logging.getLogger(__name__).exception(
+                "Dropped %d audit logs, failed to store them", len(batch)
+            )
+
+
+def _get_timestamp(record: logging.LogRecord) -> datetime.datetime:
+    timestamp = datetime.datetime.fromtimestamp(
+        record.created, tz=datetime.timezone.utc
+    )
+    if not settings.USE_TZ:
+        timestamp = timezone.make_naive(timestamp)
+    return timestamp
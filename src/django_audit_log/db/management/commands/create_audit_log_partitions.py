@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from django_audit_log import app_settings
+from django_audit_log.db import partitioning
+
+
+class Command(BaseCommand):
+    help = "Create the monthly partitions of the audit log table ahead of time (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=app_settings.DB_PARTITIONS_AHEAD,
+            help="Number of months after the current month to create partitions for",
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not partitioning.is_partitioned(connection):
+            raise CommandError(
+                "The audit log table is not partitioned, see AUDIT_LOG_DB_PARTITIONED"
+            )
+
+        for name in partitioning.create_partitions(connection, options['months']):
+            self.stdout.write("Created partition %s" % name)
@@ -0,0 +1,52 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from django_audit_log import app_settings
+from django_audit_log.db import partitioning
+from django_audit_log.db.models import AuditLogEntry
+
+
+class Command(BaseCommand):
+    help = "Delete the stored audit logs older than AUDIT_LOG_DB_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help="Days to keep, defaults to AUDIT_LOG_DB_RETENTION_DAYS",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help="Maximum number of logs deleted per statement",
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        days = (
+            options['days']
+            if options['days'] is not None
+            else app_settings.DB_RETENTION_DAYS
+        )
+        if days is None:
+            raise CommandError("Set AUDIT_LOG_DB_RETENTION_DAYS or pass --days")
+
+        using = options['database']
+        before = timezone.now() - datetime.timedelta(days=days)
+        connection = connections[using]
+        if partitioning.is_partitioned(connection):
+            for name in partitioning.drop_partitions(connection, before):
+                self.stdout.write("Dropped partition %s" % name)
+
+        deleted = (
+            AuditLogEntry.objects.using(using)
+            .filter(timestamp__lt=before)
+            .delete_in_chunks(options['chunk_size'])
+        )
+        self.stdout.write(
+            "Deleted %d audit logs older than %s" % (deleted, before.isoformat())
+        )
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-18 00:17
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+import django_audit_log.db.partitioning
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField()),
+                ('level', models.CharField(max_length=10)),
+                ('message', models.TextField(blank=True)),
+                ('method', models.CharField(blank=True, max_length=10)),
+                ('url', models.TextField(blank=True)),
+                ('status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('user', models.CharField(blank=True, max_length=255)),
+                ('ip', models.CharField(blank=True, max_length=45)),
+                ('object_type', models.CharField(blank=True, max_length=100)),
+                ('object_id', models.CharField(blank=True, max_length=255)),
+                (
+                    'payload',
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'audit log entry',
+                'verbose_name_plural': 'audit log entries',
+                'db_table': 'django_audit_log_entry',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(fields=['timestamp'], name='audit_log_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(fields=['status'], name='audit_log_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(
+                fields=['user', 'timestamp'], name='audit_log_user_time_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(
+                fields=['object_type', 'object_id'], name='audit_log_object_idx'
+            ),
+        ),
+        migrations.RunPython(
+            django_audit_log.db.partitioning.partition_table,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.2.25 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_audit_log_db', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlogentry',
+            name='audit_log_timestamp_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlogentry',
+            name='audit_log_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlogentry',
+            name='audit_log_user_time_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlogentry',
+            name='audit_log_object_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(fields=['timestamp', 'id'], name='audit_log_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(
+                fields=['user', 'timestamp', 'id'], name='audit_log_user_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(
+                fields=['ip', 'timestamp', 'id'], name='audit_log_ip_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(
+                fields=['object_type', 'object_id', 'timestamp', 'id'],
+                name='audit_log_object_time_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(
+                fields=['method', 'timestamp', 'id'], name='audit_log_method_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(
+                fields=['status', 'timestamp', 'id'], name='audit_log_status_time_idx'
+            ),
+        ),
+    ]
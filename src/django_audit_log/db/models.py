@@ -0,0 +1,165 @@
+import re
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+
+LOOKUP_KEY = re.compile(r'^[A-Za-z0-9]+(_[A-Za-z0-9]+)*$')
+
+
+class AuditLogEntryQuerySet(models.QuerySet):
+    def search(
+        self,
+        user: str = None,
+        ip: str = None,
+        object_type: str = None,
+        object_id: str = None,
+        lookup: dict = None,
+        method: str = None,
+        status: int = None,
+        since=None,
+        until=None,
+    ) -> 'AuditLogEntryQuerySet':
+        """
+        Filter on the indexed columns. `lookup` matches the lookup kwargs of
+        the filter section (e.g. {'pk': '1'}), `since` and `until` limit the
+        timestamp (inclusive and exclusive).
+        """
+        filters = {
+            'user': user,
+            'ip': ip,
+            'object_type': object_type,
+            'object_id': object_id,
+            'method': method,
+            'status': status,
+            'timestamp__gte': since,
+            'timestamp__lt': until,
+        }
+        for key, value in (lookup or {}).items():
+            if not LOOKUP_KEY.match(key):
+                # Would be interpreted as a lookup or transform
+                raise ValueError("Invalid lookup key: %s" % key)
+            filters['payload__filter__kwargs__%s' % key] = value
+        return self.filter(
+            **{name: value for name, value in filters.items() if value is not None}
+        )
+
+    def newest_first(self) -> 'AuditLogEntryQuerySet':
+        return self.order_by('-timestamp', '-id')
+
+    def before(self, timestamp, pk: int) -> 'AuditLogEntryQuerySet':
+        """
+        The entries after the (timestamp, pk) position in newest_first() order,
+        to paginate on the (covering) indexes instead of with an OFFSET.
+        """
+        return self.filter(
+            Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk)
+        )
+
+    def iterate(self, chunk_size: int):
+        """
+        Iterate over the entries, newest first, fetching `chunk_size` entries
+        per query, so the result set is never loaded into memory at once.
+        """
+        queryset = self.newest_first()
+        chunk = list(queryset[:chunk_size])
+        while chunk:
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+            last = chunk[-1]
+            chunk = list(queryset.before(last.timestamp, last.pk)[:chunk_size])
+
+    def delete_in_chunks(self, chunk_size: int) -> int:
+        """
+        Delete the entries in separate statements of at most `chunk_size`
+        rows, to keep the transactions (and locks) short. Returns the number
+        of deleted entries.
+        """
+        deleted = 0
+        while True:
+            pks = list(self.values_list('pk', flat=True)[:chunk_size])
+            if pks:
+                count, _ = self.model.objects.using(self.db).filter(pk__in=pks).delete()
+                deleted += count
+            if len(pks) < chunk_size:
+                return deleted
+
+
+class AuditLogEntry(models.Model):
+    """
+    An audit log stored in the database, see DatabaseHandler. The complete
+    log is kept in `payload`, the columns hold the fields to query on.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    timestamp = models.DateTimeField()
+    level = models.CharField(max_length=10)
+    message = models.TextField(blank=True)
+    method = models.CharField(max_length=10, blank=True)
+    url = models.TextField(blank=True)
+    status = models.PositiveSmallIntegerField(null=True, blank=True)
+    user = models.CharField(max_length=255, blank=True)
+    ip = models.CharField(max_length=45, blank=True)
+    object_type = models.CharField(max_length=100, blank=True)
+    object_id = models.CharField(max_length=255, blank=True)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+
+    objects = AuditLogEntryQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'django_audit_log_entry'
+        verbose_name = 'audit log entry'
+        verbose_name_plural = 'audit log entries'
+        # Declared here (not with db_index) so the indexes can be created on a partitioned table as well
+        # The (timestamp, id) suffix matches the newest_first() keyset pagination
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='audit_log_time_idx'),
+            models.Index(fields=['user', 'timestamp', 'id'], name='audit_log_user_idx'),
+            models.Index(fields=['ip', 'timestamp', 'id'], name='audit_log_ip_idx'),
+            models.Index(
+                fields=['object_type', 'object_id', 'timestamp', 'id'],
+                name='audit_log_object_time_idx',
+            ),
+            models.Index(
+                fields=['method', 'timestamp', 'id'], name='audit_log_method_idx'
+            ),
+            models.Index(
+                fields=['status', 'timestamp', 'id'], name='audit_log_status_time_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return '%s %s %s' % (self.timestamp, self.level, self.message)
+
+    @classmethod
+    def from_audit(cls, audit: dict, timestamp) -> 'AuditLogEntry':
+        http_request = audit.get('http_request') or {}
+        http_response = audit.get('http_response') or {}
+        user = audit.get('user') or {}
+        audit_filter = audit.get('filter') or {}
+        return cls(
+            timestamp=timestamp,
+            level=audit.get('type') or '',
+            message=audit.get('message') or '',
+            method=http_request.get('method') or '',
+            url=http_request.get('url') or '',
+            status=http_response.get('status_code'),
+            user=user.get('username') or user.get('email') or '',
+            ip=user.get('ip') or '',
+            object_type=audit_filter.get('object') or '',
+            object_id=_get_object_id(audit_filter.get('kwargs')),
+            payload=audit,
+        )
+
+
+def _get_object_id(kwargs: dict) -> str:
+    """
+    The looked up object id of retrieve, update and destroy logs, e.g. {'pk': '1'}
+    """
+    if not kwargs or len(kwargs) != 1:
+        return ''
+    (value,) = kwargs.values()
+    if isinstance(value, (str, int)):
+        return str(value)
+    return ''
@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates AuditLogEntry querysets newest first on the (timestamp, id)
+    position of the last entry of the page, instead of with an OFFSET that
+    has to skip all entries of the previous pages. The cursor is opaque to
+    the client and only the next page can be requested.
+    """
+
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None) -> list:
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.newest_first()
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.before(*position)
+
+        # Fetch one entry more to know whether there is a next page
+        page = list(queryset[: page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = (page[-1].timestamp, page[-1].pk)
+        return page
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self) -> str:
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def encode_cursor(self, position: tuple) -> str:
+        timestamp, pk = position
+        data = json.dumps([timestamp.isoformat(), pk]).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, request) -> tuple:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            timestamp, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            timestamp = parse_datetime(timestamp)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None or not isinstance(pk, int):
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, pk
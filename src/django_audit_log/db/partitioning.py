@@ -0,0 +1,175 @@
+"""
+Monthly range partitioning of the audit log table on PostgreSQL (11 or later).
+
+With AUDIT_LOG_DB_PARTITIONED the initial migration creates the table
+partitioned by month on the timestamp, with a default partition for logs
+outside of the created partitions. Purging the logs of a month then drops
+its partition instead of deleting the rows.
+"""
+
+import datetime
+import re
+
+from django.utils import timezone
+
+from django_audit_log import app_settings
+
+TABLE = 'django_audit_log_entry'
+DEFAULT_PARTITION = TABLE + '_default'
+PARTITION_NAME = re.compile(r'^%s_y(\d{4})m(\d{2})$' % TABLE)
+
+
+def is_supported(connection) -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(connection) -> bool:
+    if not is_supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def get_month(value: datetime.date) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def get_partition_name(month: datetime.date) -> str:
+    return '%s_y%04dm%02d' % (TABLE, month.year, month.month)
+
+
+def get_partitions(connection) -> dict:
+    """
+    The monthly partitions of the table by their first day.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            month = datetime.date(int(match.group(1)), int(match.group(2)), 1)
+            partitions[month] = name
+    return partitions
+
+
+def create_partitions(
+    connection, months_ahead: int, start: datetime.date = None
+) -> list:
+    """
+    Create the partitions of the month of `start` (default: now) and the
+    `months_ahead` months after it. Returns the names of the created partitions.
+    """
+    month = get_month(start or timezone.now().date())
+    existing = get_partitions(connection)
+    quote_name = connection.ops.quote_name
+    created = []
+    with connection.cursor() as cursor:
+        for _ in range(months_ahead + 1):
+            if month not in existing:
+                name = get_partition_name(month)
+                cursor.execute(
+                    "CREATE TABLE %s PARTITION OF %s FOR VALUES FROM (%%s) TO (%%s)"
+                    % (quote_name(name), quote_name(TABLE)),
+                    [month.isoformat(), add_months(month, 1).isoformat()],
+                )
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def drop_partitions(connection, before: datetime.datetime) -> list:
+    """
+    Drop the partitions that only hold logs older than `before`. Returns the
+    names of the dropped partitions.
+    """
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in sorted(get_partitions(connection).items()):
+            if _as_datetime(add_months(month, 1), before) > before:
+                break
+            cursor.execute('DROP TABLE %s' % connection.ops.quote_name(name))
+            dropped.append(name)
+    return dropped
+
+
+def partition_table(apps, schema_editor) -> None:
+    """
+    Recreate the (empty) audit log table as a partitioned table, used by the
+    initial migration when AUDIT_LOG_DB_PARTITIONED is set.
+    """
+    connection = schema_editor.connection
+    if (
+        not app_settings.DB_PARTITIONED
+        or not is_supported(connection)
+        or is_partitioned(connection)
+    ):
+        return
+
+    model = apps.get_model('django_audit_log_db', 'AuditLogEntry')
+    quote_name = connection.ops.quote_name
+    table = quote_name(TABLE)
+    old_table = quote_name(TABLE + '_unpartitioned')
+    schema_editor.execute('ALTER TABLE %s RENAME TO %s' % (table, old_table))
+    sequence = _get_serial_sequence(connection, old_table)
+    schema_editor.execute(
+        'CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS) '
+        'PARTITION BY RANGE (%s)' % (table, old_table, quote_name('timestamp'))
+    )
+    # The primary key of a partitioned table must include the partition key
+    schema_editor.execute(
+        'ALTER TABLE %s ADD PRIMARY KEY (%s, %s)'
+        % (table, quote_name('id'), quote_name('timestamp'))
+    )
+    if sequence is not None:
+        # Keep the sequence of the serial column when the old table is dropped
+        schema_editor.execute(
+            'ALTER SEQUENCE %s OWNED BY %s.%s' % (sequence, table, quote_name('id'))
+        )
+    schema_editor.execute('DROP TABLE %s' % old_table)
+    for index in model._meta.indexes:
+        schema_editor.execute(index.create_sql(model, schema_editor))
+    schema_editor.execute(
+        'CREATE TABLE %s PARTITION OF %s DEFAULT'
+        % (quote_name(DEFAULT_PARTITION), table)
+    )
+    create_partitions(connection, app_settings.DB_PARTITIONS_AHEAD)
+
+
+def _get_serial_sequence(connection, table: str) -> str:
+    """
+    The sequence of the serial `id` column of the (quoted) table, None when
+    it is an identity column (AutoField on Django 4.1 or later). LIKE ...
+    INCLUDING IDENTITY gives the new table its own identity sequence.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_serial_sequence(%s, 'id') FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attname = 'id' AND attidentity = ''",
+            [table, table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _as_datetime(month: datetime.date, like: datetime.datetime) -> datetime.datetime:
+    value = datetime.datetime(month.year, month.month, month.day)
+    if timezone.is_aware(like):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
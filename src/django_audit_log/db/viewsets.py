@@ -0,0 +1,87 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+
+from django_audit_log.db.export import export_csv, export_ndjson
+from django_audit_log.db.models import AuditLogEntry
+from django_audit_log.db.pagination import KeysetPagination
+from django_audit_log.rest_framework.viewsets import AuditLogReadOnlyViewSet
+
+# Query parameters matching the lookup kwargs of the filter section, e.g. ?lookup.pk=1
+LOOKUP_PREFIX = 'lookup.'
+
+
+class AuditLogEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditLogEntry
+        fields = '__all__'
+
+
+class AuditLogEntryViewSet(AuditLogReadOnlyViewSet):
+    """
+    Search the stored audit logs, newest first, on the query parameters:
+
+    user, ip, object_type, object_id, method, status, since and until (ISO 8601
+    timestamps) and lookup.<kwarg> (e.g. lookup.pk=1).
+
+    The list is paginated on a keyset cursor. The `export/csv` and
+    `export/ndjson` actions stream all matching logs.
+    """
+
+    queryset = AuditLogEntry.objects.all()
+    serializer_class = AuditLogEntrySerializer
+    pagination_class = KeysetPagination
+    permission_classes = [IsAdminUser]
+    search_parameters = ('user', 'ip', 'object_type', 'object_id', 'method')
+
+    # Number of logs fetched per query by the export
+    export_chunk_size = 1000
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            return queryset
+        try:
+            return queryset.search(**self.get_search_criteria())
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+    def get_search_criteria(self) -> dict:
+        params = self.request.query_params
+        criteria = {
+            name: params[name] for name in self.search_parameters if params.get(name)
+        }
+        if params.get('status'):
+            if not params['status'].isdigit():
+                raise ValidationError({'status': 'A valid integer is required.'})
+            criteria['status'] = int(params['status'])
+        for name in ('since', 'until'):
+            if params.get(name):
+                criteria[name] = self._parse_datetime(name, params[name])
+
+        lookup = {
+            name.split('.', 1)[1]: value
+            for name, value in params.items()
+            if name.startswith(LOOKUP_PREFIX)
+        }
+        if lookup:
+            criteria['lookup'] = lookup
+        return criteria
+
+    @action(detail=False, url_path='export/(?P<export_format>csv|ndjson)')
+    def export(self, request, export_format=None, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if export_format == 'csv':
+            return export_csv(queryset, self.export_chunk_size)
+        return export_ndjson(queryset, self.export_chunk_size)
+
+    def _parse_datetime(self, name: str, value: str):
+        try:
+            timestamp = parse_datetime(value)
+        except ValueError:
+            timestamp = None
+        if timestamp is None:
+            raise ValidationError({name: 'A valid ISO 8601 datetime is required.'})
+        return timestamp
@@ -0,0 +1,211 @@
+import asyncio
+import atexit
+import logging
+import queue
+import random
+import threading
+import weakref
+from logging.handlers import QueueHandler, QueueListener
+
+from django_audit_log import app_settings, coalesce, metrics
+from django_audit_log.handlers import emit_batch
+
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_SAMPLE = 'sample'
+
+_queue_handlers = weakref.WeakSet()
+
+
+class AuditLogQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for a free slot, the queue might be full while stopping
+        self.queue.put(self._sentinel)
+
+    def handle(self, record) -> None:
+        if isinstance(record, list):
+            # The records of AuditLogQueueHandler.handle_batch()
+            for handler in self.handlers:
+                emit_batch(handler, record)
+        else:
+            super().handle(record)
+        # Report the depth as the queue drains, not only when it fills
+        _report_queue_depth(self.queue)
+
+
+class AuditLogQueueHandler(QueueHandler):
+    """
+    Puts audit log records on a bounded queue. A QueueListener worker thread
+    takes them off the queue and passes them to the target handler, which
+    formats and emits them outside of the request/response cycle.
+    """
+
+    def __init__(
+        self,
+        target: logging.Handler,
+        maxsize: int = 10000,
+        overflow_policy: str = OVERFLOW_DROP,
+        block_timeout: float = None,
+        sample_threshold: float = 0.8,
+        sample_rate: float = 0.1,
+    ):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.target = target
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.sample_threshold = int(maxsize * sample_threshold)
+        self.sample_rate = sample_rate
+        self.enqueued = 0
+        self.dropped = 0
+        self._counter_lock = threading.Lock()
+        self._listener = AuditLogQueueListener(
+            self.queue, target, respect_handler_level=True
+        )
+        self._listener.start()
+        self._running = True
+        _queue_handlers.add(self)
+
+    @classmethod
+    def from_settings(cls, target: logging.Handler) -> 'AuditLogQueueHandler':
+        return cls(
+            target,
+            maxsize=app_settings.QUEUE_SIZE,
+            overflow_policy=app_settings.QUEUE_OVERFLOW_POLICY,
+            block_timeout=app_settings.QUEUE_BLOCK_TIMEOUT,
+            sample_threshold=app_settings.QUEUE_SAMPLE_THRESHOLD,
+            sample_rate=app_settings.QUEUE_SAMPLE_RATE,
+        )
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default implementation formats the record in the calling thread,
+        # leave that to the target handler in the worker thread instead.
+        return record
+
+    def handle_batch(self, records: list) -> None:
+        """
+        Put the records of one audit log and its child logs (see
+        handlers.handle_batch()) on the queue as a single item. The worker
+        passes them on to the target handler together, and a full queue drops
+        all of them instead of a part.
+        """
+        records = [record for record in records if self.filter(record)]
+        if records:
+            self.enqueue(records)
+
+    def enqueue(self, record) -> None:
+        """
+        Put a record, or a list of records of handle_batch(), on the queue.
+        """
+        number = len(record) if isinstance(record, list) else 1
+        if (
+            self.overflow_policy == OVERFLOW_SAMPLE
+            and self.queue.qsize() >= self.sample_threshold
+            and random.random() >= self.sample_rate
+        ):
+            self._count(dropped=True, number=number)
+            return
+
+        try:
+            if self.overflow_policy == OVERFLOW_BLOCK:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self._count(dropped=True, number=number)
+        else:
+            self._count(dropped=False, number=number)
+
+    def flush(self) -> None:
+        """
+        Block until all records that are currently queued have been emitted.
+        """
+        if self._running:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self) -> None:
+        """
+        Stop the worker thread after it emitted all queued records.
+        """
+        if self._running:
+            self._running = False
+            self._listener.stop()
+        self.target.close()
+        _queue_handlers.discard(self)
+        super().close()
+
+    def get_stats(self) -> dict:
+        return {
+            'queued': self.queue.qsize(),
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+        }
+
+    def _count(self, dropped: bool, number: int = 1) -> None:
+        with self._counter_lock:
+            if dropped:
+                self.dropped += number
+            else:
+                self.enqueued += number
+
+        if dropped:
+            metrics.count(metrics.DROPPED, number)
+        _report_queue_depth(self.queue)
+
+
+def _report_queue_depth(queue_: queue.Queue) -> None:
+    sink = metrics.get_sink()
+    if sink is not None:
+        sink.queue_depth(queue_.qsize())
+
+
+def get_delivery_stats() -> dict:
+    """
+    Aggregated counters of all active audit log queues.
+    """
+    stats = {'queued': 0, 'enqueued': 0, 'dropped': 0}
+    for handler in list(_queue_handlers):
+        for key, value in handler.get_stats().items():
+            stats[key] += value
+    return stats
+
+
+def shutdown() -> None:
+    """
+    Emit all queued records and stop the worker threads. Called at exit, call
+    it explicitly from hooks that run before the process is terminated (e.g.
+    gunicorn's `worker_exit`).
+    """
+    # The logs held for coalescing are sent first, while the queues still run
+    coalesce.reset()
+    for handler in list(_queue_handlers):
+        handler.close()
+
+
+atexit.register(shutdown)
+
+
+class AuditLogLifespan:
+    """
+    ASGI application wrapper that answers lifespan events (which Django itself
+    does not support) and flushes the audit log queues on shutdown:
+
+        application = AuditLogLifespan(get_asgi_application())
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await self.app(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,137 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+
+from django_audit_log import app_settings
+
+# Types that are never converted by _str_decimals()
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def default(obj):
+    """
+    Encodes the (Django) types the JSON backends do not support natively.
+    Only called for those types, dicts, lists and their subclasses (e.g. DRF's
+    ReturnDict and ReturnList) are encoded by the backends themselves.
+    """
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return duration_iso_string(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+
+
+class JSONEncoder:
+    name = 'json'
+
+    def encode(self, obj) -> bytes:
+        return self.dumps(obj).encode()
+
+    def dumps(self, obj) -> str:
+        return json.dumps(obj, default=default)
+
+
+class OrjsonEncoder(JSONEncoder):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_NON_STR_KEYS
+
+    def encode(self, obj) -> bytes:
+        return self._dumps(obj, default=default, option=self._option)
+
+    def dumps(self, obj) -> str:
+        return self.encode(obj).decode()
+
+
+class MsgspecEncoder(JSONEncoder):
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder(enc_hook=default)
+
+    def encode(self, obj) -> bytes:
+        return self._encoder.encode(obj)
+
+    def dumps(self, obj) -> str:
+        return self.encode(obj).decode()
+
+
+class UjsonEncoder(JSONEncoder):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+
+        self._dumps = ujson.dumps
+
+    def dumps(self, obj) -> str:
+        return self._dumps(_str_decimals(obj), default=default)
+
+
+def _str_decimals(obj):
+    """
+    A copy of obj with the Decimals as str. ujson encodes Decimals as floats
+    itself, losing precision, instead of calling `default` for them.
+    """
+    if isinstance(obj, dict):
+        return {
+            key: value if type(value) in _PLAIN_TYPES else _str_decimals(value)
+            for key, value in obj.items()
+        }
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return [
+            value if type(value) in _PLAIN_TYPES else _str_decimals(value)
+            for value in obj
+        ]
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    return obj
+
+
+# In order of preference. Converting the Decimals makes ujson about as fast as
+# json, it is only used when selected by name.
+ENCODERS = [OrjsonEncoder, MsgspecEncoder, JSONEncoder, UjsonEncoder]
+
+_encoders = {}
+
+
+def get_encoder(name: str = None) -> JSONEncoder:
+    """
+    The JSON encoder with the given name, or the AUDIT_LOG_JSON_ENCODER
+    setting. Leave both None to use the fastest installed encoder.
+    """
+    name = name or app_settings.JSON_ENCODER
+    try:
+        return _encoders[name]
+    except KeyError:
+        pass
+
+    for encoder_class in ENCODERS:
+        if name is not None and encoder_class.name != name:
+            continue
+        try:
+            encoder = encoder_class()
+        except ImportError:
+            if name is not None:
+                raise
+            continue
+        _encoders[name] = encoder
+        return encoder
+
+    raise ValueError("Unknown JSON encoder '%s'" % name)
@@ -0,0 +1,91 @@
+import re
+from functools import lru_cache
+
+from django.http import HttpRequest
+
+from django_audit_log.util import get_url_name
+
+REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()')
+# A numbered backreference (not an escaped backslash followed by a digit) or a
+# conditional on a group number, both refer to other groups once combined
+NUMBERED_GROUP_REFERENCE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d')
+DEFAULT_FLAGS = re.compile('').flags
+
+
+class ExemptUrlMatcher:
+    """
+    Matches request paths against AUDIT_LOG_EXEMPT_URLS in a single pass.
+
+    Patterns that are plain strings anchored at the start and/or the end of the
+    path (e.g. r'^health/', r'metrics$' or r'^foo/bar$') are matched with string
+    operations, all other patterns are combined into a single regular
+    expression. Patterns with numbered backreferences or global inline flags
+    would change the meaning of the combined expression, they are matched one
+    by one. Decisions are cached per path. Requests can also be exempted by
+    (namespaced) url name.
+    """
+
+    def __init__(self, patterns=(), url_names=(), cache_size: int = 1024):
+        self.exact = set()
+        self.prefixes = []
+        self.suffixes = []
+        regexes = []
+        for pattern in patterns:
+            if not self._add_literal(pattern):
+                regexes.append(pattern)
+
+        self.prefixes = tuple(self.prefixes)
+        self.suffixes = tuple(self.suffixes)
+        self.regex = self._compile(regexes)
+        self.url_names = frozenset(url_names)
+        self.has_patterns = bool(patterns)
+        self._is_exempt_path = lru_cache(maxsize=cache_size)(self._match_path)
+
+    def is_exempt(self, request: HttpRequest) -> bool:
+        if self.has_patterns and self._is_exempt_path(request.path.lstrip("/")):
+            return True
+        return bool(self.url_names) and get_url_name(request) in self.url_names
+
+    def _match_path(self, path: str) -> bool:
+        return (
+            path in self.exact
+            or path.startswith(self.prefixes)
+            or path.endswith(self.suffixes)
+            or any(regex.search(path) for regex in self.regex)
+        )
+
+    def _add_literal(self, pattern: str) -> bool:
+        starts = pattern.startswith('^')
+        ends = pattern.endswith('$') and not pattern.endswith('\\$')
+        start = 1 if starts else 0
+        end = len(pattern) - 1 if ends else len(pattern)
+        literal = pattern[start:end]
+        if REGEX_SPECIAL_CHARS.intersection(literal) or not (starts or ends):
+            return False
+
+        if starts and ends:
+            self.exact.add(literal)
+        elif starts:
+            self.prefixes.append(literal)
+        else:
+            self.suffixes.append(literal)
+        return True
+
+    def _compile(self, patterns: list) -> list:
+        combinable = []
+        regexes = []
+        for pattern in patterns:
+            regex = re.compile(pattern)
+            if regex.flags != DEFAULT_FLAGS or NUMBERED_GROUP_REFERENCE.search(pattern):
+                regexes.append(regex)
+            else:
+                combinable.append(pattern)
+
+        if len(combinable) > 1:
+            try:
+                combined = '|'.join('(?:%s)' % pattern for pattern in combinable)
+                return [re.compile(combined)] + regexes
+            except re.error:
+                # e.g. duplicate group names, match one by one
+                pass
+        return [re.compile(pattern) for pattern in combinable] + regexes
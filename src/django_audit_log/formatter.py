@@ -0,0 +1,26 @@
+from logging import LogRecord
+
+from audit_log.formatter import AuditLogFormatter
+from django_audit_log.encoders import get_encoder
+
+
+class AuditLogJSONFormatter(AuditLogFormatter):
+    """
+    AuditLogFormatter that encodes the log with the fastest installed JSON
+    encoder (orjson, msgspec or json, or ujson, see AUDIT_LOG_JSON_ENCODER)
+    and supports Decimal, UUID, date/time and lazy translation values.
+
+    AUDIT_LOG_FORMATTER_CALLABLE_PATH = 'django_audit_log.formatter.AuditLogJSONFormatter'
+    """
+
+    def __init__(self, *args, encoder: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoder = get_encoder(encoder)
+
+    def formatMessage(self, record: LogRecord) -> str:
+        if hasattr(record, 'audit'):
+            audit = {'audit': record.audit}
+        else:
+            audit = {'audit': {'message': 'LogRecord misses audit attribute'}}
+
+        return self.encoder.dumps(audit)
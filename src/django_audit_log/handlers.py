@@ -0,0 +1,337 @@
+import abc
+import gzip
+import http.client
+import logging
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django_audit_log import app_settings, metrics
+from django_audit_log.util import import_callable
+
+
+class DeliveryError(Exception):
+    pass
+
+
+class BatchingHandler(logging.Handler, metaclass=abc.ABCMeta):
+    """
+    Buffers logs and passes them in batches of `batch_size` to `_ship()`,
+    from a background thread, when the batch is full or `flush_interval`
+    seconds passed. Emitting a log only appends it to the buffer.
+
+    Subclasses implement `_ship()` and can override `prepare()`, which turns a
+    record into the item that is buffered (by default the formatted log).
+    """
+
+    thread_name = 'audit-log-batching-handler'
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        super().__init__()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._batch_ready = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=self.thread_name, daemon=True
+        )
+        self._thread.start()
+
+    def prepare(self, record: logging.LogRecord):
+        return self.format(record)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            item = self.prepare(record)
+        except Exception:
+            metrics.count(metrics.FAILED)
+            self.handleError(record)
+            return
+
+        with self._buffer_lock:
+            self._buffer.append(item)
+            if len(self._buffer) >= self.batch_size:
+                self._batch_ready.set()
+
+    def handle_batch(self, records: list) -> None:
+        """
+        Buffer the records of one audit log and its child logs (see
+        DjangoAuditLogger.add_child()), called by handle_batch(). They are
+        formatted first and then added to the buffer under a single lock, so
+        no logs of other requests end up between them.
+        """
+        items = []
+        for record in records:
+            if not self.filter(record):
+                continue
+            try:
+                items.append(self.prepare(record))
+            except Exception:
+                metrics.count(metrics.FAILED)
+                self.handleError(record)
+
+        with self._buffer_lock:
+            self._buffer.extend(items)
+            if len(self._buffer) >= self.batch_size:
+                self._batch_ready.set()
+
+    def flush(self) -> None:
+        """
+        Ship the buffered logs, in the calling thread.
+        """
+        with self._buffer_lock:
+            buffer, self._buffer = self._buffer, []
+        for start in range(0, len(buffer), self.batch_size):
+            end = start + self.batch_size
+            self._ship(buffer[start:end])
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._batch_ready.set()
+            self._thread.join()
+            self.flush()
+        super().close()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._batch_ready.wait(self.flush_interval)
+            self._batch_ready.clear()
+            if not self._closed:
+                self.flush()
+
+    @abc.abstractmethod
+    def _ship(self, batch: list) -> None:
+        """
+        Deliver a batch of buffered items, called from the background thread.
+        """
+
+
+class BatchingHTTPHandler(BatchingHandler):
+    """
+    Buffers formatted logs and POSTs them in batches, as (gzipped) newline
+    delimited JSON, over a persistent keep-alive connection.
+
+    Batches are sent by a background thread when the batch is full or the
+    flush interval passed, so emitting a log never waits for the network.
+    Failed batches are retried with exponential backoff and then spilled to
+    disk, to be sent again once the endpoint is available.
+
+    Defaults to the AUDIT_LOG_HTTP_* settings:
+
+        AUDIT_LOG_HANDLER_CALLABLE_PATH = 'django_audit_log.handlers.BatchingHTTPHandler'
+    """
+
+    thread_name = 'audit-log-http-handler'
+
+    def __init__(
+        self,
+        url: str = None,
+        headers: dict = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        timeout: float = None,
+        use_gzip: bool = None,
+        max_retries: int = None,
+        backoff: float = None,
+        spill_path: str = None,
+    ):
+        url = url or app_settings.HTTP_URL
+        if not url:
+            raise ValueError("BatchingHTTPHandler requires AUDIT_LOG_HTTP_URL")
+
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.path = parts.path or '/'
+        if parts.query:
+            self.path += '?' + parts.query
+        self.headers = _default(headers, app_settings.HTTP_HEADERS)
+        self.timeout = _default(timeout, app_settings.HTTP_TIMEOUT)
+        self.use_gzip = _default(use_gzip, app_settings.HTTP_GZIP)
+        self.max_retries = _default(max_retries, app_settings.HTTP_MAX_RETRIES)
+        self.backoff = _default(backoff, app_settings.HTTP_BACKOFF)
+        self.spill_path = _default(spill_path, app_settings.HTTP_SPILL_PATH)
+
+        self._send_lock = threading.Lock()
+        self._connection = None
+        super().__init__(
+            _default(batch_size, app_settings.HTTP_BATCH_SIZE),
+            _default(flush_interval, app_settings.HTTP_FLUSH_INTERVAL),
+        )
+
+    def close(self) -> None:
+        super().close()
+        self._close_connection()
+
+    def _ship(self, batch: list) -> None:
+        with self._send_lock:
+            try:
+                accepted = self._send_with_retries(batch)
+            except DeliveryError:
+                metrics.count(metrics.FAILED, len(batch))
+                self._spill(batch)
+            else:
+                if not accepted:
+                    metrics.count(metrics.FAILED, len(batch))
+                self._send_spilled()
+
+    def _send_with_retries(self, batch: list) -> bool:
+        body = self._encode(batch)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                return self._send(body)
+            except (OSError, http.client.HTTPException, DeliveryError):
+                self._close_connection()
+        raise DeliveryError("Failed to send %d audit logs" % len(batch))
+
+    def _send(self, body: bytes) -> bool:
+        """
+        POST the body, False when the endpoint rejected it with a client error.
+        Raises DeliveryError on a server error.
+        """
+        if self._connection is None:
+            connection_class = (
+                http.client.HTTPSConnection
+                if self.scheme == 'https'
+                else http.client.HTTPConnection
+            )
+            self._connection = connection_class(self.netloc, timeout=self.timeout)
+
+        headers = {'Content-Type': 'application/x-ndjson', 'Connection': 'keep-alive'}
+        if self.use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+        headers.update(self.headers)
+
+        self._connection.request('POST', self.path, body=body, headers=headers)
+        response = self._connection.getresponse()
+        response.read()  # The response must be read before the connection can be reused
+        if response.status >= 500:
+            raise DeliveryError("Audit log endpoint responded %d" % response.status)
+        if response.status >= 400:
+            # A client error, not going to succeed on a retry either
+            logging.getLogger(__name__).error(
+                "Audit log endpoint rejected %s: %d", self.path, response.status
+            )
+            return False
+        return True
+
+    def _encode(self, batch: list) -> bytes:
+        body = ('\n'.join(batch) + '\n').encode()
+        return gzip.compress(body) if self.use_gzip else body
+
+    def _spill(self, batch: list) -> None:
+        logger = logging.getLogger(__name__)
+        if not self.spill_path:
+            logger.error("Dropped %d audit logs, endpoint unavailable", len(batch))
+            return
+        try:
+            with open(self.spill_path, 'a') as spill_file:
+                spill_file.write('\n'.join(batch) + '\n')
+        except OSError:
+            logger.exception("Dropped %d audit logs, failed to spill", len(batch))
+
+    def _send_spilled(self) -> None:
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+
+        sending_path = self.spill_path + '.sending'
+        os.replace(self.spill_path, sending_path)
+        with open(sending_path) as spill_file:
+            batch = []
+            for line in spill_file:
+                batch.append(line.rstrip('\n'))
+                if len(batch) == self.batch_size:
+                    if not self._resend(batch, spill_file):
+                        break
+                    batch = []
+            else:
+                if batch:
+                    self._resend(batch, spill_file)
+        os.remove(sending_path)
+
+    def _resend(self, batch: list, spill_file) -> bool:
+        try:
+            accepted = self._send(self._encode(batch))
+        except (OSError, http.client.HTTPException, DeliveryError):
+            self._close_connection()
+            # Still unavailable, spill the batch and the rest of the file again
+            with open(self.spill_path, 'a') as new_spill_file:
+                new_spill_file.write('\n'.join(batch) + '\n')
+                new_spill_file.writelines(spill_file)
+            return False
+        if not accepted:
+            metrics.count(metrics.FAILED, len(batch))
+        return True
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def handle_batch(logger: logging.Logger, records: list) -> None:
+    """
+    Pass several records to the handlers of the logger in a single call per
+    handler: handlers with a handle_batch() method (e.g. BatchingHandler) get
+    all records at once, other handlers emit them while locked only once.
+    """
+    records = [record for record in records if logger.filter(record)]
+    for handler in logger.handlers:
+        emit_batch(handler, records)
+
+
+def emit_batch(handler: logging.Handler, records: list) -> None:
+    """
+    Pass several records to a single handler, see handle_batch().
+    """
+    records = [record for record in records if record.levelno >= handler.level]
+    if not records:
+        return
+    batch = getattr(handler, 'handle_batch', None)
+    if batch is not None:
+        batch(records)
+        return
+
+    handler.acquire()
+    try:
+        for record in records:
+            if handler.filter(record):
+                handler.emit(record)
+    finally:
+        handler.release()
+
+
+def get_forward_handler() -> logging.Handler:
+    """
+    The configured (AUDIT_LOG_HANDLER_CALLABLE_PATH) log handler, for processes
+    that forward logs that are formatted already, like the spool drain.
+    """
+    if app_settings.LOG_HANDLER_CALLABLE_PATH:
+        handler = import_callable(app_settings.LOG_HANDLER_CALLABLE_PATH)()
+    else:
+        handler = logging.StreamHandler(stream=sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
+
+def make_formatted_record(message: str) -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {
+            'name': app_settings.LOGGER_NAME or 'audit_log',
+            'msg': message,
+            'levelno': logging.INFO,
+            'levelname': 'INFO',
+        }
+    )
+
+
+def _default(value, default):
+    return default if value is None else value
@@ -0,0 +1,64 @@
+from django.http import HttpResponse
+
+from django_audit_log import app_settings
+from django_audit_log.redaction import REDACTED
+
+_capture = None
+
+
+class ResponseHeaderCapture:
+    """
+    Selects the response headers that are added to the audit log.
+
+    With `include` only the listed headers are looked up, otherwise all headers
+    except the `exclude`d ones are copied in a single pass. The values of the
+    `redact` headers are replaced by REDACTED. Header names are matched case
+    insensitively, the sets of lowercase names are computed once.
+    """
+
+    def __init__(self, include=None, exclude=(), redact=()):
+        self.include = None if include is None else tuple(include)
+        self.exclude = frozenset(name.lower() for name in exclude)
+        self.redact = frozenset(name.lower() for name in redact)
+
+    @classmethod
+    def from_settings(cls) -> 'ResponseHeaderCapture':
+        return cls(
+            include=app_settings.RESPONSE_HEADERS,
+            exclude=app_settings.RESPONSE_HEADERS_EXCLUDE,
+            redact=app_settings.RESPONSE_HEADERS_REDACT,
+        )
+
+    def capture(self, response: HttpResponse) -> dict:
+        if self.include is not None:
+            return self._capture_included(response)
+        if not self.exclude and not self.redact:
+            return dict(response.items())
+
+        headers = {}
+        for name, value in response.items():
+            lower_name = name.lower()
+            if lower_name in self.exclude:
+                continue
+            headers[name] = REDACTED if lower_name in self.redact else value
+        return headers
+
+    def _capture_included(self, response: HttpResponse) -> dict:
+        headers = {}
+        for name in self.include:
+            value = response.get(name)
+            if value is not None:
+                headers[name] = REDACTED if name.lower() in self.redact else value
+        return headers
+
+
+def get_response_header_capture() -> ResponseHeaderCapture:
+    global _capture
+    if _capture is None:
+        _capture = ResponseHeaderCapture.from_settings()
+    return _capture
+
+
+def reset() -> None:
+    global _capture
+    _capture = None
@@ -1,13 +1,74 @@
+import asyncio
 import logging
 
+from asgiref.sync import sync_to_async
+from django.db.models.query import QuerySet
 from django.http import HttpRequest, HttpResponse
 
 from audit_log.logger import AuditLogger
-from django_audit_log import app_settings
-from django_audit_log.util import get_client_ip, import_callable
+from django_audit_log import app_settings, coalesce, metrics
+from django_audit_log.delivery import OVERFLOW_BLOCK, AuditLogQueueHandler
+from django_audit_log.handlers import handle_batch
+from django_audit_log.headers import get_response_header_capture
+from django_audit_log.record import (
+    UNKNOWN,
+    FilterSection,
+    HttpRequestSection,
+    HttpResponseSection,
+    Section,
+    UserSection
+)
+from django_audit_log.redaction import get_redactor
+from django_audit_log.registry import logger_registry
+from django_audit_log.roles import get_roles_from_groups
+from django_audit_log.util import aget_user, get_client_ip, import_callable, parse_content_length
 
 
 class DjangoAuditLogger(AuditLogger):
+    """
+    With AUDIT_LOG_LAZY_RECORD, set_django_http_request() and
+    set_user_from_request() only keep a reference to the request. The
+    http_request and user sections are built when they are first read, at the
+    latest when the log is sent.
+
+    Child logs added with add_child() are sent together with the log, in a
+    single batch per handler.
+
+    Logs marked with set_coalescing() are passed to the AuditLogCoalescer, if
+    AUDIT_LOG_COALESCE_WINDOW is set, see coalesce.py.
+    """
+
+    # (message, results) of the child logs
+    children = ()
+
+    coalescing = False
+    coalesce_path = None
+
+    @property
+    def http_request(self) -> dict:
+        if self._deferred_http_request is not None:
+            self._set_django_http_request(self._deferred_http_request)
+        return self._http_request
+
+    @http_request.setter
+    def http_request(self, value: dict) -> None:
+        self._deferred_http_request = None
+        self._http_request = value
+
+    @property
+    def user(self) -> dict:
+        if self._deferred_user is not None:
+            self._set_user_from_request(*self._deferred_user)
+        return self._user
+
+    @user.setter
+    def user(self, value: dict) -> None:
+        self._deferred_user = None
+        self._user = value
+
+    def init_logger(self) -> logging.Logger:
+        return logger_registry.get_logger(self)
+
     def get_logger_name(self) -> str:
         logger_name = app_settings.LOGGER_NAME
         if not logger_name:
@@ -30,16 +91,46 @@ class DjangoAuditLogger(AuditLogger):
         log_formatter_callable = import_callable(log_formatter_path)
         return log_formatter_callable()
 
+    def get_roles(self, request: HttpRequest, user) -> list:
+        roles_path = app_settings.ROLES_CALLABLE_PATH
+        if not roles_path:
+            return get_roles_from_groups(request, user)
+
+        roles_callable = import_callable(roles_path)
+        return roles_callable(request, user)
+
+    async def aget_roles(self, request: HttpRequest, user) -> list:
+        roles_path = app_settings.ROLES_CALLABLE_PATH
+        if not roles_path:
+            prefetched = getattr(user, '_prefetched_objects_cache', {})
+            if 'groups' in prefetched:
+                return get_roles_from_groups(request, user)
+            return await _aget_values(user.groups.values_list('name', flat=True))
+
+        roles_callable = import_callable(roles_path)
+        if asyncio.iscoroutinefunction(roles_callable):
+            return await roles_callable(request, user)
+        return await sync_to_async(roles_callable)(request, user)
+
+    @metrics.timed('set_django_http_request')
     def set_django_http_request(self, request: HttpRequest) -> 'DjangoAuditLogger':
+        if app_settings.LAZY_RECORD:
+            self._deferred_http_request = request
+            return self
+        return self._set_django_http_request(request)
+
+    def _set_django_http_request(self, request: HttpRequest) -> 'DjangoAuditLogger':
         self.set_http_request(
             method=request.method,
             url=request.build_absolute_uri(),
-            user_agent=request.META.get('HTTP_USER_AGENT', 'unknown')
+            user_agent=request.META.get('HTTP_USER_AGENT', UNKNOWN)
             if request.META
-            else 'unknown',
+            else UNKNOWN,
         )
+        self._http_request['content_length'] = _get_request_content_length(request)
         return self
 
+    @metrics.timed('set_django_http_response')
     def set_django_http_response(self, response: HttpResponse) -> 'DjangoAuditLogger':
         headers = self._get_headers_from_response(response)
         self.set_http_response(
@@ -47,25 +138,244 @@ class DjangoAuditLogger(AuditLogger):
             reason=getattr(response, 'reason_phrase', ''),
             headers=headers,
         )
+        self.http_response['content_length'] = _get_response_content_length(response)
+        return self
+
+    def set_django_http_timings(
+        self, duration_ns: int, view_ns: int
+    ) -> 'DjangoAuditLogger':
+        """
+        Add the request duration, the time spent in the view and the time
+        spent on the audit log (the difference) to the http_response section,
+        in milliseconds. Measured in nanoseconds with a monotonic clock.
+        """
+        self.http_response.update(
+            duration_ms=duration_ns / 1e6,
+            view_ms=view_ns / 1e6,
+            audit_ms=(duration_ns - view_ns) / 1e6,
+        )
         return self
 
+    @metrics.timed('set_user_from_request')
     def set_user_from_request(
         self, request: HttpRequest, realm=''
+    ) -> 'DjangoAuditLogger':
+        if app_settings.LAZY_RECORD:
+            self._deferred_user = (request, realm)
+            return self
+        return self._set_user_from_request(request, realm)
+
+    def _set_user_from_request(
+        self, request: HttpRequest, realm: str
     ) -> 'DjangoAuditLogger':
         user = request.user if hasattr(request, 'user') else None
-        roles = list(user.groups.values_list('name', flat=True)) if user else []
+        roles = self.get_roles(request, user) if user else []
+        provider = (
+            request.session.get('_auth_user_backend', '')
+            if hasattr(request, 'session')
+            else ''
+        )
+        return self._set_user(request, user, roles, provider, realm)
+
+    @metrics.timed('set_user_from_request')
+    async def aset_user_from_request(
+        self, request: HttpRequest, realm=''
+    ) -> 'DjangoAuditLogger':
+        """
+        Async variant of set_user_from_request(). Only falls back to running
+        in a thread when the Django version has no async API for the lookup.
+        """
+        if app_settings.LAZY_RECORD:
+            self._deferred_user = (request, realm)
+            return self
+        return await self._aset_user_from_request(request, realm)
+
+    async def _aset_user_from_request(
+        self, request: HttpRequest, realm: str
+    ) -> 'DjangoAuditLogger':
+        user = await aget_user(request)
+        roles = await self.aget_roles(request, user) if user else []
+        provider = (
+            await _aget_session_value(request.session, '_auth_user_backend', '')
+            if hasattr(request, 'session')
+            else ''
+        )
+        return self._set_user(request, user, roles, provider, realm)
+
+    def add_child(self, message: str, results) -> 'DjangoAuditLogger':
+        """
+        Add a log that is sent with this log, with the same sections except for
+        the message and results. E.g. one log per object of a bulk operation.
+        """
+        if not self.children:
+            self.children = []
+        self.children.append((message, results))
+        return self
+
+    def set_coalescing(self, path: str) -> 'DjangoAuditLogger':
+        """
+        Allow this log to be coalesced with the logs of the same user, ip,
+        method, path (with the query string), filter and status.
+        """
+        self.coalescing = True
+        self.coalesce_path = path
+        return self
+
+    @metrics.timed('send_log')
+    def send_log(self) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        coalescer = coalesce.get_coalescer() if self.coalescing else None
+        if self.children:
+            self._send_batch()
+            metrics.count(metrics.EMITTED, 1 + len(self.children))
+        elif coalescer is not None:
+            self._send_coalesced(coalescer)
+        else:
+            super().send_log()
+            metrics.count(metrics.EMITTED)
+
+    async def asend_log(self) -> None:
+        """
+        Async variant of send_log(). When all handlers only put the record on
+        a queue the log is sent directly, otherwise the handlers run in a thread.
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return
+
+        if self._deferred_user is not None:
+            await self._aset_user_from_request(*self._deferred_user)
+
+        if all(
+            isinstance(handler, AuditLogQueueHandler)
+            and handler.overflow_policy != OVERFLOW_BLOCK
+            for handler in self.logger.handlers
+        ):
+            self.send_log()
+        else:
+            await sync_to_async(self.send_log, thread_sensitive=False)()
+
+    def set_http_request(
+        self, method: str, url: str, user_agent: str = ''
+    ) -> 'DjangoAuditLogger':
+        self.http_request = HttpRequestSection(method, url, user_agent)
+        return self
+
+    def set_http_response(
+        self, status_code: int, reason: str, headers: dict = None
+    ) -> 'DjangoAuditLogger':
+        self.http_response = HttpResponseSection(status_code, reason, headers)
+        return self
+
+    def set_user(
+        self,
+        authenticated: bool,
+        provider: str,
+        email: str,
+        roles: list = None,
+        ip: str = '',
+        realm: str = '',
+        username: str = '',
+    ) -> 'DjangoAuditLogger':
+        self.user = UserSection(
+            authenticated, provider, email, roles, ip, realm, username
+        )
+        return self
+
+    def set_filter(self, object_name: str, kwargs: dict) -> 'DjangoAuditLogger':
+        self.filter = FilterSection(object_name, kwargs)
+        return self
+
+    def _send_batch(self) -> None:
+        extras = self._get_extras(logging.getLevelName(self.level))
+        redactor = get_redactor()
+        caller = self.logger.findCaller()
+
+        records = [self._make_record(self.message, extras, caller)]
+        for message, results in self.children:
+            if redactor is not None:
+                message = redactor.redact(message, 'message')
+                results = redactor.redact(results, 'results')
+            child_extras = dict(extras, message=message, results=results)
+            records.append(self._make_record(message, child_extras, caller))
+        handle_batch(self.logger, records)
+
+    def _send_coalesced(self, coalescer) -> None:
+        extras = self._get_extras(logging.getLevelName(self.level))
+        record = self._make_record(self.message, extras, self.logger.findCaller())
+        key = coalesce.get_key(extras, self.coalesce_path)
+        coalescer.add(self.logger, key, record)
+
+    def _make_record(self, message: str, extras: dict, caller: tuple):
+        fn, lno, func, _ = caller
+        extra = {'audit': extras}
+        return self.logger.makeRecord(
+            self.logger.name, self.level, fn, lno, message, (), None, func, extra
+        )
+
+    def _get_extras(self, log_type: str) -> dict:
+        """
+        The sections are only turned into dicts here, when the log is sent.
+        """
+        extras = super()._get_extras(log_type)
+        for key, value in extras.items():
+            if isinstance(value, Section):
+                extras[key] = value.as_dict()
+        redactor = get_redactor()
+        return extras if redactor is None else redactor.redact(extras)
+
+    def _set_user(
+        self, request: HttpRequest, user, roles: list, provider: str, realm: str
+    ) -> 'DjangoAuditLogger':
         self.set_user(
             authenticated=user.is_authenticated if user else False,
-            provider=request.session.get('_auth_user_backend', '')
-            if hasattr(request, 'session')
-            else '',
+            provider=provider,
             realm=realm,
             email=getattr(user, 'email', '') if user else '',
             roles=roles,
             ip=get_client_ip(request),
-            username=request.user.username if user and user.is_authenticated else '',
+            username=user.username if user and user.is_authenticated else '',
         )
         return self
 
     def _get_headers_from_response(self, response: HttpResponse) -> dict:
-        return {header: value for header, value in response.items()}
+        return get_response_header_capture().capture(response)
+
+
+async def _aget_values(queryset: QuerySet) -> list:
+    if hasattr(queryset, '__aiter__'):
+        return [value async for value in queryset]
+    return await sync_to_async(list)(queryset)
+
+
+async def _aget_session_value(session, key: str, default=''):
+    if hasattr(session, 'aget'):
+        return await session.aget(key, default)
+    if hasattr(session, '_session_cache'):
+        # Already loaded, no database access needed
+        return session.get(key, default)
+    return await sync_to_async(session.get)(key, default)
+
+
+def _get_request_content_length(request: HttpRequest) -> int:
+    """
+    The size of the request body from the CONTENT_LENGTH header, the body is not read.
+    """
+    try:
+        return int(request.META.get('CONTENT_LENGTH') or 0)
+    except (AttributeError, ValueError, TypeError):
+        return 0
+
+
+def _get_response_content_length(response: HttpResponse):
+    """
+    The size of the response body, None for a streaming response without a
+    Content-Length header (bytes_sent is added when the stream is closed).
+    """
+    content_length = parse_content_length(response.get('Content-Length'))
+    if content_length is not None:
+        return content_length
+    if getattr(response, 'streaming', True):
+        return None
+    # Joining a single chunk returns the chunk itself, the content is not copied
+    return len(response.content)
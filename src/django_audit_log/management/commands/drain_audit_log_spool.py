@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django_audit_log import app_settings
+from django_audit_log.handlers import get_forward_handler
+from django_audit_log.spool import SpoolDrain
+
+
+class Command(BaseCommand):
+    help = "Forward the logs in the audit log spool (AUDIT_LOG_SPOOL_PATH) to the configured log handler"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', help="Spool directory, defaults to AUDIT_LOG_SPOOL_PATH"
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=app_settings.SPOOL_DRAIN_INTERVAL,
+            help="Seconds to wait for new logs when the spool is empty",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Forward the spooled logs and exit instead of tailing the spool",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or app_settings.SPOOL_PATH
+        if not path:
+            raise CommandError("Set AUDIT_LOG_SPOOL_PATH or pass --path")
+
+        handler = get_forward_handler()
+        drain = SpoolDrain(path, handler, app_settings.SPOOL_DRAIN_BATCH_SIZE)
+        try:
+            if options['once']:
+                count = drain.drain()
+                self.stderr.write("Forwarded %d audit logs" % count)
+            else:
+                drain.run(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            handler.close()
@@ -0,0 +1,43 @@
+import signal
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_audit_log import app_settings
+from django_audit_log.aggregator import LogAggregator
+from django_audit_log.handlers import get_forward_handler
+
+
+class Command(BaseCommand):
+    help = (
+        "Receive the logs of the worker processes on AUDIT_LOG_AGGREGATOR_SOCKET "
+        "and pass them to the configured log handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            help="Unix domain socket, defaults to AUDIT_LOG_AGGREGATOR_SOCKET",
+        )
+
+    def handle(self, *args, **options):
+        path = options['socket'] or app_settings.AGGREGATOR_SOCKET
+        if not path:
+            raise CommandError("Set AUDIT_LOG_AGGREGATOR_SOCKET or pass --socket")
+
+        handler = get_forward_handler()
+        try:
+            aggregator = LogAggregator(path, handler)
+        except OSError as e:
+            handler.close()
+            raise CommandError(e)
+
+        # Stop (and flush the handler) when the process manager stops the aggregator
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        try:
+            aggregator.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            aggregator.server_close()
+            handler.close()
@@ -0,0 +1,273 @@
+"""
+Metrics about the audit log pipeline itself: how long each stage takes and
+how many logs were emitted, dropped, coalesced or failed to be delivered.
+
+Metrics are passed to the sink returned by AUDIT_LOG_METRICS_SINK_CALLABLE_PATH.
+Without a sink (the default) the instrumented code only checks whether a sink
+is configured, nothing is timed or counted.
+"""
+
+import asyncio
+import functools
+import logging
+import socket
+import threading
+import time
+
+from django_audit_log import app_settings
+from django_audit_log.util import import_callable
+
+EMITTED = 'emitted'
+DROPPED = 'dropped'
+FAILED = 'failed'
+COALESCED = 'coalesced'
+
+# Seconds, most stages take (far) less than a millisecond
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+_UNRESOLVED = object()
+_sink = _UNRESOLVED
+_sink_lock = threading.Lock()
+
+
+class MetricsSink:
+    """
+    Receives the metrics of the audit log pipeline. Called from the request
+    and the delivery threads, implementations must be thread safe and fast.
+    """
+
+    def timing(self, stage: str, seconds: float) -> None:
+        pass
+
+    def count(self, outcome: str, value: int = 1) -> None:
+        pass
+
+    def queue_depth(self, depth: int) -> None:
+        pass
+
+
+class SnapshotSink(MetricsSink):
+    """
+    Keeps the metrics in the process, see get_snapshot().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def timing(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.get(stage)
+            if timing is None:
+                self._timings[stage] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def count(self, outcome: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[outcome] = self._counters.get(outcome, 0) + value
+
+    def queue_depth(self, depth: int) -> None:
+        self._queue_depth = depth
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = {
+                stage: {
+                    'count': count,
+                    'total': total,
+                    'mean': total / count,
+                    'max': maximum,
+                }
+                for stage, (count, total, maximum) in self._timings.items()
+            }
+            counters = dict(self._counters)
+        return {
+            'timings': timings,
+            'counters': counters,
+            'queue_depth': self._queue_depth,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings = {}
+            self._counters = {}
+            self._queue_depth = 0
+
+
+class StatsdSink(MetricsSink):
+    """
+    Sends the metrics to a StatsD server over UDP. A metric that cannot be
+    sent is lost, sending never blocks the request.
+    """
+
+    def __init__(self, host: str = None, port: int = None, prefix: str = None):
+        self.address = (
+            host or app_settings.METRICS_STATSD_HOST,
+            port or app_settings.METRICS_STATSD_PORT,
+        )
+        self.prefix = prefix or app_settings.METRICS_PREFIX
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def timing(self, stage: str, seconds: float) -> None:
+        self._send('%s.stage.%s:%.3f|ms' % (self.prefix, stage, seconds * 1000))
+
+    def count(self, outcome: str, value: int = 1) -> None:
+        self._send('%s.logs.%s:%d|c' % (self.prefix, outcome, value))
+
+    def queue_depth(self, depth: int) -> None:
+        self._send('%s.queue_depth:%d|g' % (self.prefix, depth))
+
+    def _send(self, metric: str) -> None:
+        try:
+            self._socket.sendto(metric.encode(), self.address)
+        except OSError:
+            pass
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Records the metrics with prometheus_client. Supports its multiprocess mode
+    (PROMETHEUS_MULTIPROC_DIR), the queue depth is then summed over the live
+    processes.
+    """
+
+    _collectors = {}
+
+    def __init__(self, prefix: str = None):
+        prefix = prefix or app_settings.METRICS_PREFIX
+        collectors = self._collectors.get(prefix)
+        if collectors is None:
+            collectors = self._collectors[prefix] = self._create_collectors(prefix)
+        self.stage_seconds, self.logs_total, self.queue_depth_gauge = collectors
+
+    def timing(self, stage: str, seconds: float) -> None:
+        self.stage_seconds.labels(stage).observe(seconds)
+
+    def count(self, outcome: str, value: int = 1) -> None:
+        self.logs_total.labels(outcome).inc(value)
+
+    def queue_depth(self, depth: int) -> None:
+        self.queue_depth_gauge.set(depth)
+
+    @staticmethod
+    def _create_collectors(prefix: str) -> tuple:
+        import prometheus_client
+
+        return (
+            prometheus_client.Histogram(
+                '%s_stage_seconds' % prefix,
+                "Time spent in the stages of the audit log pipeline",
+                ['stage'],
+                buckets=BUCKETS,
+            ),
+            prometheus_client.Counter(
+                '%s_logs' % prefix,
+                "Audit logs by outcome (emitted, dropped, coalesced, failed)",
+                ['outcome'],
+            ),
+            prometheus_client.Gauge(
+                '%s_queue_depth' % prefix,
+                "Audit logs waiting on the delivery queue",
+                multiprocess_mode='livesum',
+            ),
+        )
+
+
+class TimedFormatter(logging.Formatter):
+    """
+    Times the serialization of the logs by the wrapped formatter.
+    """
+
+    def __init__(self, formatter: logging.Formatter):
+        super().__init__()
+        self.formatter = formatter
+
+    def format(self, record: logging.LogRecord) -> str:
+        sink = get_sink()
+        if sink is None:
+            return self.formatter.format(record)
+        start = time.perf_counter()
+        try:
+            return self.formatter.format(record)
+        finally:
+            sink.timing('serialization', time.perf_counter() - start)
+
+
+def get_sink() -> MetricsSink:
+    """
+    The configured metrics sink, None when metrics are disabled.
+    """
+    global _sink
+    if _sink is _UNRESOLVED:
+        with _sink_lock:
+            if _sink is _UNRESOLVED:
+                sink_path = app_settings.METRICS_SINK_CALLABLE_PATH
+                _sink = import_callable(sink_path)() if sink_path else None
+    return _sink
+
+
+def reset() -> None:
+    """
+    Resolve the sink from the settings again on next use.
+    """
+    global _sink
+    _sink = _UNRESOLVED
+
+
+def get_snapshot() -> dict:
+    """
+    The metrics collected by a SnapshotSink, None for other sinks.
+    """
+    sink = get_sink()
+    return sink.snapshot() if isinstance(sink, SnapshotSink) else None
+
+
+def count(outcome: str, value: int = 1) -> None:
+    sink = get_sink()
+    if sink is not None:
+        sink.count(outcome, value)
+
+
+def timed(stage: str):
+    """
+    Decorator timing the (async) function as the given stage of the pipeline.
+    """
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            return functools.wraps(func)(_timed_async(stage, func))
+        return functools.wraps(func)(_timed(stage, func))
+
+    return decorator
+
+
+def _timed(stage: str, func):
+    def wrapper(*args, **kwargs):
+        sink = get_sink()
+        if sink is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sink.timing(stage, time.perf_counter() - start)
+
+    return wrapper
+
+
+def _timed_async(stage: str, func):
+    async def wrapper(*args, **kwargs):
+        sink = get_sink()
+        if sink is None:
+            return await func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            sink.timing(stage, time.perf_counter() - start)
+
+    return wrapper
@@ -1,33 +1,152 @@
-import re
+import time
 
 from django.http import HttpRequest, HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 
-from django_audit_log import app_settings
+from django_audit_log import app_settings, coalesce, metrics
+from django_audit_log.exempt import ExemptUrlMatcher
 from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.policy import SAMPLED_IN, SAMPLED_OUT, get_policy
+from django_audit_log.streaming import audit_streaming_response
+from django_audit_log.util import aget_user
 
 
 class AuditLogMiddleware(MiddlewareMixin):
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response=None):
         super().__init__(get_response)
-        self.redirect_exempt = [re.compile(r) for r in app_settings.EXEMPT_URLS]
+        self.exempt_matcher = ExemptUrlMatcher(
+            app_settings.EXEMPT_URLS, app_settings.EXEMPT_URL_NAMES
+        )
+        self.policy = get_policy()
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Used instead of __call__() when running under ASGI. Unlike the
+        MiddlewareMixin implementation, the hooks are not run in a thread.
+        """
+        await self.aprocess_request(request)
+        response = await self.get_response(request)
+        return await self.aprocess_response(request, response)
 
+    @metrics.timed('process_request')
     def process_request(self, request: HttpRequest) -> None:
-        if not hasattr(request, 'audit_log') and not self.exempt_request(request):
-            audit_log = DjangoAuditLogger()
-            audit_log.set_django_http_request(request)
-            audit_log.set_user_from_request(request)
-            request.audit_log = audit_log
+        request._audit_log_started = time.monotonic_ns()
+        if self._sample_request(request):
+            self._attach_audit_log(request)
+        request._audit_log_view_started = time.monotonic_ns()
 
+    @metrics.timed('process_request')
+    async def aprocess_request(self, request: HttpRequest) -> None:
+        request._audit_log_started = time.monotonic_ns()
+        if self.policy.requires_user:
+            # request.auser() (Django >= 5) does not load the lazy request.user
+            request._audit_log_user = await aget_user(request)
+        if self._sample_request(request):
+            await self._aattach_audit_log(request)
+        request._audit_log_view_started = time.monotonic_ns()
+
+    @metrics.timed('process_response')
     def process_response(
         self, request: HttpRequest, response: HttpResponse
     ) -> HttpResponse:
-        if hasattr(request, 'audit_log'):
+        view_ended_ns = time.monotonic_ns()
+        if self._sample_response(request, response):
+            if not hasattr(request, 'audit_log'):
+                self._attach_audit_log(request)
+            audit_log = request.audit_log
+            audit_log.set_django_http_response(response)
+            self._set_timings(request, audit_log, view_ended_ns)
+            self._set_coalescing(request, audit_log)
+            if getattr(response, 'streaming', False):
+                self._audit_stream(request, response)
+            else:
+                audit_log.send_log()
+        return response
+
+    @metrics.timed('process_response')
+    async def aprocess_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        view_ended_ns = time.monotonic_ns()
+        if self._sample_response(request, response):
+            if not hasattr(request, 'audit_log'):
+                await self._aattach_audit_log(request)
             audit_log = request.audit_log
             audit_log.set_django_http_response(response)
-            audit_log.send_log()
+            self._set_timings(request, audit_log, view_ended_ns)
+            self._set_coalescing(request, audit_log)
+            if getattr(response, 'streaming', False):
+                self._audit_stream(request, response)
+            else:
+                await audit_log.asend_log()
         return response
 
     def exempt_request(self, request):
-        path = request.path.lstrip("/")
-        return any(pattern.search(path) for pattern in self.redirect_exempt)
+        return self.exempt_matcher.is_exempt(request)
+
+    def _sample_request(self, request: HttpRequest) -> bool:
+        """
+        Whether the audit log should be attached to the request. Decided before
+        the audit log is created, so sampled out requests cost (almost) nothing.
+        """
+        if hasattr(request, 'audit_log') or self.exempt_request(request):
+            return False
+        request._audit_log_sampled = self.policy.sample_request(request)
+        return request._audit_log_sampled != SAMPLED_OUT
+
+    def _sample_response(self, request: HttpRequest, response: HttpResponse) -> bool:
+        """
+        Whether the audit log should be sent. Sampled out requests can still be
+        logged when the policy requires so for the response (e.g. errors), the
+        audit log is then created for the response.
+        """
+        sampled = getattr(request, '_audit_log_sampled', SAMPLED_IN)
+        if not self.policy.sample_response(request, response, sampled):
+            return False
+        return sampled == SAMPLED_OUT or hasattr(request, 'audit_log')
+
+    def _set_timings(
+        self, request: HttpRequest, audit_log: DjangoAuditLogger, view_ended_ns: int
+    ) -> None:
+        """
+        The time in the view is the time between the request and response hooks
+        of the middleware, the rest of the request duration is spent on the
+        audit log. Sending the log is not included.
+        """
+        now_ns = time.monotonic_ns()
+        started_ns = getattr(request, '_audit_log_started', view_ended_ns)
+        view_started_ns = getattr(request, '_audit_log_view_started', view_ended_ns)
+        audit_log.set_django_http_timings(
+            duration_ns=now_ns - started_ns, view_ns=view_ended_ns - view_started_ns
+        )
+
+    def _set_coalescing(
+        self, request: HttpRequest, audit_log: DjangoAuditLogger
+    ) -> None:
+        if app_settings.COALESCE_WINDOW and request.method in coalesce.READ_METHODS:
+            audit_log.set_coalescing(request.get_full_path())
+
+    def _audit_stream(self, request: HttpRequest, response: HttpResponse) -> None:
+        """
+        The audit log of a streaming response is sent when the response is
+        closed, with the number of bytes sent and the time to the last byte.
+        """
+        started_ns = getattr(request, '_audit_log_started', None)
+        if started_ns is None:
+            started_ns = time.monotonic_ns()
+        audit_streaming_response(response, request.audit_log, started_ns)
+
+    def _attach_audit_log(self, request: HttpRequest) -> None:
+        audit_log = DjangoAuditLogger()
+        audit_log.set_django_http_request(request)
+        audit_log.set_user_from_request(request)
+        request.audit_log = audit_log
+
+    async def _aattach_audit_log(self, request: HttpRequest) -> None:
+        audit_log = DjangoAuditLogger()
+        audit_log.set_django_http_request(request)
+        await audit_log.aset_user_from_request(request)
+        request.audit_log = audit_log
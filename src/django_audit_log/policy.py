@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.http import HttpRequest, HttpResponse
+
+from django_audit_log import app_settings
+from django_audit_log.util import get_client_ip, get_url_name, import_callable
+
+SAMPLED_IN = 'in'
+SAMPLED_OUT = 'out'
+SAMPLED_DEFERRED = 'deferred'
+
+ALWAYS_LOG_ERROR = 'error'
+ALWAYS_LOG_WRITE = 'write'
+ALWAYS_LOG_AUTHENTICATED = 'authenticated'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class SamplingRule:
+    """
+    Samples `rate` (0.0 - 1.0) of the requests matching all given conditions.
+    `method` and `status` accept a single value or a list of values.
+    """
+
+    def __init__(self, rate: float, url_name=None, method=None, status=None):
+        self.rate = rate
+        self.url_names = _as_set(url_name)
+        self.methods = {m.upper() for m in _as_set(method)} if method else None
+        self.statuses = _as_set(status)
+
+    def matches_request(self, request: HttpRequest) -> bool:
+        if self.methods is not None and request.method not in self.methods:
+            return False
+        return self.url_names is None or get_url_name(request) in self.url_names
+
+    def matches_status(self, status_code: int) -> bool:
+        return self.statuses is None or status_code in self.statuses
+
+
+class TokenBucketRateLimiter:
+    """
+    Allows bursts of `rate` records per client, refilled at `rate` records per
+    `per` seconds. Keeps the buckets of the `max_clients` most recent clients.
+    """
+
+    def __init__(self, rate: int, per: float, max_clients: int = 10000):
+        self.capacity = rate
+        self.fill_rate = rate / per
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.fill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+class AuditLogPolicy:
+    """
+    Decides which requests are audit logged.
+
+    Requests matching an always log rule are always logged. Other requests
+    are sampled with the rate of the first matching sampling rule (or the
+    default rate) and are subject to the rate limit per client ip.
+
+    sample_request() is called before the audit log is created. It returns
+    SAMPLED_DEFERRED when the decision depends on the response, in which case
+    sample_response() makes the final decision. Requests that were sampled out
+    are only logged when an always log rule matches the response.
+    """
+
+    def __init__(
+        self,
+        rules=(),
+        default_rate: float = 1.0,
+        always_log=(ALWAYS_LOG_ERROR, ALWAYS_LOG_WRITE),
+        rate_limiter: TokenBucketRateLimiter = None,
+    ):
+        self.rules = list(rules)
+        self.default_rate = default_rate
+        self.always_log = frozenset(always_log)
+        self.rate_limiter = rate_limiter
+        self.log_everything = (
+            default_rate >= 1 and not self.rules and rate_limiter is None
+        )
+        self.requires_user = ALWAYS_LOG_AUTHENTICATED in self.always_log
+
+    @classmethod
+    def from_settings(cls) -> 'AuditLogPolicy':
+        rate_limit = app_settings.RATE_LIMIT
+        return cls(
+            rules=[SamplingRule(**rule) for rule in app_settings.SAMPLING_RULES],
+            default_rate=app_settings.SAMPLING_RATE,
+            always_log=app_settings.ALWAYS_LOG,
+            rate_limiter=TokenBucketRateLimiter(*rate_limit) if rate_limit else None,
+        )
+
+    def sample_request(self, request: HttpRequest) -> str:
+        if self.log_everything or self._always_log_request(request):
+            return SAMPLED_IN
+
+        for rule in self.rules:
+            if rule.matches_request(request):
+                if rule.statuses is not None:
+                    return SAMPLED_DEFERRED
+                return self._sample(request, rule.rate)
+        return self._sample(request, self.default_rate)
+
+    def sample_response(
+        self, request: HttpRequest, response: HttpResponse, sampled: str
+    ) -> bool:
+        if sampled == SAMPLED_IN:
+            return True
+        if self._always_log_response(response):
+            return True
+        if sampled == SAMPLED_OUT:
+            return False
+
+        status_code = getattr(response, 'status_code', None)
+        for rule in self.rules:
+            if rule.matches_status(status_code) and rule.matches_request(request):
+                return self._sample(request, rule.rate) == SAMPLED_IN
+        return self._sample(request, self.default_rate) == SAMPLED_IN
+
+    def _always_log_request(self, request: HttpRequest) -> bool:
+        if ALWAYS_LOG_WRITE in self.always_log and request.method not in SAFE_METHODS:
+            return True
+        if ALWAYS_LOG_AUTHENTICATED in self.always_log:
+            # The user loaded by the async middleware, reading request.user
+            # would query the database in the event loop
+            user = getattr(request, '_audit_log_user', None)
+            if user is None:
+                user = getattr(request, 'user', None)
+            return user is not None and user.is_authenticated
+        return False
+
+    def _always_log_response(self, response: HttpResponse) -> bool:
+        return (
+            ALWAYS_LOG_ERROR in self.always_log
+            and getattr(response, 'status_code', 0) >= 400
+        )
+
+    def _sample(self, request: HttpRequest, rate: float) -> str:
+        if rate < 1 and random.random() >= rate:
+            return SAMPLED_OUT
+        if self.rate_limiter is not None and not self.rate_limiter.allow(
+            get_client_ip(request)
+        ):
+            return SAMPLED_OUT
+        return SAMPLED_IN
+
+
+def get_policy() -> AuditLogPolicy:
+    policy_path = app_settings.POLICY_CALLABLE_PATH
+    if not policy_path:
+        return AuditLogPolicy.from_settings()
+
+    policy_callable = import_callable(policy_path)
+    return policy_callable()
+
+
+def _as_set(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return set(value)
+    return {value}
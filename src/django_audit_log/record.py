@@ -0,0 +1,168 @@
+"""
+Compact sections of the audit log.
+
+The http_request, http_response, user and filter sections are kept in objects
+with __slots__ instead of dicts while the request is handled, and only become
+dicts when the log is sent. They read and write like the dicts they replace,
+fields that were never set are left out. Keys that are not a field of the
+section are kept in a dict that is only created when such a key is set.
+"""
+
+UNKNOWN = 'unknown'
+
+_interned_methods = {}
+
+
+class Section:
+    __slots__ = ('_extra',)
+    fields = ()
+
+    def __getitem__(self, key: str):
+        if key in self.fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self._get_extra()[key]
+
+    def __setitem__(self, key: str, value) -> None:
+        if key in self.fields:
+            setattr(self, key, value)
+        else:
+            extra = self._get_extra()
+            if not extra:
+                extra = self._extra = {}
+            extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        if key in self.fields:
+            return hasattr(self, key)
+        return key in self._get_extra()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Section, dict)):
+            return self.as_dict() == _as_dict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return '%s(%r)' % (type(self).__name__, self.as_dict())
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def as_dict(self) -> dict:
+        data = {}
+        for name in self.fields:
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue
+            data[name] = value.as_dict() if isinstance(value, Section) else value
+        extra = self._get_extra()
+        if extra:
+            data.update(extra)
+        return data
+
+    def _get_extra(self) -> dict:
+        return getattr(self, '_extra', _EMPTY)
+
+
+_EMPTY = {}
+
+
+class HttpRequestSection(Section):
+    __slots__ = fields = ('method', 'url', 'user_agent', 'content_length')
+
+    def __init__(self, method: str, url: str, user_agent: str = UNKNOWN):
+        self.method = intern_method(method)
+        self.url = url
+        self.user_agent = user_agent
+
+
+class HttpResponseSection(Section):
+    __slots__ = fields = (
+        'status_code',
+        'reason',
+        'headers',
+        'content_length',
+        'duration_ms',
+        'view_ms',
+        'audit_ms',
+        'bytes_sent',
+        'time_to_last_byte_ms',
+    )
+
+    def __init__(self, status_code: int, reason: str, headers: dict = None):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+
+
+class ProviderSection(Section):
+    __slots__ = fields = ('name', 'realm')
+
+    def __init__(self, name: str, realm: str):
+        self.name = name
+        self.realm = realm
+
+
+class UserSection(Section):
+    __slots__ = fields = (
+        'authenticated',
+        'email',
+        'username',
+        'roles',
+        'ip',
+        'provider',
+    )
+
+    def __init__(
+        self,
+        authenticated: bool,
+        provider: str,
+        email: str,
+        roles: list = None,
+        ip: str = '',
+        realm: str = '',
+        username: str = '',
+    ):
+        self.authenticated = authenticated
+        self.email = email
+        self.username = username
+        self.roles = roles
+        self.ip = ip
+        self.provider = ProviderSection(provider, realm)
+
+
+class FilterSection(Section):
+    __slots__ = fields = ('object', 'kwargs')
+
+    def __init__(self, object_name: str, kwargs: dict):
+        self.object = object_name
+        self.kwargs = kwargs
+
+
+def intern_method(method):
+    """
+    The request method is parsed into a new string for every request, share a
+    single string per method instead. Bounded, the method is sent by the client.
+    """
+    if not isinstance(method, str):
+        return method
+    interned = _interned_methods.get(method)
+    if interned is None:
+        if len(_interned_methods) >= 32:
+            return method
+        interned = _interned_methods[method] = method
+    return interned
+
+
+def _as_dict(value):
+    return value.as_dict() if isinstance(value, Section) else value
@@ -0,0 +1,174 @@
+"""
+Redaction of values in the audit log, by path and by regular expression.
+
+Path rules like 'results.*.password' select values by their dict keys, '*'
+matches any key or list item. Pattern rules mask the matching parts of all
+string values. The rules are compiled once into a tree of path segments that
+is walked together with the log. Without pattern rules only the parts of the
+log on a rule's path are visited, and only the dicts and lists containing a
+redacted value are copied: untouched subtrees are shared with the original.
+"""
+
+import re
+
+from django_audit_log import app_settings
+
+REDACTED = '[redacted]'
+WILDCARD = '*'
+
+_UNRESOLVED = object()
+_redactor = _UNRESOLVED
+_cached_redactors = {}
+
+
+class _Node:
+    __slots__ = ('children', 'wildcard', 'terminal')
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = None
+        self.terminal = False
+
+    def add(self, segments: list) -> None:
+        node = self
+        for segment in segments:
+            if segment == WILDCARD:
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _Node())
+        node.terminal = True
+
+
+# Returned instead of the child nodes when a value is redacted as a whole
+_TERMINAL = object()
+
+
+def _get_children(nodes: list, key) -> list:
+    children = []
+    for node in nodes:
+        for child in (node.children.get(key), node.wildcard):
+            if child is not None:
+                if child.terminal:
+                    return _TERMINAL
+                children.append(child)
+    return children
+
+
+class Redactor:
+    def __init__(self, paths=(), patterns=(), mask: str = REDACTED):
+        self.root = _Node()
+        for path in paths:
+            self.root.add(path.split('.'))
+        self.pattern = (
+            re.compile('|'.join('(?:%s)' % p for p in patterns)) if patterns else None
+        )
+        self.mask = mask
+
+    @classmethod
+    def create(cls, paths=(), patterns=(), mask: str = REDACTED):
+        """
+        A Redactor for the rules, None when there are no rules.
+        """
+        if not paths and not patterns:
+            return None
+        return cls(paths, patterns, mask)
+
+    def redact(self, value, path: str = ''):
+        """
+        Redact a value found at `path` (dotted, e.g. 'filter.kwargs') of the log.
+        Returns `value` itself when nothing was redacted.
+        """
+        nodes = [self.root]
+        if path:
+            for segment in path.split('.'):
+                nodes = _get_children(nodes, segment)
+                if nodes is _TERMINAL:
+                    return self.mask
+        return self._walk(value, nodes)
+
+    def _walk(self, value, nodes: list):
+        if isinstance(value, str):
+            return self._mask_string(value)
+        if not nodes and self.pattern is None:
+            return value
+        if isinstance(value, dict):
+            return self._walk_dict(value, nodes)
+        if isinstance(value, (list, tuple)):
+            return self._walk_list(value, nodes)
+        return value
+
+    def _walk_dict(self, value: dict, nodes: list) -> dict:
+        if self.pattern is None and not any(node.wildcard for node in nodes):
+            # Only visit the keys on the path of a rule
+            keys = [key for node in nodes for key in node.children if key in value]
+        else:
+            keys = value
+
+        redacted = None
+        for key in keys:
+            item = value[key]
+            children = _get_children(nodes, key)
+            new_item = (
+                self.mask if children is _TERMINAL else self._walk(item, children)
+            )
+            if new_item is not item:
+                if redacted is None:
+                    redacted = dict(value)
+                redacted[key] = new_item
+        return value if redacted is None else redacted
+
+    def _walk_list(self, value, nodes: list) -> list:
+        children = [node.wildcard for node in nodes if node.wildcard is not None]
+        if any(child.terminal for child in children):
+            return [self.mask] * len(value)
+        if not children and self.pattern is None:
+            return value
+
+        redacted = None
+        for index, item in enumerate(value):
+            new_item = self._walk(item, children)
+            if new_item is not item:
+                if redacted is None:
+                    redacted = list(value)
+                redacted[index] = new_item
+        return value if redacted is None else redacted
+
+    def _mask_string(self, value: str) -> str:
+        if self.pattern is None or self.pattern.search(value) is None:
+            return value
+        return self.pattern.sub(self.mask, value)
+
+
+def get_redactor():
+    """
+    The Redactor of the AUDIT_LOG_REDACT_PATHS and AUDIT_LOG_REDACT_PATTERNS
+    rules, None when there are no rules.
+    """
+    global _redactor
+    if _redactor is _UNRESOLVED:
+        _redactor = Redactor.create(
+            app_settings.REDACT_PATHS, app_settings.REDACT_PATTERNS
+        )
+    return _redactor
+
+
+def get_cached_redactor(key, create):
+    """
+    The Redactor returned by `create()` the first time it is requested for `key`.
+    """
+    try:
+        return _cached_redactors[key]
+    except KeyError:
+        redactor = _cached_redactors[key] = create()
+        return redactor
+
+
+def reset() -> None:
+    """
+    Compile the rules from the settings again on next use.
+    """
+    global _redactor
+    _redactor = _UNRESOLVED
+    _cached_redactors.clear()
@@ -0,0 +1,78 @@
+import logging
+import threading
+
+from django_audit_log import app_settings, metrics
+from django_audit_log.aggregator import AggregatorHandler
+from django_audit_log.delivery import AuditLogQueueHandler
+from django_audit_log.spool import SpoolHandler
+
+
+class LoggerRegistry:
+    """
+    Process wide registry of configured audit loggers.
+
+    The log handler and formatter callables are resolved and attached to the
+    logger once per (logger name, handler path, formatter path) combination,
+    instead of once per DjangoAuditLogger instance. All DjangoAuditLogger
+    instances share the resulting logger (and thus its handler).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loggers = {}
+        self._installed_handlers = []
+
+    def get_logger(self, audit_logger) -> logging.Logger:
+        key = (
+            audit_logger.get_logger_name(),
+            app_settings.LOG_HANDLER_CALLABLE_PATH,
+            app_settings.LOG_FORMATTER_CALLABLE_PATH,
+        )
+        logger = self._loggers.get(key)
+        if logger is None:
+            with self._lock:
+                logger = self._loggers.get(key)
+                if logger is None:
+                    logger = self._configure_logger(key[0], audit_logger)
+                    self._loggers[key] = logger
+        return logger
+
+    def reset(self) -> None:
+        """
+        Detach and close all handlers installed by the registry, so that the
+        next DjangoAuditLogger resolves the (possibly changed) settings again.
+        """
+        with self._lock:
+            for logger, handler in self._installed_handlers:
+                logger.removeHandler(handler)
+                handler.close()
+            self._installed_handlers = []
+            self._loggers = {}
+
+    def _configure_logger(self, name: str, audit_logger) -> logging.Logger:
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        if not logger.hasHandlers():
+            handler = self._get_handler(audit_logger)
+            formatter = audit_logger.get_log_formatter()
+            if metrics.get_sink() is not None:
+                formatter = metrics.TimedFormatter(formatter)
+            handler.setFormatter(formatter)
+            if app_settings.ASYNC_DELIVERY:
+                handler = AuditLogQueueHandler.from_settings(handler)
+            logger.addHandler(handler)
+            self._installed_handlers.append((logger, handler))
+
+        return logger
+
+    def _get_handler(self, audit_logger) -> logging.Handler:
+        if app_settings.AGGREGATOR_SOCKET:
+            return AggregatorHandler()
+        if app_settings.SPOOL_PATH:
+            return SpoolHandler()
+        return audit_logger.get_log_handler()
+
+
+logger_registry = LoggerRegistry()
@@ -0,0 +1,67 @@
+"""
+Changes of model instances for the audit log of update() and destroy().
+
+A snapshot is a tuple of the values of the concrete fields of an instance, read
+from the instance itself: deferred fields are skipped instead of loaded, and
+related objects are represented by their foreign key value. No queries are
+made and no serializer is run.
+"""
+
+import functools
+
+from django_audit_log.encoders import default
+
+# The value of a deferred field, that is not in the snapshot
+MISSING = object()
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+@functools.lru_cache(maxsize=None)
+def get_attnames(model) -> tuple:
+    return tuple(field.attname for field in model._meta.concrete_fields)
+
+
+def snapshot(instance) -> tuple:
+    values = instance.__dict__
+    return tuple(
+        values.get(attname, MISSING) for attname in get_attnames(type(instance))
+    )
+
+
+def get_changes(instance, before: tuple) -> dict:
+    """
+    The fields of instance that changed since the `before` snapshot, as
+    {attname: [old value, new value]}.
+    """
+    changes = {}
+    after = snapshot(instance)
+    for attname, old, new in zip(get_attnames(type(instance)), before, after):
+        if old is MISSING or new is MISSING or old == new:
+            continue
+        changes[attname] = [to_primitive(old), to_primitive(new)]
+    return changes
+
+
+def get_values(instance) -> dict:
+    """
+    The loaded field values of instance, as {attname: value}.
+    """
+    return {
+        attname: to_primitive(value)
+        for attname, value in zip(get_attnames(type(instance)), snapshot(instance))
+        if value is not MISSING
+    }
+
+
+def to_primitive(value):
+    """
+    A value that every formatter can encode, the snapshot holds the field
+    values as they are (e.g. datetime, Decimal).
+    """
+    if isinstance(value, _PRIMITIVES):
+        return value
+    try:
+        return default(value)
+    except TypeError:
+        return str(value)
@@ -0,0 +1,162 @@
+"""
+The parts of the audit log of a viewset that only depend on its class.
+
+The model name, the log messages, the lookup and the filter backends are
+resolved once per viewset class, at the first request that logs them. The
+filter state of a request is then read from the query parameters, the filter
+backends are not run again. A filter backend that overrides django-filter's
+get_filterset_class() may pick the FilterSet per request, its FilterSet is
+resolved on every request.
+"""
+
+import threading
+
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+try:
+    from django_filters.rest_framework import DjangoFilterBackend
+except ImportError:  # django-filter is optional
+    DjangoFilterBackend = None
+
+MESSAGES = {
+    'retrieve': "Retrieve %s",
+    'list': "List %s",
+    'create': "Created %s object",
+    'update': "Update of %s",
+    'partial_update': "Partial update of %s",
+    'destroy': "Destroy %s",
+    'bulk_create': "Bulk create of %s",
+    'bulk_update': "Bulk update of %s",
+    'bulk_destroy': "Bulk destroy of %s",
+}
+
+# Instance attributes (e.g. passed to as_view()) that change the metadata of a
+# viewset, a viewset instance that sets any of them is not cached
+VIEW_ATTRIBUTES = frozenset(
+    (
+        'queryset',
+        'get_queryset',
+        'lookup_field',
+        'lookup_url_kwarg',
+        'filter_backends',
+        'search_fields',
+        'ordering_fields',
+        'filterset_class',
+        'filterset_fields',
+    )
+)
+
+_lock = threading.Lock()
+_metas = {}
+
+
+class ViewSetMeta:
+    def __init__(self, view):
+        self.lookup_field = view.lookup_field
+        self.lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        self.search_key = str(getattr(view, 'search_fields', []))
+
+        self.search_backends = []
+        self.ordering_params = []
+        self.filterset_backends = []
+        self.cache_filterset_params = True
+        for backend in view.filter_backends:
+            if issubclass(backend, SearchFilter):
+                self.search_backends.append(backend())
+            elif issubclass(backend, OrderingFilter):
+                self.ordering_params.append(backend.ordering_param)
+            elif hasattr(backend, 'get_filterset_class'):
+                # django-filter's DjangoFilterBackend
+                self.filterset_backends.append(backend())
+                if DjangoFilterBackend is None or (
+                    backend.get_filterset_class
+                    is not DjangoFilterBackend.get_filterset_class
+                ):
+                    self.cache_filterset_params = False
+
+        self._model_name = None
+        self._messages = {}
+        self._filterset_params = None
+
+    def get_model_name(self, view) -> str:
+        if self._model_name is None:
+            self._model_name = view.get_queryset().model.__name__
+        return self._model_name
+
+    def get_message(self, view, action: str) -> str:
+        message = self._messages.get(action)
+        if message is None:
+            model_name = self.get_model_name(view)
+            message = self._messages[action] = MESSAGES[action] % model_name
+        return message
+
+    def get_filter_kwargs(self, view, request) -> dict:
+        search_terms = []
+        for backend in self.search_backends:
+            search_terms += backend.get_search_terms(request)
+        filter_kwargs = {self.search_key: search_terms}
+
+        if not self.ordering_params and not self.filterset_backends:
+            return filter_kwargs
+
+        query_params = getattr(request, 'query_params', request.GET)
+        for param in self.ordering_params:
+            ordering = query_params.get(param)
+            if ordering:
+                filter_kwargs[param] = [term.strip() for term in ordering.split(',')]
+        for param in self._get_filterset_params(view):
+            value = query_params.get(param)
+            if value is not None:
+                filter_kwargs[param] = value
+        return filter_kwargs
+
+    def _get_filterset_params(self, view) -> list:
+        """
+        The query parameters of the filters of the FilterSets, django-filter
+        creates the FilterSet class for filterset_fields, do that only once
+        unless a backend picks the FilterSet per request.
+        """
+        if self._filterset_params is not None:
+            return self._filterset_params
+
+        params = []
+        if self.filterset_backends:
+            queryset = view.get_queryset()
+            for backend in self.filterset_backends:
+                filterset_class = backend.get_filterset_class(view, queryset)
+                if filterset_class is not None:
+                    for name, filter_ in filterset_class.base_filters.items():
+                        params.extend(_get_filter_params(name, filter_))
+        if self.cache_filterset_params:
+            self._filterset_params = params
+        return params
+
+
+def _get_filter_params(name: str, filter_) -> list:
+    """
+    The query parameters of the filter `name` of a FilterSet. A filter with a
+    SuffixedMultiWidget (e.g. a RangeFilter) reads a parameter per suffix.
+    """
+    widget = filter_.extra.get('widget') or filter_.field_class.widget
+    suffixes = getattr(widget, 'suffixes', None)
+    if not suffixes:
+        return [name]
+    # As SuffixedMultiWidget.suffixed()
+    return ['%s_%s' % (name, suffix) if suffix else name for suffix in suffixes]
+
+
+def get_viewset_meta(view) -> ViewSetMeta:
+    """
+    The ViewSetMeta of the class of the viewset, created at the first request.
+    """
+    if not VIEW_ATTRIBUTES.isdisjoint(vars(view)):
+        return ViewSetMeta(view)
+
+    view_class = type(view)
+    meta = _metas.get(view_class)
+    if meta is None:
+        with _lock:
+            meta = _metas.get(view_class)
+            if meta is None:
+                meta = _metas[view_class] = ViewSetMeta(view)
+    return meta
@@ -0,0 +1,117 @@
+from django_audit_log.encoders import get_encoder
+
+TRUNCATED_KEY = '_truncated'
+
+
+def limit_results(
+    data,
+    max_items: int = None,
+    max_bytes: int = None,
+    fields=None,
+    exclude_fields=None,
+    summary: bool = False,
+    pk_field: str = 'id',
+):
+    """
+    Limit the results added to the audit log. Handles a list of objects, a
+    paginated response (a dict with a 'results' list) and a single object.
+
+    The data itself is never modified or deep-copied: only the containers that
+    change are rebuilt, untouched values are shared with the response data.
+    Truncated results are marked with a '_truncated' key.
+    """
+    paginated = isinstance(data, dict) and isinstance(data.get('results'), list)
+    items = data['results'] if paginated else data
+
+    if summary:
+        return get_summary(items, pk_field)
+
+    if fields is not None or exclude_fields is not None:
+        items = filter_fields(items, fields, exclude_fields)
+
+    if isinstance(items, list):
+        items = _limit_list(items, max_items, max_bytes)
+    elif isinstance(items, dict) and max_bytes is not None:
+        items = _limit_dict(items, max_bytes)
+
+    if paginated:
+        truncated = isinstance(items, dict)
+        data = dict(data, results=items['results'] if truncated else items)
+        if truncated:
+            data[TRUNCATED_KEY] = True
+        return data
+    return items
+
+
+def get_summary(items, pk_field: str) -> dict:
+    if not isinstance(items, list):
+        items = [items]
+    return {
+        'count': len(items),
+        'pks': [item.get(pk_field) for item in items if isinstance(item, dict)],
+    }
+
+
+def get_bulk_summary(items: list, pk_field: str, chunk_size: int):
+    """
+    The summary of a bulk operation and the chunks of its primary keys. Up to
+    `chunk_size` primary keys are part of the summary, more are split into
+    chunks of `chunk_size` that are logged separately.
+    """
+    summary = get_summary(items, pk_field)
+    pks = summary['pks']
+    if len(pks) <= chunk_size:
+        return summary, []
+
+    chunks = []
+    for start in range(0, len(pks), chunk_size):
+        end = start + chunk_size
+        chunks.append(pks[start:end])
+    return {'count': summary['count'], 'pk_chunks': len(chunks)}, chunks
+
+
+def filter_fields(items, fields=None, exclude_fields=None):
+    if isinstance(items, list):
+        return [_filter_fields(item, fields, exclude_fields) for item in items]
+    return _filter_fields(items, fields, exclude_fields)
+
+
+def get_size(value) -> int:
+    return len(get_encoder().encode(value))
+
+
+def _filter_fields(item, fields, exclude_fields):
+    if not isinstance(item, dict):
+        return item
+    if fields is not None:
+        return {key: item[key] for key in fields if key in item}
+    return {key: value for key, value in item.items() if key not in exclude_fields}
+
+
+def _limit_list(items: list, max_items: int, max_bytes: int):
+    count = len(items)
+    kept = items if max_items is None else items[:max_items]
+
+    if max_bytes is not None:
+        size = 0
+        for index, item in enumerate(kept):
+            size += get_size(item)
+            if size > max_bytes:
+                kept = kept[:index]
+                break
+
+    if len(kept) == count:
+        return items
+    return {'count': count, 'results': kept, TRUNCATED_KEY: True}
+
+
+def _limit_dict(item: dict, max_bytes: int) -> dict:
+    size = 0
+    kept = {}
+    for key, value in item.items():
+        size += get_size(key) + get_size(value)
+        if size > max_bytes:
+            kept[TRUNCATED_KEY] = True
+            return kept
+        kept[key] = value
+    return item
@@ -1,41 +1,96 @@
-from rest_framework.filters import SearchFilter
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from django_audit_log import app_settings, redaction
+from django_audit_log.rest_framework import changes
+from django_audit_log.rest_framework.meta import get_viewset_meta
+from django_audit_log.rest_framework.results import get_bulk_summary, limit_results
+
 
 class AuditLogReadOnlyViewSet(ReadOnlyModelViewSet):
 
     audit_log_list_response = False
 
+    # Limits for the results added to the audit log, see limit_results()
+    audit_log_results_max_items = None
+    audit_log_results_max_bytes = None
+    audit_log_results_fields = None
+    audit_log_results_exclude_fields = None
+    audit_log_results_summary = False
+    audit_log_results_pk_field = 'id'
+
+    # Redaction rules for the results and filter sections, in addition to the
+    # AUDIT_LOG_REDACT_MODEL_PATHS of the model, see django_audit_log.redaction
+    audit_log_redact_paths = ()
+    audit_log_redact_patterns = ()
+
+    def _get_results(self, data):
+        max_items = self.audit_log_results_max_items
+        if max_items is None:
+            max_items = app_settings.RESULTS_MAX_ITEMS
+        max_bytes = self.audit_log_results_max_bytes
+        if max_bytes is None:
+            max_bytes = app_settings.RESULTS_MAX_BYTES
+
+        if (
+            max_items is None
+            and max_bytes is None
+            and self.audit_log_results_fields is None
+            and self.audit_log_results_exclude_fields is None
+            and not self.audit_log_results_summary
+        ):
+            return self._redact(data, 'results')
+
+        results = limit_results(
+            data,
+            max_items=max_items,
+            max_bytes=max_bytes,
+            fields=self.audit_log_results_fields,
+            exclude_fields=self.audit_log_results_exclude_fields,
+            summary=self.audit_log_results_summary,
+            pk_field=self.audit_log_results_pk_field,
+        )
+        return self._redact(results, 'results')
+
+    def _redact(self, value, path: str):
+        redactor = redaction.get_cached_redactor(type(self), self._create_redactor)
+        return value if redactor is None else redactor.redact(value, path)
+
+    def _create_redactor(self):
+        paths = list(self.audit_log_redact_paths)
+        if app_settings.REDACT_MODEL_PATHS:
+            model_label = self.get_queryset().model._meta.label
+            paths.extend(app_settings.REDACT_MODEL_PATHS.get(model_label, []))
+        return redaction.Redactor.create(paths, self.audit_log_redact_patterns)
+
     def _get_lookup_kwargs(self):
-        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        meta = get_viewset_meta(self)
         kwargs = getattr(
             self, 'kwargs', {}
         )  # kwargs is set during dispatch(). Prevent possible attribute errors
-        return {self.lookup_field: kwargs.get(lookup_url_kwarg, "")}
+        lookup_kwargs = {meta.lookup_field: kwargs.get(meta.lookup_url_kwarg, "")}
+        return self._redact(lookup_kwargs, 'filter.kwargs')
 
     def _get_filter_kwargs(self, request):
-        search_terms = []
-        for backend in list(self.filter_backends):
-            if issubclass(backend, SearchFilter):
-                search_terms += backend().get_search_terms(request)
-
-        return {str(getattr(self, 'search_fields', [])): search_terms}
+        filter_kwargs = get_viewset_meta(self).get_filter_kwargs(self, request)
+        return self._redact(filter_kwargs, 'filter.kwargs')
 
     def _get_model_name(self, queryset=None):
-        if queryset is None:
-            queryset = self.get_queryset()
-        return queryset.model.__name__
+        if queryset is not None:
+            return queryset.model.__name__
+        return get_viewset_meta(self).get_model_name(self)
+
+    def _get_message(self, action: str) -> str:
+        return get_viewset_meta(self).get_message(self, action)
 
     def retrieve(self, request, *args, **kwargs):
         response = super().retrieve(request, *args, **kwargs)
 
         if hasattr(request, 'audit_log'):
-            model = self._get_model_name()
             request.audit_log.set_filter(
-                object_name=model, kwargs=self._get_lookup_kwargs()
+                object_name=self._get_model_name(), kwargs=self._get_lookup_kwargs()
             )
-            request.audit_log.set_results(response.data)
-            request.audit_log.info("Retrieve %s" % model)
+            request.audit_log.set_results(self._get_results(response.data))
+            request.audit_log.info(self._get_message('retrieve'))
 
         return response
 
@@ -43,25 +98,89 @@ class AuditLogReadOnlyViewSet(ReadOnlyModelViewSet):
         response = super().list(request, *args, **kwargs)
 
         if hasattr(request, 'audit_log'):
-            model = self._get_model_name()
             filter_kwargs = self._get_filter_kwargs(request)
-            request.audit_log.set_filter(object_name=model, kwargs=filter_kwargs)
-            request.audit_log.info("List %s" % model)
+            request.audit_log.set_filter(
+                object_name=self._get_model_name(), kwargs=filter_kwargs
+            )
+            request.audit_log.info(self._get_message('list'))
 
             if self.audit_log_list_response:
-                request.audit_log.set_results(response.data)
+                request.audit_log.set_results(self._get_results(response.data))
 
         return response
 
 
 class AuditLogViewSet(AuditLogReadOnlyViewSet, ModelViewSet):
+
+    # Log a list of objects created at once (a serializer with many=True) as
+    # a summary with the count and primary keys, see log_bulk_results(). More
+    # than audit_log_bulk_pks_chunk_size keys are logged in separate chunks.
+    # With audit_log_bulk_objects every object is logged separately as well.
+    audit_log_bulk = False
+    audit_log_bulk_pks_chunk_size = 1000
+    audit_log_bulk_objects = False
+
+    # Only log the changed fields for update() and the deleted object for
+    # destroy(), instead of the response data. See rest_framework.changes
+    audit_log_results_changes = False
+
+    def perform_update(self, serializer):
+        if not self._log_changes():
+            return super().perform_update(serializer)
+        before = changes.snapshot(serializer.instance)
+        super().perform_update(serializer)
+        self._audit_log_results = {
+            'changes': changes.get_changes(serializer.instance, before)
+        }
+
+    def perform_destroy(self, instance):
+        if self._log_changes():
+            self._audit_log_results = {'deleted': changes.get_values(instance)}
+        super().perform_destroy(instance)
+
+    def _log_changes(self) -> bool:
+        return self.audit_log_results_changes and hasattr(self.request, 'audit_log')
+
+    def _get_change_results(self, data):
+        results = getattr(self, '_audit_log_results', None)
+        if results is None:
+            return self._get_results(data)
+        return self._redact(results, 'results')
+
+    def log_bulk_results(self, request, data: list, action: str) -> None:
+        """
+        Log the objects of a bulk operation as one summary log, with child logs
+        for the chunks of primary keys and (audit_log_bulk_objects) for every
+        object. The child logs are sent in one batch with the summary. Call
+        with 'bulk_update' or 'bulk_destroy' from custom bulk actions.
+        """
+        audit_log = request.audit_log
+        summary, chunks = get_bulk_summary(
+            data, self.audit_log_results_pk_field, self.audit_log_bulk_pks_chunk_size
+        )
+        message = self._get_message(action)
+        audit_log.set_results(self._redact(summary, 'results'))
+        audit_log.info(message)
+
+        for number, pks in enumerate(chunks, 1):
+            audit_log.add_child(
+                "%s, primary keys %d/%d" % (message, number, len(chunks)),
+                self._redact({'pks': pks}, 'results'),
+            )
+        if self.audit_log_bulk_objects:
+            object_message = self._get_message(action.replace('bulk_', '', 1))
+            for item in data:
+                audit_log.add_child(object_message, self._get_results(item))
+
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
 
         if hasattr(request, 'audit_log'):
-            model = self._get_model_name()
-            request.audit_log.set_results(response.data)
-            request.audit_log.info("Created %s object" % model)
+            if self.audit_log_bulk and isinstance(response.data, list):
+                self.log_bulk_results(request, response.data, 'bulk_create')
+            else:
+                request.audit_log.set_results(self._get_results(response.data))
+                request.audit_log.info(self._get_message('create'))
 
         return response
 
@@ -70,15 +189,13 @@ class AuditLogViewSet(AuditLogReadOnlyViewSet, ModelViewSet):
         response = super().update(request, *args, **kwargs)
 
         if hasattr(request, 'audit_log'):
-            model = self._get_model_name()
-            message = (
-                "Partial update of %s" % model if partial else "Update of %s" % model
-            )
             request.audit_log.set_filter(
-                object_name=model, kwargs=self._get_lookup_kwargs()
+                object_name=self._get_model_name(), kwargs=self._get_lookup_kwargs()
+            )
+            request.audit_log.set_results(self._get_change_results(response.data))
+            request.audit_log.info(
+                self._get_message('partial_update' if partial else 'update')
             )
-            request.audit_log.set_results(response.data)
-            request.audit_log.info(message)
 
         return response
 
@@ -86,11 +203,10 @@ class AuditLogViewSet(AuditLogReadOnlyViewSet, ModelViewSet):
         response = super().destroy(request, *args, **kwargs)
 
         if hasattr(request, 'audit_log'):
-            model = self._get_model_name()
             request.audit_log.set_filter(
-                object_name=model, kwargs=self._get_lookup_kwargs()
+                object_name=self._get_model_name(), kwargs=self._get_lookup_kwargs()
             )
-            request.audit_log.set_results(response.data)
-            request.audit_log.info("Destroy %s" % model)
+            request.audit_log.set_results(self._get_change_results(response.data))
+            request.audit_log.info(self._get_message('destroy'))
 
         return response
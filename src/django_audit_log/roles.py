@@ -0,0 +1,56 @@
+from django.core.cache import caches
+from django.http import HttpRequest
+
+from django_audit_log import app_settings
+
+ROLES_CACHE_KEY = 'django_audit_log:roles:%s'
+
+
+def get_roles_from_groups(request: HttpRequest, user) -> list:
+    """
+    Names of the user's groups. Uses the result of
+    prefetch_related('groups') when present, queries the database otherwise.
+    """
+    prefetched = getattr(user, '_prefetched_objects_cache', {})
+    if 'groups' in prefetched:
+        return [group.name for group in prefetched['groups']]
+    return list(user.groups.values_list('name', flat=True))
+
+
+def get_roles_from_claim(request: HttpRequest, user) -> list:
+    """
+    Roles from the AUDIT_LOG_ROLES_CLAIM claim of the authentication token
+    (request.auth, set by e.g. DRF authentication classes) or the session.
+    Falls back to the user's groups when neither holds the claim.
+    """
+    for claims in (getattr(request, 'auth', None), getattr(request, 'session', None)):
+        try:
+            roles = claims[app_settings.ROLES_CLAIM]
+        except (KeyError, TypeError):
+            continue
+        return list(roles)
+    return get_roles_from_groups(request, user)
+
+
+def get_roles_from_cache(request: HttpRequest, user) -> list:
+    """
+    Names of the user's groups, cached per user for AUDIT_LOG_ROLES_CACHE_TIMEOUT
+    seconds. The cache is invalidated when the user's groups change.
+    """
+    if not user.pk:
+        return []
+
+    cache = caches[app_settings.ROLES_CACHE]
+    key = ROLES_CACHE_KEY % user.pk
+    roles = cache.get(key)
+    if roles is None:
+        roles = get_roles_from_groups(request, user)
+        cache.set(key, roles, app_settings.ROLES_CACHE_TIMEOUT)
+    return roles
+
+
+def invalidate_cached_roles(user_pks) -> None:
+    if user_pks:
+        caches[app_settings.ROLES_CACHE].delete_many(
+            [ROLES_CACHE_KEY % pk for pk in user_pks]
+        )
@@ -0,0 +1,79 @@
+import importlib
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.core.signals import setting_changed
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from django_audit_log import app_settings, coalesce, headers, metrics, redaction
+from django_audit_log.registry import logger_registry
+from django_audit_log.roles import invalidate_cached_roles
+
+ROLES_CACHE_CALLABLE_PATH = 'django_audit_log.roles.get_roles_from_cache'
+
+
+@receiver(setting_changed)
+def reload_app_settings(setting, **kwargs):
+    if setting.startswith('AUDIT_LOG_'):
+        importlib.reload(app_settings)
+        # Send the held logs before the handlers are closed
+        coalesce.reset()
+        logger_registry.reset()
+        metrics.reset()
+        headers.reset()
+        redaction.reset()
+        connect_roles_cache_signals()
+
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        invalidate_cached_roles(pk_set if reverse else [instance.pk])
+    elif action == 'pre_clear':
+        invalidate_cached_roles(
+            _get_group_members(instance) if reverse else [instance.pk]
+        )
+
+
+def group_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    invalidate_cached_roles(_get_group_members(instance))
+
+
+def _get_group_members(group) -> list:
+    return list(
+        get_user_model().objects.filter(groups=group).values_list('pk', flat=True)
+    )
+
+
+def connect_roles_cache_signals() -> None:
+    """
+    Invalidate the roles cached by get_roles_from_cache whenever the groups of
+    a user change, or a group is renamed or deleted. Only connected when
+    AUDIT_LOG_ROLES_CALLABLE_PATH is get_roles_from_cache, the receivers are
+    disconnected otherwise, as they query the members of changed groups.
+    """
+    try:
+        groups_field = get_user_model()._meta.get_field('groups')
+    except FieldDoesNotExist:
+        return  # Custom user model without groups
+
+    through = groups_field.remote_field.through
+    group_model = groups_field.related_model
+    receivers = (
+        (
+            m2m_changed,
+            user_groups_changed,
+            through,
+            'django_audit_log_user_groups_changed',
+        ),
+        (post_save, group_changed, group_model, 'django_audit_log_group_changed'),
+        (pre_delete, group_changed, group_model, 'django_audit_log_group_changed'),
+    )
+    connect = app_settings.ROLES_CALLABLE_PATH == ROLES_CACHE_CALLABLE_PATH
+    for signal, receiver_, sender, dispatch_uid in receivers:
+        if connect:
+            signal.connect(receiver_, sender=sender, dispatch_uid=dispatch_uid)
+        else:
+            signal.disconnect(receiver_, sender=sender, dispatch_uid=dispatch_uid)
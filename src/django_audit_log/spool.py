@@ -0,0 +1,297 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from django_audit_log import app_settings, metrics
+from django_audit_log.handlers import make_formatted_record
+
+# Every record is framed by its length and crc32. The payload is written
+# before the header and the length last, so a reader never sees a length of
+# a record that is not completely written.
+HEADER = struct.Struct('>II')
+LENGTH = struct.Struct('>I')
+CRC = struct.Struct('>I')
+
+# Length written after the last record of a segment that is full or closed
+END_OF_SEGMENT = 0xFFFFFFFF
+
+SEGMENT_SUFFIX = '.seg'
+OFFSET_SUFFIX = '.offset'
+
+
+class SpoolWriter:
+    """
+    Appends records to memory-mapped, preallocated segment files in a
+    directory. Appending a record only copies it into the mapped region; a
+    background thread flushes (msyncs) the dirty segment every
+    `fsync_interval` seconds. A new segment is started when the current one
+    is full.
+
+    Every process writes its own segments, named by creation time and pid, so
+    workers of the same server can share the spool directory.
+    """
+
+    def __init__(self, path: str, segment_size: int, fsync_interval: float):
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync_interval = fsync_interval
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._retired = []
+        self._position = 0
+        self._dirty = False
+        self._open(segment_size)
+
+    def append(self, data: bytes) -> None:
+        length = len(data)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked after the writer was created, the mapped segments belong to the parent
+                self._retired = []
+                self._open(self.segment_size)
+            if self._mmap is None:
+                raise ValueError("Append to a closed spool writer")
+
+            # Keep room for the end of segment marker
+            needed = HEADER.size + length + LENGTH.size
+            if self._position + needed > len(self._mmap):
+                self._rotate(needed)
+
+            position = self._position
+            start = position + HEADER.size
+            end = start + length
+            self._mmap[start:end] = data
+            CRC.pack_into(self._mmap, position + LENGTH.size, zlib.crc32(data))
+            LENGTH.pack_into(self._mmap, position, length)
+            self._position = end
+            self._dirty = True
+
+    def sync(self) -> None:
+        with self._lock:
+            segment, dirty, retired = self._mmap, self._dirty, self._retired
+            self._dirty = False
+            self._retired = []
+        for full_segment in retired:
+            full_segment.flush()
+            full_segment.close()
+        if segment is not None and dirty:
+            try:
+                segment.flush()
+            except ValueError:
+                pass  # closed by close()
+
+    def close(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            if self._mmap is not None and self._pid == os.getpid():
+                self._end_segment()
+                self._retired.append(self._mmap)
+                self._mmap = None
+        self.sync()
+
+    def _open(self, size: int) -> None:
+        self._pid = os.getpid()
+        self._mmap = self._create_segment(size)
+        self._position = 0
+        self._stopped = threading.Event()
+        if self.fsync_interval:
+            threading.Thread(
+                target=self._run, name='audit-log-spool-sync', daemon=True
+            ).start()
+
+    def _create_segment(self, size: int) -> mmap.mmap:
+        name = '%020d-%d%s' % (time.time_ns(), self._pid, SEGMENT_SUFFIX)
+        fd = os.open(
+            os.path.join(self.path, name), os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600
+        )
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                # Allocate the blocks up front, writing to a sparse mapping fails with SIGBUS on a full disk
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+            return mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _rotate(self, needed: int) -> None:
+        self._end_segment()
+        if self.fsync_interval:
+            # Leave flushing the full segment to the sync thread
+            self._retired.append(self._mmap)
+        else:
+            self._mmap.flush()
+            self._mmap.close()
+        self._mmap = self._create_segment(max(self.segment_size, needed))
+        self._position = 0
+
+    def _end_segment(self) -> None:
+        LENGTH.pack_into(self._mmap, self._position, END_OF_SEGMENT)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.fsync_interval):
+            self.sync()
+
+
+class SpoolHandler(logging.Handler):
+    """
+    Writes the formatted logs to the durable spool in AUDIT_LOG_SPOOL_PATH,
+    see SpoolWriter. The `drain_audit_log_spool` management command forwards
+    the spooled logs to the configured log handler.
+    """
+
+    def __init__(
+        self, path: str = None, segment_size: int = None, fsync_interval: float = None
+    ):
+        super().__init__()
+        path = path or app_settings.SPOOL_PATH
+        if not path:
+            raise ValueError("SpoolHandler requires AUDIT_LOG_SPOOL_PATH")
+        if segment_size is None:
+            segment_size = app_settings.SPOOL_SEGMENT_SIZE
+        if fsync_interval is None:
+            fsync_interval = app_settings.SPOOL_FSYNC_INTERVAL
+        self.writer = SpoolWriter(path, segment_size, fsync_interval)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.writer.append(self.format(record).encode())
+        except Exception:
+            metrics.count(metrics.FAILED)
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.writer.sync()
+
+    def close(self) -> None:
+        self.writer.close()
+        super().close()
+
+
+def read_segment(path: str, offset: int, max_records: int = None):
+    """
+    Read the records of a segment file, starting at `offset`.
+
+    Returns the records, the offset after the last returned record and
+    whether the segment is complete: it was closed by its writer (or its
+    writer died) and all of its records have been read.
+    """
+    records = []
+    with open(path, 'rb') as file:
+        if not os.fstat(file.fileno()).st_size:
+            # Just created, not allocated yet
+            return records, offset, not _writer_alive(path)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as segment:
+            size = len(segment)
+            while max_records is None or len(records) < max_records:
+                if offset + HEADER.size > size:
+                    return records, offset, True
+                length, crc = HEADER.unpack_from(segment, offset)
+                if length == END_OF_SEGMENT:
+                    return records, offset, True
+
+                start = offset + HEADER.size
+                end = start + length
+                if length == 0 or end > size or zlib.crc32(segment[start:end]) != crc:
+                    # Not (completely) written yet, or garbage left by a writer that died
+                    return records, offset, not _writer_alive(path)
+                records.append(segment[start:end])
+                offset = end
+    return records, offset, False
+
+
+class SpoolDrain:
+    """
+    Tails the segments in the spool directory and forwards the records to a
+    log handler. The offset of the next record of a segment is checkpointed
+    after the handler has been flushed, and a segment is deleted once it is
+    complete. Records are delivered at least once.
+    """
+
+    def __init__(self, path: str, handler: logging.Handler, batch_size: int = 1000):
+        self.path = path
+        self.handler = handler
+        self.batch_size = batch_size
+
+    def segments(self) -> list:
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            os.path.join(self.path, name)
+            for name in names
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def drain(self) -> int:
+        """
+        Forward all records that are spooled at this moment, returns the number of forwarded records.
+        """
+        count = 0
+        for segment in self.segments():
+            count += self.drain_segment(segment)
+        return count
+
+    def drain_segment(self, segment: str) -> int:
+        count = 0
+        offset = self._get_offset(segment)
+        while True:
+            records, offset, complete = read_segment(segment, offset, self.batch_size)
+            for record in records:
+                self.handler.handle(make_formatted_record(record.decode()))
+            self.handler.flush()
+            count += len(records)
+
+            if complete:
+                os.remove(segment)
+                _remove(segment + OFFSET_SUFFIX)
+                return count
+            if records:
+                self._set_offset(segment, offset)
+            if len(records) < self.batch_size:
+                return count
+
+    def run(self, interval: float, stopped: threading.Event = None) -> None:
+        stopped = stopped or threading.Event()
+        while not stopped.is_set():
+            if not self.drain():
+                stopped.wait(interval)
+
+    def _get_offset(self, segment: str) -> int:
+        try:
+            with open(segment + OFFSET_SUFFIX) as file:
+                return int(file.read())
+        except FileNotFoundError:
+            return 0
+
+    def _set_offset(self, segment: str, offset: int) -> None:
+        path = segment + OFFSET_SUFFIX
+        with open(path + '.tmp', 'w') as file:
+            file.write(str(offset))
+        os.replace(path + '.tmp', path)
+
+
+def _writer_alive(segment: str) -> bool:
+    name = os.path.splitext(os.path.basename(segment))[0]
+    pid = int(name.split('-')[1])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,88 @@
+import time
+
+from django.http import StreamingHttpResponse
+
+from django_audit_log.util import parse_content_length
+
+
+class AuditedStream:
+    """
+    Replaces the streaming content of a response. The chunks are passed on as
+    they are, only their lengths are counted. When the server closes the
+    response the bytes sent and the time to the last byte are added to the
+    http_response section and the audit log is sent.
+    """
+
+    def __init__(self, content, audit_log, started_ns: int, content_length=None):
+        self.content = content
+        self.audit_log = audit_log
+        self.started_ns = started_ns
+        self.content_length = content_length
+        self.bytes_sent = 0
+        self.last_byte_ns = None
+        self.iterated = False
+        self.closed = False
+
+    def __iter__(self):
+        self.iterated = True
+        for chunk in self.content:
+            self.bytes_sent += len(chunk)
+            yield chunk
+        self.last_byte_ns = time.monotonic_ns()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if self.last_byte_ns is None:
+            self.last_byte_ns = time.monotonic_ns()
+        if not self.iterated and self.content_length is not None:
+            # The file was sent by the server (wsgi.file_wrapper)
+            self.bytes_sent = self.content_length
+
+        http_response = self.audit_log.http_response
+        http_response['bytes_sent'] = self.bytes_sent
+        http_response['time_to_last_byte_ms'] = (
+            self.last_byte_ns - self.started_ns
+        ) / 1e6
+        self.audit_log.send_log()
+
+
+class AsyncAuditedStream(AuditedStream):
+    """
+    AuditedStream for asynchronous streaming content (Django 4.2+).
+    """
+
+    __iter__ = None
+
+    async def __aiter__(self):
+        self.iterated = True
+        async for chunk in self.content:
+            self.bytes_sent += len(chunk)
+            yield chunk
+        self.last_byte_ns = time.monotonic_ns()
+
+
+def audit_streaming_response(
+    response: StreamingHttpResponse, audit_log, started_ns: int
+) -> AuditedStream:
+    """
+    Wrap the content of a streaming response, so the audit log is sent when
+    the response is closed. The content is not consumed or buffered.
+    """
+    file_to_stream = getattr(response, 'file_to_stream', None)
+    content_length = None
+    if file_to_stream is not None:
+        content_length = parse_content_length(response.get('Content-Length'))
+
+    stream_class = (
+        AsyncAuditedStream if getattr(response, 'is_async', False) else AuditedStream
+    )
+    stream = stream_class(
+        response.streaming_content, audit_log, started_ns, content_length
+    )
+    response.streaming_content = stream
+    if file_to_stream is not None:
+        # Assigning the content resets it, keep serving the file with sendfile
+        response.file_to_stream = file_to_stream
+    return stream
@@ -1,7 +1,12 @@
 import importlib
 import logging
+from functools import lru_cache
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.http import HttpRequest
+from django.urls import Resolver404, resolve
+from django.utils.functional import LazyObject, empty
 
 
 def get_client_ip(request: HttpRequest) -> str:
@@ -21,3 +26,48 @@ def get_client_ip(request: HttpRequest) -> str:
 def import_callable(path):
     module, method = path.rsplit('.', 1)
     return getattr(importlib.import_module(module), method)
+
+
+def parse_content_length(value):
+    """
+    The value of a Content-Length header as int, None when it is missing or
+    malformed.
+    """
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def get_url_name(request: HttpRequest) -> str:
+    """
+    The (namespaced) url name of the view handling the request. Resolves the
+    path when the request has not been resolved yet (e.g. in process_request).
+    """
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is not None:
+        return resolver_match.view_name
+    urlconf = getattr(request, 'urlconf', None) or settings.ROOT_URLCONF
+    return _resolve_url_name(request.path_info, urlconf)
+
+
+@lru_cache(maxsize=1024)
+def _resolve_url_name(path: str, urlconf) -> str:
+    try:
+        return resolve(path, urlconf).view_name
+    except Resolver404:
+        return None
+
+
+async def aget_user(request: HttpRequest):
+    """
+    The user of the request, loaded without blocking the event loop.
+    """
+    if hasattr(request, 'auser'):
+        return await request.auser()
+
+    user = getattr(request, 'user', None)
+    if isinstance(user, LazyObject) and user._wrapped is empty:
+        # e.g. set by the AuthenticationMiddleware, loading it hits the database
+        await sync_to_async(user._setup)()
+    return user
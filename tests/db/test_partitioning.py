@@ -0,0 +1,171 @@
+import datetime
+from unittest import SkipTest, TestCase, skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+if not apps.is_installed('django_audit_log.db'):
+    raise SkipTest("django_audit_log.db requires Django 3.1 or later")
+
+from django_audit_log.db import partitioning  # noqa: E402
+
+
+class FakePostgresConnection:
+    vendor = 'postgresql'
+
+    def __init__(self, partitions=(), partitioned=True, serial_sequence=None):
+        self.queries = []
+        self.partitions = list(partitions)
+        self.partitioned = partitioned
+        self.serial_sequence = serial_sequence
+        self.ops = MagicMock()
+        self.ops.quote_name = lambda name: '"%s"' % name
+
+    def cursor(self):
+        cursor = MagicMock()
+        cursor.__enter__.return_value = cursor
+        cursor.execute.side_effect = lambda sql, params=None: self.queries.append((sql, params))
+        cursor.fetchall.return_value = [(name,) for name in self.partitions]
+        cursor.fetchone.side_effect = self.fetchone
+        return cursor
+
+    def fetchone(self):
+        if 'pg_get_serial_sequence' in self.queries[-1][0]:
+            return (self.serial_sequence,)
+        return (1,) if self.partitioned else None
+
+
+class TestPartitioning(TestCase):
+
+    def test_months(self):
+        self.assertEqual(partitioning.get_month(datetime.date(2021, 12, 3)), datetime.date(2021, 12, 1))
+        self.assertEqual(partitioning.add_months(datetime.date(2021, 12, 1), 1), datetime.date(2022, 1, 1))
+        self.assertEqual(partitioning.add_months(datetime.date(2021, 1, 1), -1), datetime.date(2020, 12, 1))
+        self.assertEqual(partitioning.add_months(datetime.date(2021, 1, 1), 14), datetime.date(2022, 3, 1))
+
+    def test_partition_name(self):
+        self.assertEqual(
+            partitioning.get_partition_name(datetime.date(2021, 3, 1)), 'django_audit_log_entry_y2021m03'
+        )
+
+    def test_not_supported(self):
+        # sqlite
+        self.assertFalse(partitioning.is_supported(connection))
+        self.assertFalse(partitioning.is_partitioned(connection))
+
+    def test_is_partitioned(self):
+        self.assertTrue(partitioning.is_partitioned(FakePostgresConnection()))
+        self.assertFalse(partitioning.is_partitioned(FakePostgresConnection(partitioned=False)))
+
+    def test_get_partitions(self):
+        fake_connection = FakePostgresConnection(
+            ['django_audit_log_entry_y2021m11', 'django_audit_log_entry_default', 'django_audit_log_entry_y2021m12']
+        )
+        self.assertEqual(
+            partitioning.get_partitions(fake_connection),
+            {
+                datetime.date(2021, 11, 1): 'django_audit_log_entry_y2021m11',
+                datetime.date(2021, 12, 1): 'django_audit_log_entry_y2021m12',
+            },
+        )
+
+    def test_create_partitions(self):
+        fake_connection = FakePostgresConnection(['django_audit_log_entry_y2021m12'])
+        created = partitioning.create_partitions(fake_connection, 2, start=datetime.date(2021, 12, 3))
+
+        self.assertEqual(created, ['django_audit_log_entry_y2022m01', 'django_audit_log_entry_y2022m02'])
+        self.assertEqual(
+            fake_connection.queries[1],
+            (
+                'CREATE TABLE "django_audit_log_entry_y2022m01" PARTITION OF "django_audit_log_entry" '
+                'FOR VALUES FROM (%s) TO (%s)',
+                ['2022-01-01', '2022-02-01'],
+            ),
+        )
+
+    def test_drop_partitions(self):
+        fake_connection = FakePostgresConnection(
+            [
+                'django_audit_log_entry_y2021m10',
+                'django_audit_log_entry_y2021m11',
+                'django_audit_log_entry_y2021m12',
+            ]
+        )
+        before = datetime.datetime(2021, 12, 3, tzinfo=datetime.timezone.utc)
+        dropped = partitioning.drop_partitions(fake_connection, before)
+
+        # November holds logs up to (not including) December 1st, December has newer logs
+        self.assertEqual(dropped, ['django_audit_log_entry_y2021m10', 'django_audit_log_entry_y2021m11'])
+        self.assertEqual(fake_connection.queries[-1], ('DROP TABLE "django_audit_log_entry_y2021m11"', None))
+
+    def test_partition_table_disabled(self):
+        schema_editor = MagicMock(connection=FakePostgresConnection(partitioned=False))
+        with patch('django_audit_log.app_settings.DB_PARTITIONED', False):
+            partitioning.partition_table(apps, schema_editor)
+        schema_editor.execute.assert_not_called()
+
+    @patch('django_audit_log.app_settings.DB_PARTITIONED', True)
+    @patch('django_audit_log.app_settings.DB_PARTITIONS_AHEAD', 1)
+    def test_partition_table(self):
+        fake_connection = FakePostgresConnection(partitioned=False)
+        schema_editor = MagicMock(connection=fake_connection)
+        partitioning.partition_table(apps, schema_editor)
+
+        statements = [str(call[0][0]) for call in schema_editor.execute.call_args_list]
+        self.assertIn(
+            'CREATE TABLE "django_audit_log_entry" (LIKE "django_audit_log_entry_unpartitioned" '
+            'INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS) PARTITION BY RANGE ("timestamp")',
+            statements,
+        )
+        self.assertIn('ALTER TABLE "django_audit_log_entry" ADD PRIMARY KEY ("id", "timestamp")', statements)
+        self.assertIn('DROP TABLE "django_audit_log_entry_unpartitioned"', statements)
+        self.assertIn(
+            'CREATE TABLE "django_audit_log_entry_default" PARTITION OF "django_audit_log_entry" DEFAULT', statements
+        )
+        # Renamed, created, primary key, dropped, the indexes and the default partition
+        indexes = apps.get_model('django_audit_log_db', 'AuditLogEntry')._meta.indexes
+        self.assertEqual(len(statements), 5 + len(indexes))
+        self.assertFalse([sql for sql in statements if 'SEQUENCE' in sql])
+        # The partitions of this month and the next
+        self.assertEqual(len([sql for sql, _ in fake_connection.queries if 'FOR VALUES' in sql]), 2)
+
+    @patch('django_audit_log.app_settings.DB_PARTITIONED', True)
+    def test_partition_table_serial(self):
+        fake_connection = FakePostgresConnection(
+            partitioned=False, serial_sequence='public.django_audit_log_entry_id_seq'
+        )
+        schema_editor = MagicMock(connection=fake_connection)
+        partitioning.partition_table(apps, schema_editor)
+
+        statements = [str(call[0][0]) for call in schema_editor.execute.call_args_list]
+        self.assertIn(
+            'ALTER SEQUENCE public.django_audit_log_entry_id_seq OWNED BY "django_audit_log_entry"."id"', statements
+        )
+
+
+@skipUnless('postgresql' in settings.DATABASES, "Requires PostgreSQL, set POSTGRES_HOST")
+class TestPartitionTablePostgreSQL(TransactionTestCase):
+    databases = {'default', 'postgresql'}
+
+    def setUp(self):
+        self.connection = connections['postgresql']
+
+    @patch('django_audit_log.app_settings.DB_PARTITIONED', True)
+    @patch('django_audit_log.app_settings.DB_PARTITIONS_AHEAD', 1)
+    def test_partition_table(self):
+        # The test database is migrated without AUDIT_LOG_DB_PARTITIONED
+        with self.connection.schema_editor() as schema_editor:
+            partitioning.partition_table(apps, schema_editor)
+        self.assertTrue(partitioning.is_partitioned(self.connection))
+        self.assertEqual(len(partitioning.get_partitions(self.connection)), 2)
+
+        model = apps.get_model('django_audit_log_db', 'AuditLogEntry')
+        entries = model.objects.using('postgresql')
+        first = entries.create(timestamp=timezone.now(), payload={})
+        second = entries.create(timestamp=timezone.now() - datetime.timedelta(days=400), payload={})
+        self.assertGreater(second.pk, first.pk)
+        self.assertEqual(entries.count(), 2)
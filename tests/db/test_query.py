@@ -0,0 +1,155 @@
+import datetime
+import json
+from unittest import SkipTest
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+if not apps.is_installed('django_audit_log.db'):
+    raise SkipTest("django_audit_log.db requires Django 3.1 or later")
+
+from django_audit_log.db.models import AuditLogEntry  # noqa: E402
+from django_audit_log.db.pagination import KeysetPagination  # noqa: E402
+from django_audit_log.db.viewsets import AuditLogEntryViewSet  # noqa: E402
+
+NOW = timezone.now().replace(microsecond=0)
+
+
+def create_entry(minutes=0, user='john', ip='127.0.0.1', object_type='Book', lookup=None, status=200):
+    audit = {
+        'http_request': {'method': 'GET', 'url': 'http://localhost/books/', 'user_agent': 'test'},
+        'http_response': {'status_code': status, 'reason': 'OK', 'headers': None},
+        'user': {'username': user, 'ip': ip},
+        'filter': {'object': object_type, 'kwargs': lookup or {}},
+        'type': 'INFO',
+        'message': 'Retrieve %s' % object_type,
+    }
+    entry = AuditLogEntry.from_audit(audit, NOW - datetime.timedelta(minutes=minutes))
+    entry.save()
+    return entry
+
+
+class TestAuditLogEntryQuerySet(TestCase):
+
+    def test_search(self):
+        john = create_entry(user='john', lookup={'pk': '1'})
+        jane = create_entry(user='jane', ip='10.0.0.1', object_type='Author', lookup={'pk': '2'}, status=404)
+        old = create_entry(minutes=60, user='john')
+
+        def search(**criteria):
+            return set(AuditLogEntry.objects.search(**criteria))
+
+        self.assertEqual(search(), {john, jane, old})
+        self.assertEqual(search(user='john'), {john, old})
+        self.assertEqual(search(ip='10.0.0.1'), {jane})
+        self.assertEqual(search(object_type='Book', object_id='1'), {john})
+        self.assertEqual(search(lookup={'pk': '2'}), {jane})
+        self.assertEqual(search(status=404), {jane})
+        self.assertEqual(search(method='GET', since=NOW - datetime.timedelta(minutes=30)), {john, jane})
+        self.assertEqual(search(until=NOW - datetime.timedelta(minutes=30)), {old})
+
+    def test_search_invalid_lookup(self):
+        for key in ('pk__startswith', 'pk__', '', 'pk.id'):
+            with self.subTest(key=key), self.assertRaises(ValueError):
+                AuditLogEntry.objects.search(lookup={key: '1'})
+
+    def test_before(self):
+        entries = [create_entry(minutes=minutes) for minutes in (0, 0, 0, 1, 2)]
+        ordered = list(AuditLogEntry.objects.newest_first())
+        self.assertEqual(ordered, [entries[2], entries[1], entries[0], entries[3], entries[4]])
+
+        middle = ordered[1]
+        self.assertEqual(
+            list(AuditLogEntry.objects.newest_first().before(middle.timestamp, middle.pk)), ordered[2:]
+        )
+
+    def test_iterate(self):
+        entries = [create_entry(minutes=minutes) for minutes in range(5)]
+        with self.assertNumQueries(3):
+            self.assertEqual(list(AuditLogEntry.objects.iterate(2)), entries)
+
+
+class TestAuditLogEntryViewSet(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(username='admin', is_staff=True)
+        self.entries = [create_entry(minutes=minutes, user='user%d' % (minutes % 2)) for minutes in range(5)]
+
+    def get(self, url='/entries/', action='list', **kwargs):
+        request = self.factory.get(url)
+        force_authenticate(request, self.user)
+        return AuditLogEntryViewSet.as_view({'get': action})(request, **kwargs)
+
+    def test_list(self):
+        response = self.get('/entries/?page_size=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['id'] for entry in response.data['results']], [e.pk for e in self.entries[:2]])
+
+        # Follow the cursors
+        ids = [entry['id'] for entry in response.data['results']]
+        while response.data['next']:
+            response = self.get(response.data['next'])
+            ids.extend(entry['id'] for entry in response.data['results'])
+        self.assertEqual(ids, [entry.pk for entry in self.entries])
+
+    def test_list_search(self):
+        response = self.get('/entries/?user=user1')
+        self.assertEqual([entry['id'] for entry in response.data['results']], [self.entries[1].pk, self.entries[3].pk])
+        self.assertIsNone(response.data['next'])
+
+    def test_list_invalid_parameters(self):
+        for query in ('status=ok', 'since=yesterday', 'until=2021-13-01T00:00:00', 'lookup.pk__gt=1'):
+            with self.subTest(query=query):
+                self.assertEqual(self.get('/entries/?' + query).status_code, 400)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.get('/entries/?cursor=invalid').status_code, 404)
+
+    def test_requires_admin(self):
+        self.user.is_staff = False
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_retrieve(self):
+        entry = self.entries[0]
+        response = self.get('/entries/%d/' % entry.pk, action='retrieve', pk=entry.pk)
+        self.assertEqual(response.data['payload']['message'], 'Retrieve Book')
+
+    def test_export_csv(self):
+        response = self.get('/entries/export/csv/?user=user0', action='export', export_format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertTrue(response.streaming)
+
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[0], 'id,timestamp,level,message,method,url,status,user,ip,object_type,object_id')
+        self.assertEqual(len(rows), 4)
+        self.assertTrue(rows[1].startswith('%d,' % self.entries[0].pk))
+
+    def test_export_ndjson(self):
+        response = self.get('/entries/export/ndjson/', action='export', export_format='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([line['id'] for line in lines], [entry.pk for entry in self.entries])
+        self.assertEqual(lines[0]['audit']['message'], 'Retrieve Book')
+
+
+class TestKeysetPagination(TestCase):
+
+    def test_cursor(self):
+        pagination = KeysetPagination()
+        cursor = pagination.encode_cursor((NOW, 42))
+        request = APIRequestFactory().get('/', {'cursor': cursor})
+        request.query_params = request.GET
+        self.assertEqual(pagination.decode_cursor(request), (NOW, 42))
+
+    def test_page_size(self):
+        pagination = KeysetPagination()
+        factory = APIRequestFactory()
+        for page_size, expected in (('10', 10), ('0', 1), ('5000', 1000), ('x', 100)):
+            request = factory.get('/', {'page_size': page_size})
+            request.query_params = request.GET
+            self.assertEqual(pagination.get_page_size(request), expected)
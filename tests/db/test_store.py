@@ -0,0 +1,194 @@
+import datetime
+import io
+import json
+import time
+from unittest import SkipTest
+from unittest.mock import patch
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from django_audit_log.handlers import make_formatted_record
+from tests.utils import make_record
+
+if not apps.is_installed('django_audit_log.db'):
+    raise SkipTest("django_audit_log.db requires Django 3.1 or later")
+
+from django_audit_log.db.handlers import DatabaseHandler  # noqa: E402
+from django_audit_log.db.models import AuditLogEntry, AuditLogEntryQuerySet  # noqa: E402
+
+AUDIT = {
+    'http_request': {'method': 'PUT', 'url': 'http://localhost/api/books/1/', 'user_agent': 'test'},
+    'http_response': {'status_code': 200, 'reason': 'OK', 'headers': None},
+    'user': {
+        'authenticated': True,
+        'email': 'john@example.com',
+        'username': 'john',
+        'roles': ['editor'],
+        'ip': '127.0.0.1',
+        'provider': {'name': '', 'realm': ''},
+    },
+    'filter': {'object': 'Book', 'kwargs': {'pk': '1'}},
+    'results': [{'id': 1, 'price': '9.99'}],
+    'type': 'INFO',
+    'message': 'Update of Book',
+}
+
+
+class TestAuditLogEntry(TestCase):
+
+    def test_from_audit(self):
+        timestamp = timezone.now()
+        entry = AuditLogEntry.from_audit(AUDIT, timestamp)
+
+        self.assertEqual(entry.timestamp, timestamp)
+        self.assertEqual(entry.level, 'INFO')
+        self.assertEqual(entry.message, 'Update of Book')
+        self.assertEqual(entry.method, 'PUT')
+        self.assertEqual(entry.url, 'http://localhost/api/books/1/')
+        self.assertEqual(entry.status, 200)
+        self.assertEqual(entry.user, 'john')
+        self.assertEqual(entry.ip, '127.0.0.1')
+        self.assertEqual(entry.object_type, 'Book')
+        self.assertEqual(entry.object_id, '1')
+        self.assertEqual(entry.payload, AUDIT)
+
+    def test_from_audit_minimal(self):
+        entry = AuditLogEntry.from_audit({'type': 'INFO', 'message': 'test'}, timezone.now())
+
+        self.assertIsNone(entry.status)
+        self.assertEqual(entry.user, '')
+        self.assertEqual(entry.object_type, '')
+        self.assertEqual(entry.object_id, '')
+        entry.save()
+
+    def test_from_audit_list(self):
+        audit = dict(AUDIT, filter={'object': 'Book', 'kwargs': {"['title']": ['django']}})
+        entry = AuditLogEntry.from_audit(audit, timezone.now())
+        self.assertEqual(entry.object_type, 'Book')
+        self.assertEqual(entry.object_id, '')
+
+    def test_payload_encoder(self):
+        audit = dict(AUDIT, results=[{'price': 9.99, 'created': datetime.date(2021, 12, 3)}])
+        AuditLogEntry.from_audit(audit, timezone.now()).save()
+        self.assertEqual(AuditLogEntry.objects.get().payload['results'][0]['created'], '2021-12-03')
+
+    def test_delete_in_chunks(self):
+        AuditLogEntry.objects.bulk_create(
+            [AuditLogEntry.from_audit(AUDIT, timezone.now()) for _ in range(5)]
+        )
+        with self.assertNumQueries(6):  # 3 chunks of a select and a delete
+            deleted = AuditLogEntry.objects.filter(status=200).delete_in_chunks(2)
+
+        self.assertEqual(deleted, 5)
+        self.assertFalse(AuditLogEntry.objects.exists())
+
+
+class TestDatabaseHandler(TransactionTestCase):
+
+    def make_handler(self, **kwargs):
+        options = dict(batch_size=2, flush_interval=60)
+        options.update(kwargs)
+        handler = DatabaseHandler(**options)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_flush(self):
+        handler = self.make_handler(batch_size=10)
+        handler.handle(make_record(audit=AUDIT))
+        self.assertFalse(AuditLogEntry.objects.exists())
+
+        handler.flush()
+        entry = AuditLogEntry.objects.get()
+        self.assertEqual(entry.user, 'john')
+        self.assertEqual(entry.payload, AUDIT)
+
+    def test_bulk_create_in_batches(self):
+        handler = self.make_handler(batch_size=2)
+        for _ in range(5):
+            handler.handle(make_record(audit=AUDIT))
+
+        with patch.object(AuditLogEntryQuerySet, 'bulk_create') as mocked_bulk_create:
+            handler.close()
+        self.assertEqual(
+            [len(call[0][0]) for call in mocked_bulk_create.call_args_list], [2, 2, 1]
+        )
+
+    def test_background_thread(self):
+        handler = self.make_handler(batch_size=2)
+        handler.handle(make_record(audit=AUDIT))
+        handler.handle(make_record(audit=AUDIT))
+
+        for _ in range(200):
+            if AuditLogEntry.objects.count() == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(AuditLogEntry.objects.count(), 2)
+
+    def test_formatted_record(self):
+        handler = self.make_handler()
+        # e.g. forwarded by the spool drain
+        handler.handle(make_formatted_record(json.dumps({'audit': AUDIT})))
+        handler.flush()
+        self.assertEqual(AuditLogEntry.objects.get().object_id, '1')
+
+    def test_timestamp(self):
+        handler = self.make_handler()
+        handler.handle(make_record(audit=AUDIT, created=1638526800.5))
+        handler.flush()
+
+        timestamp = AuditLogEntry.objects.get().timestamp
+        expected = datetime.datetime(2021, 12, 3, 10, 20, 0, 500000, tzinfo=datetime.timezone.utc)
+        self.assertEqual(timestamp, timezone.make_naive(expected))
+
+    def test_database_error(self):
+        handler = self.make_handler()
+        handler.handle(make_record(audit=AUDIT))
+        with patch.object(AuditLogEntryQuerySet, 'bulk_create', side_effect=DatabaseError), patch(
+            'logging.Logger.exception'
+        ) as mocked_exception:
+            handler.flush()
+        mocked_exception.assert_called_with("Dropped %d audit logs, failed to store them", 1)
+
+    def test_settings(self):
+        with patch('django_audit_log.app_settings.DB_BATCH_SIZE', 50), patch(
+            'django_audit_log.app_settings.DB_ALIAS', 'audit'
+        ):
+            handler = DatabaseHandler()
+        self.addCleanup(handler.close)
+        self.assertEqual(handler.batch_size, 50)
+        self.assertEqual(handler.using, 'audit')
+
+
+class TestPurgeCommand(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        AuditLogEntry.objects.bulk_create(
+            [AuditLogEntry.from_audit(AUDIT, now - datetime.timedelta(days=days)) for days in (1, 10, 40, 50, 60)]
+        )
+
+    def test_purge(self):
+        stdout = io.StringIO()
+        call_command('purge_audit_log', '--days', '30', '--chunk-size', '2', stdout=stdout)
+
+        self.assertEqual(AuditLogEntry.objects.count(), 2)
+        self.assertIn('Deleted 3 audit logs', stdout.getvalue())
+
+    def test_retention_setting(self):
+        with patch('django_audit_log.app_settings.DB_RETENTION_DAYS', 5):
+            call_command('purge_audit_log', stdout=io.StringIO())
+        self.assertEqual(AuditLogEntry.objects.count(), 1)
+
+    def test_requires_days(self):
+        with patch('django_audit_log.app_settings.DB_RETENTION_DAYS', None):
+            with self.assertRaises(CommandError):
+                call_command('purge_audit_log')
+
+    def test_create_partitions_requires_partitioned_table(self):
+        with self.assertRaises(CommandError):
+            call_command('create_audit_log_partitions')
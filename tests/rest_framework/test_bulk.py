@@ -0,0 +1,143 @@
+import logging
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIRequestFactory
+
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.rest_framework.results import get_bulk_summary
+from django_audit_log.rest_framework.viewsets import AuditLogViewSet
+
+
+class BatchHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def emit(self, record):
+        self.batches.append([record])
+
+    def handle_batch(self, records):
+        self.batches.append(records)
+
+
+class UserSerializer(ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'email')
+
+
+class BulkUserViewSet(AuditLogViewSet):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+    authentication_classes = []
+    permission_classes = []
+    audit_log_bulk = True
+
+    def get_serializer(self, *args, **kwargs):
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+
+class TestGetBulkSummary(TestCase):
+
+    def test_summary(self):
+        items = [{'id': pk} for pk in range(1, 4)]
+        self.assertEqual(get_bulk_summary(items, 'id', 3), ({'count': 3, 'pks': [1, 2, 3]}, []))
+
+    def test_chunks(self):
+        items = [{'id': pk} for pk in range(1, 6)]
+        self.assertEqual(get_bulk_summary(items, 'id', 2), ({'count': 5, 'pk_chunks': 3}, [[1, 2], [3, 4], [5]]))
+
+
+class TestBulkCreate(TestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def create(self, data, audit_log=None, **initkwargs):
+        request = self.factory.post('/', data, format='json')
+        request.audit_log = audit_log or mock.Mock()
+        response = BulkUserViewSet.as_view({'post': 'create'}, **initkwargs)(request)
+        self.assertEqual(response.status_code, 201)
+        return request.audit_log
+
+    def get_data(self, number):
+        return [{'username': 'user%d' % i, 'email': 'user%d@example.com' % i} for i in range(number)]
+
+    def test_summary(self):
+        audit_log = self.create(self.get_data(3))
+        pks = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        audit_log.set_results.assert_called_with({'count': 3, 'pks': pks})
+        audit_log.info.assert_called_with('Bulk create of User')
+        audit_log.add_child.assert_not_called()
+
+    def test_single_object(self):
+        audit_log = self.create({'username': 'john'})
+        self.assertEqual(audit_log.set_results.call_args[0][0]['username'], 'john')
+        audit_log.info.assert_called_with('Created User object')
+
+    def test_pk_chunks(self):
+        audit_log = self.create(self.get_data(5), audit_log_bulk_pks_chunk_size=2)
+        pks = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        audit_log.set_results.assert_called_with({'count': 5, 'pk_chunks': 3})
+        self.assertEqual(
+            audit_log.add_child.call_args_list,
+            [
+                mock.call('Bulk create of User, primary keys 1/3', {'pks': pks[:2]}),
+                mock.call('Bulk create of User, primary keys 2/3', {'pks': pks[2:4]}),
+                mock.call('Bulk create of User, primary keys 3/3', {'pks': pks[4:]}),
+            ],
+        )
+
+    def test_objects(self):
+        audit_log = self.create(self.get_data(2), audit_log_bulk_objects=True)
+        self.assertEqual(
+            [(message, results['username']) for (message, results), _ in audit_log.add_child.call_args_list],
+            [('Created User object', 'user0'), ('Created User object', 'user1')],
+        )
+
+    @override_settings(
+        AUDIT_LOG_LOGGER_NAME='test_bulk_batch',
+        AUDIT_LOG_HANDLER_CALLABLE_PATH='tests.rest_framework.test_bulk.BatchHandler',
+    )
+    def test_sent_in_one_batch(self):
+        audit_log = DjangoAuditLogger()
+        self.create(self.get_data(3), audit_log=audit_log, audit_log_bulk_pks_chunk_size=2)
+        audit_log.send_log()
+
+        handler, = audit_log.logger.handlers
+        self.assertEqual(len(handler.batches), 1)
+        records = handler.batches[0]
+        self.assertEqual(
+            [record.getMessage() for record in records],
+            [
+                'Bulk create of User',
+                'Bulk create of User, primary keys 1/2',
+                'Bulk create of User, primary keys 2/2',
+            ],
+        )
+        self.assertEqual(records[0].audit['results'], {'count': 3, 'pk_chunks': 2})
+        self.assertEqual(len(records[2].audit['results']['pks']), 1)
+        self.assertEqual(records[2].audit['message'], 'Bulk create of User, primary keys 2/2')
+
+    @override_settings(
+        AUDIT_LOG_LOGGER_NAME='test_bulk_batch_queued',
+        AUDIT_LOG_HANDLER_CALLABLE_PATH='tests.rest_framework.test_bulk.BatchHandler',
+        AUDIT_LOG_ASYNC_DELIVERY=True,
+        AUDIT_LOG_QUEUE_SIZE=1,
+    )
+    def test_sent_in_one_batch_queued(self):
+        audit_log = DjangoAuditLogger()
+        self.create(self.get_data(3), audit_log=audit_log, audit_log_bulk_pks_chunk_size=2)
+        audit_log.send_log()
+
+        queue_handler, = audit_log.logger.handlers
+        queue_handler.flush()
+        self.assertEqual(queue_handler.get_stats(), {'queued': 0, 'enqueued': 3, 'dropped': 0})
+        batch, = queue_handler.target.batches
+        self.assertEqual(len(batch), 3)
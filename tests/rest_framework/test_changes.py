@@ -0,0 +1,100 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIRequestFactory
+
+from django_audit_log.rest_framework import changes
+from django_audit_log.rest_framework.viewsets import AuditLogViewSet
+
+
+class UserSerializer(ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'is_active')
+
+
+class UserViewSet(AuditLogViewSet):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+    authentication_classes = []
+    permission_classes = []
+    audit_log_results_changes = True
+
+
+class UnchangedUserViewSet(UserViewSet):
+    audit_log_results_changes = False
+
+
+class TestChanges(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='john', email='john@example.com', first_name='John')
+        self.factory = APIRequestFactory()
+
+    def test_snapshot(self):
+        before = changes.snapshot(self.user)
+        self.user.email = 'jane@example.com'
+        self.user.last_login = datetime.datetime(2021, 12, 3, 12, 0)
+        self.assertEqual(
+            changes.get_changes(self.user, before),
+            {'email': ['john@example.com', 'jane@example.com'], 'last_login': [None, '2021-12-03T12:00:00']},
+        )
+
+    def test_deferred_fields(self):
+        user = User.objects.only('id', 'email').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            before = changes.snapshot(user)
+            user.email = 'jane@example.com'
+            self.assertEqual(changes.get_changes(user, before), {'email': ['john@example.com', 'jane@example.com']})
+            self.assertEqual(changes.get_values(user), {'id': user.pk, 'email': 'jane@example.com'})
+
+    def partial_update(self, view_class, data):
+        request = self.factory.patch('/', data, format='json')
+        request.audit_log = mock.Mock()
+        view = view_class.as_view({'patch': 'partial_update'})
+        with CaptureQueriesContext(connection) as context:
+            response = view(request, pk=self.user.pk)
+        self.assertEqual(response.status_code, 200)
+        return request.audit_log, len(context)
+
+    def test_partial_update(self):
+        audit_log, queries = self.partial_update(UserViewSet, {'email': 'jane@example.com', 'first_name': 'John'})
+        audit_log.set_results.assert_called_with({'changes': {'email': ['john@example.com', 'jane@example.com']}})
+        audit_log.info.assert_called_with('Partial update of User')
+
+        # No extra queries
+        _, unchanged_queries = self.partial_update(UnchangedUserViewSet, {'email': 'john@example.com'})
+        self.assertEqual(queries, unchanged_queries)
+
+    def test_nothing_changed(self):
+        audit_log, _ = self.partial_update(UserViewSet, {'first_name': 'John'})
+        audit_log.set_results.assert_called_with({'changes': {}})
+
+    def test_disabled(self):
+        audit_log, _ = self.partial_update(UnchangedUserViewSet, {'email': 'jane@example.com'})
+        results = audit_log.set_results.call_args[0][0]
+        self.assertEqual(results['email'], 'jane@example.com')
+        self.assertEqual(results['username'], 'john')
+
+    def test_destroy(self):
+        request = self.factory.delete('/')
+        request.audit_log = mock.Mock()
+        UserViewSet.as_view({'delete': 'destroy'})(request, pk=self.user.pk)
+
+        results = request.audit_log.set_results.call_args[0][0]
+        self.assertEqual(results['deleted']['id'], self.user.pk)
+        self.assertEqual(results['deleted']['email'], 'john@example.com')
+        self.assertEqual(results['deleted']['date_joined'], self.user.date_joined.isoformat())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_redacted(self):
+        class RedactedUserViewSet(UserViewSet):
+            audit_log_redact_paths = ['results.changes.email']
+
+        audit_log, _ = self.partial_update(RedactedUserViewSet, {'email': 'jane@example.com'})
+        audit_log.set_results.assert_called_with({'changes': {'email': '[redacted]'}})
@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from django_filters.rest_framework import DateFilter, DjangoFilterBackend, FilterSet, NumericRangeFilter
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from django_audit_log.rest_framework.meta import ViewSetMeta, get_viewset_meta
+from django_audit_log.rest_framework.viewsets import AuditLogReadOnlyViewSet, AuditLogViewSet
+
+
+class UserViewSet(AuditLogViewSet):
+    queryset = User.objects.all()
+    filter_backends = [SearchFilter, OrderingFilter, DjangoFilterBackend]
+    search_fields = ['email']
+    ordering_fields = ['email', 'date_joined']
+    filterset_fields = ['is_active', 'username']
+
+
+class UserFilterSet(FilterSet):
+    joined_after = DateFilter(field_name='date_joined', lookup_expr='gte')
+    id = NumericRangeFilter()
+
+    class Meta:
+        model = User
+        fields = ['username']
+
+
+class StaffFilterSet(FilterSet):
+    class Meta:
+        model = User
+        fields = ['is_staff']
+
+
+class FilterSetViewSet(AuditLogViewSet):
+    queryset = User.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = UserFilterSet
+
+
+class RequestFilterBackend(DjangoFilterBackend):
+    def get_filterset_class(self, view, queryset=None):
+        if view.request.query_params.get('staff'):
+            return StaffFilterSet
+        return super().get_filterset_class(view, queryset)
+
+
+class RequestFilterViewSet(FilterSetViewSet):
+    filter_backends = [RequestFilterBackend]
+
+
+class TestViewSetMeta(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get_request(self, path='/'):
+        return Request(self.factory.get(path))
+
+    def test_cached_per_class(self):
+        meta = get_viewset_meta(UserViewSet())
+        self.assertIs(get_viewset_meta(UserViewSet()), meta)
+        self.assertIsNot(get_viewset_meta(AuditLogReadOnlyViewSet()), meta)
+
+    def test_not_cached_for_instance_attributes(self):
+        meta = get_viewset_meta(UserViewSet())
+        view = UserViewSet(search_fields=['username'])
+        self.assertIsNot(get_viewset_meta(view), meta)
+        self.assertEqual(get_viewset_meta(view).search_key, "['username']")
+
+    def test_queryset_once(self):
+        with mock.patch.object(UserViewSet, 'get_queryset', return_value=User.objects.all()) as get_queryset:
+            meta = ViewSetMeta(UserViewSet())
+            view = UserViewSet()
+            for _ in range(3):
+                self.assertEqual(meta.get_model_name(view), 'User')
+                self.assertEqual(meta.get_message(view, 'partial_update'), 'Partial update of User')
+                meta.get_filter_kwargs(view, self.get_request('/?is_active=true'))
+        # Once for the model name, once for the FilterSet
+        self.assertEqual(get_queryset.call_count, 2)
+
+    def test_backends_instantiated_once(self):
+        with mock.patch.object(SearchFilter, '__init__', return_value=None) as init:
+            meta = ViewSetMeta(UserViewSet())
+            meta.get_filter_kwargs(UserViewSet(), self.get_request('/?search=john'))
+            meta.get_filter_kwargs(UserViewSet(), self.get_request('/?search=jane'))
+        init.assert_called_once_with()
+
+    def test_filter_kwargs(self):
+        meta = ViewSetMeta(UserViewSet())
+        request = self.get_request('/?search=john&ordering=-date_joined, email&is_active=true&page=2')
+        self.assertEqual(
+            meta.get_filter_kwargs(UserViewSet(), request),
+            {"['email']": ['john'], 'ordering': ['-date_joined', 'email'], 'is_active': 'true'},
+        )
+
+    def test_filter_kwargs_filterset_class(self):
+        meta = ViewSetMeta(FilterSetViewSet())
+        request = self.get_request('/?joined_after=2020-01-01&id_min=1&id_max=10&username=john&date_joined=x')
+        self.assertEqual(
+            meta.get_filter_kwargs(FilterSetViewSet(), request),
+            {'[]': [], 'joined_after': '2020-01-01', 'id_min': '1', 'id_max': '10', 'username': 'john'},
+        )
+
+    def test_filterset_class_per_request(self):
+        meta = ViewSetMeta(RequestFilterViewSet())
+        for path, expected in (
+            ('/?staff=1&is_staff=true&username=john', {'[]': [], 'is_staff': 'true'}),
+            ('/?is_staff=true&username=john', {'[]': [], 'username': 'john'}),
+        ):
+            view = RequestFilterViewSet()
+            view.request = self.get_request(path)
+            self.assertEqual(meta.get_filter_kwargs(view, view.request), expected)
+
+    def test_filter_kwargs_without_filters(self):
+        meta = ViewSetMeta(UserViewSet())
+        self.assertEqual(meta.get_filter_kwargs(UserViewSet(), self.get_request()), {"['email']": []})
+
+    @mock.patch('rest_framework.mixins.ListModelMixin.list')
+    def test_list(self, mocked_list):
+        mocked_list.return_value = Response(data=[])
+        request = self.get_request('/?ordering=email&username=john')
+
+        with mock.patch('django_audit_log.logger.AuditLogger') as mocked_logger:
+            request.audit_log = mocked_logger
+            UserViewSet().list(request)
+            mocked_logger.set_filter.assert_called_with(
+                object_name='User', kwargs={"['email']": [], 'ordering': ['email'], 'username': 'john'}
+            )
+            mocked_logger.info.assert_called_with('List User')
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from unittest import TestCase
+
+from django_audit_log.rest_framework.results import get_size, limit_results
+
+
+class TestLimitResults(TestCase):
+
+    def setUp(self):
+        self.items = [{'id': i, 'name': 'name%d' % i, 'email': 'user%d@host.com' % i} for i in range(10)]
+
+    def test_no_limits(self):
+        self.assertIs(limit_results(self.items), self.items)
+
+    def test_max_items(self):
+        results = limit_results(self.items, max_items=3)
+        self.assertEqual(results, {'count': 10, 'results': self.items[:3], '_truncated': True})
+        self.assertIs(results['results'][0], self.items[0])
+
+    def test_max_items_not_exceeded(self):
+        self.assertIs(limit_results(self.items, max_items=10), self.items)
+
+    def test_max_bytes(self):
+        max_bytes = get_size(self.items[0]) + get_size(self.items[1])
+        results = limit_results(self.items, max_bytes=max_bytes)
+        self.assertEqual(results['results'], self.items[:2])
+        self.assertTrue(results['_truncated'])
+
+    def test_max_bytes_single_object(self):
+        results = limit_results(self.items[0], max_bytes=len('"id"1"name""name0"'))
+        self.assertEqual(results, {'id': 0, 'name': 'name0', '_truncated': True})
+        self.assertIs(limit_results(self.items[0], max_bytes=1000), self.items[0])
+
+    def test_fields(self):
+        results = limit_results(self.items, fields=['id', 'email', 'unknown'])
+        self.assertEqual(results[0], {'id': 0, 'email': 'user0@host.com'})
+        self.assertEqual(len(self.items[0]), 3, "Response data should not be modified")
+
+    def test_exclude_fields(self):
+        results = limit_results(self.items[0], exclude_fields=['email'])
+        self.assertEqual(results, {'id': 0, 'name': 'name0'})
+
+    def test_summary(self):
+        self.assertEqual(limit_results(self.items[:3], summary=True), {'count': 3, 'pks': [0, 1, 2]})
+        self.assertEqual(limit_results(self.items[0], summary=True, pk_field='name'), {'count': 1, 'pks': ['name0']})
+
+    def test_paginated(self):
+        data = OrderedDict([('count', 100), ('next', 'next_url'), ('previous', None), ('results', self.items)])
+        results = limit_results(data, max_items=2, fields=['id'])
+        self.assertEqual(results['count'], 100)
+        self.assertEqual(results['next'], 'next_url')
+        self.assertEqual(results['results'], [{'id': 0}, {'id': 1}])
+        self.assertTrue(results['_truncated'])
+        self.assertIs(data['results'], self.items)
+
+    def test_paginated_summary(self):
+        data = {'count': 100, 'results': self.items[:2]}
+        self.assertEqual(limit_results(data, summary=True), {'count': 2, 'pks': [0, 1]})
+
+    def test_other_data(self):
+        self.assertEqual(limit_results('test', max_items=1, max_bytes=1, fields=['id']), 'test')
+        self.assertEqual(limit_results(None, max_items=1), None)
@@ -1,7 +1,7 @@
 from unittest import mock
 
 from django.contrib.auth.models import User
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 
 from django_audit_log.rest_framework.viewsets import AuditLogReadOnlyViewSet, AuditLogViewSet
 from rest_framework.filters import OrderingFilter, SearchFilter
@@ -123,6 +123,47 @@ class TestAuditLogReadOnlyViewset(TestCase):
             mocked_logger.info.assert_called_with('List User')
             mocked_logger.set_results.assert_called_with(['test1', 'test2'])
 
+    @mock.patch('rest_framework.mixins.ListModelMixin.list')
+    def test_list_with_limited_results(self, mocked_list):
+        mocked_list.return_value = Response(data=[{'id': 1, 'email': 'a'}, {'id': 2, 'email': 'b'}])
+        view_set = DynamicReadOnlyViewSet(
+            queryset=User.objects.all(),
+            audit_log_list_response=True,
+            audit_log_results_max_items=1,
+            audit_log_results_fields=['id'],
+        )
+        request = self.factory.get('/')
+
+        with mock.patch('django_audit_log.logger.AuditLogger') as mocked_logger:
+            request.audit_log = mocked_logger
+            view_set.list(request)
+            mocked_logger.set_results.assert_called_with({'count': 2, 'results': [{'id': 1}], '_truncated': True})
+
+    @mock.patch('django_audit_log.app_settings.RESULTS_MAX_ITEMS', 1)
+    @mock.patch('rest_framework.mixins.ListModelMixin.list')
+    def test_list_with_results_max_items_setting(self, mocked_list):
+        mocked_list.return_value = Response(data=['test1', 'test2'])
+        view_set = DynamicReadOnlyViewSet(queryset=User.objects.all(), audit_log_list_response=True)
+        request = self.factory.get('/')
+
+        with mock.patch('django_audit_log.logger.AuditLogger') as mocked_logger:
+            request.audit_log = mocked_logger
+            view_set.list(request)
+            mocked_logger.set_results.assert_called_with({'count': 2, 'results': ['test1'], '_truncated': True})
+
+    @mock.patch('rest_framework.mixins.RetrieveModelMixin.retrieve')
+    def test_retrieve_summary(self, mocked_retrieve):
+        mocked_retrieve.return_value = Response(data={'id': 1, 'email': 'a'})
+        view_set = DynamicReadOnlyViewSet(
+            queryset=User.objects.all(), kwargs={'pk': '1'}, lookup_field='pk', audit_log_results_summary=True
+        )
+        request = self.factory.get('/')
+
+        with mock.patch('django_audit_log.logger.AuditLogger') as mocked_logger:
+            request.audit_log = mocked_logger
+            view_set.retrieve(request)
+            mocked_logger.set_results.assert_called_with({'count': 1, 'pks': [1]})
+
     @mock.patch('rest_framework.mixins.ListModelMixin.list')
     def test_list_missing_audit_log(self, mocked_list):
         mocked_list.return_value = Response(data=['test1', 'test2'])
@@ -203,3 +244,53 @@ class TestAuditLogViewSet(TestCase):
         response = view_set.destroy(request)
         self.assertEqual(response.data, None)
         self.assertEqual(response.status_code, 204)
+
+
+class RedactedViewSet(AuditLogViewSet):
+    queryset = User.objects.all()
+    audit_log_redact_paths = ['results.*.password', 'filter.kwargs.email']
+    audit_log_redact_patterns = [r'secret-\w+']
+
+
+class TestRedaction(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    @mock.patch('rest_framework.mixins.ListModelMixin.list')
+    def test_list(self, mocked_list):
+        mocked_list.return_value = Response(data=[{'id': 1, 'password': 'x', 'note': 'key secret-123'}])
+        view_set = RedactedViewSet(audit_log_list_response=True)
+        request = self.factory.get('/')
+
+        with mock.patch('django_audit_log.logger.AuditLogger') as mocked_logger:
+            request.audit_log = mocked_logger
+            view_set.list(request)
+            mocked_logger.set_results.assert_called_with(
+                [{'id': 1, 'password': '[redacted]', 'note': 'key [redacted]'}]
+            )
+
+    @mock.patch('rest_framework.mixins.RetrieveModelMixin.retrieve')
+    def test_retrieve(self, mocked_retrieve):
+        mocked_retrieve.return_value = Response(data={'id': 1, 'password': 'x'})
+        view_set = RedactedViewSet(kwargs={'email': 'john@example.com'}, lookup_field='email')
+        request = self.factory.get('/')
+
+        with mock.patch('django_audit_log.logger.AuditLogger') as mocked_logger:
+            request.audit_log = mocked_logger
+            view_set.retrieve(request)
+            mocked_logger.set_filter.assert_called_with(object_name='User', kwargs={'email': '[redacted]'})
+            mocked_logger.set_results.assert_called_with({'id': 1, 'password': 'x'})
+
+    @mock.patch('rest_framework.mixins.UpdateModelMixin.update')
+    def test_model_paths(self, mocked_update):
+        mocked_update.return_value = Response(data={'id': 1, 'password': 'x', 'email': 'john@example.com'})
+        view_set = DynamicViewSet(queryset=User.objects.all(), kwargs={'pk': '1'}, lookup_field='pk')
+        request = self.factory.get('/')
+
+        with override_settings(AUDIT_LOG_REDACT_MODEL_PATHS={'auth.User': ['results.email']}), mock.patch(
+            'django_audit_log.logger.AuditLogger'
+        ) as mocked_logger:
+            request.audit_log = mocked_logger
+            view_set.update(request)
+            mocked_logger.set_results.assert_called_with({'id': 1, 'password': 'x', 'email': '[redacted]'})
@@ -1,3 +1,7 @@
+import os
+
+import django
+
 SECRET_KEY = 'testing'
 
 ALLOWED_HOSTS = ['localhost']
@@ -10,6 +14,9 @@ INSTALLED_APPS = [
     'rest_framework',
 ]
 
+if django.VERSION >= (3, 1):
+    # JSONField
+    INSTALLED_APPS.append('django_audit_log.db')
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -35,6 +42,17 @@ DATABASES = {
     }
 }
 
+if os.environ.get('POSTGRES_HOST'):
+    # Runs the tests that require PostgreSQL (e.g. partitioning)
+    DATABASES['postgresql'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'audit_log'),
+        'USER': os.environ.get('POSTGRES_USER', 'audit_log'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'insecure'),
+        'HOST': os.environ['POSTGRES_HOST'],
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+    }
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -0,0 +1,216 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django_audit_log.aggregator import LENGTH, AggregatorHandler, LogAggregator
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.registry import LoggerRegistry
+from tests.utils import RecordingHandler, make_record
+
+
+class AggregatorTestCase(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'aggregator.sock')
+        self.target = RecordingHandler()
+
+    def start_aggregator(self):
+        aggregator = LogAggregator(self.path, self.target)
+        threading.Thread(target=aggregator.serve_forever, args=(0.01,), daemon=True).start()
+
+        def stop():
+            aggregator.shutdown()
+            aggregator.server_close()
+
+        self.addCleanup(stop)
+        return aggregator
+
+    def make_handler(self, **kwargs):
+        options = dict(path=self.path, overflow_policy='drop', timeout=1, retry_interval=60)
+        options.update(kwargs)
+        handler = AggregatorHandler(**options)
+        self.addCleanup(handler.close)
+        return handler
+
+    def wait_for_records(self, count):
+        for _ in range(200):
+            if len(self.target.messages) >= count:
+                break
+            time.sleep(0.01)
+        return self.target.messages
+
+
+class TestAggregator(AggregatorTestCase):
+
+    def test_forward(self):
+        self.start_aggregator()
+        handler = self.make_handler()
+        for i in range(3):
+            handler.handle(make_record('log %d' % i))
+
+        self.assertEqual(self.wait_for_records(3), ['log 0', 'log 1', 'log 2'])
+        self.assertEqual(handler.get_stats(), {'sent': 3, 'dropped': 0, 'connected': True})
+
+    def test_multiple_workers(self):
+        self.start_aggregator()
+        handlers = [self.make_handler() for _ in range(3)]
+        for i, handler in enumerate(handlers):
+            handler.handle(make_record('worker %d' % i))
+
+        self.assertEqual(sorted(self.wait_for_records(3)), ['worker 0', 'worker 1', 'worker 2'])
+
+    def test_incomplete_log(self):
+        self.start_aggregator()
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(self.path)
+        connection.sendall(LENGTH.pack(5) + b'first' + LENGTH.pack(10) + b'sec')
+        connection.close()
+
+        self.assertEqual(self.wait_for_records(1), ['first'])
+        time.sleep(0.05)
+        self.assertEqual(self.target.messages, ['first'])
+
+    def test_remove_stale_socket(self):
+        aggregator = LogAggregator(self.path, self.target)
+        aggregator.socket.close()  # stopped without removing the socket file
+        self.assertTrue(os.path.exists(self.path))
+
+        self.start_aggregator()
+        self.make_handler().handle(make_record('log'))
+        self.assertEqual(self.wait_for_records(1), ['log'])
+
+    def test_already_running(self):
+        self.start_aggregator()
+        with self.assertRaises(OSError):
+            LogAggregator(self.path, self.target)
+
+    def test_server_close_removes_socket(self):
+        aggregator = LogAggregator(self.path, self.target)
+        aggregator.server_close()
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestAggregatorHandler(AggregatorTestCase):
+
+    def test_drop_unavailable(self):
+        handler = self.make_handler()
+        with patch('socket.socket', wraps=socket.socket) as mocked_socket:
+            handler.handle(make_record('first'))
+            handler.handle(make_record('second'))
+
+        self.assertEqual(handler.get_stats(), {'sent': 0, 'dropped': 2, 'connected': False})
+        # No reconnect before the retry interval passed
+        self.assertEqual(mocked_socket.call_count, 1)
+
+    def test_drop_reconnect(self):
+        handler = self.make_handler(retry_interval=0)
+        handler.handle(make_record('dropped'))
+
+        self.start_aggregator()
+        handler.handle(make_record('sent'))
+        self.assertEqual(self.wait_for_records(1), ['sent'])
+        self.assertEqual(handler.dropped, 1)
+
+    def test_aggregator_restart(self):
+        aggregator = self.start_aggregator()
+        handler = self.make_handler(overflow_policy='block', retry_interval=0.01)
+        handler.handle(make_record('first'))
+        self.wait_for_records(1)
+
+        aggregator.shutdown()
+        aggregator.server_close()
+        self.start_aggregator()
+        handler.handle(make_record('second'))
+        handler.handle(make_record('third'))
+        # The first send after the restart may still succeed on the old connection
+        self.assertIn('third', self.wait_for_records(2))
+
+    def test_block_timeout(self):
+        handler = self.make_handler(overflow_policy='block', timeout=0.05, retry_interval=0.01)
+        start = time.monotonic()
+        handler.handle(make_record('log'))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(handler.dropped, 1)
+
+    def test_block_until_available(self):
+        handler = self.make_handler(overflow_policy='block', timeout=5, retry_interval=0.01)
+        threading.Timer(0.05, self.start_aggregator).start()
+        handler.handle(make_record('log'))
+
+        self.assertEqual(handler.sent, 1)
+        self.assertEqual(self.wait_for_records(1), ['log'])
+
+    def test_fork(self):
+        self.start_aggregator()
+        handler = self.make_handler()
+        handler.handle(make_record('parent'))
+        connection = handler._socket
+
+        with patch('os.getpid', return_value=-1):
+            handler.handle(make_record('child'))
+        self.assertIsNot(handler._socket, connection)
+
+    def test_settings(self):
+        with patch('django_audit_log.app_settings.AGGREGATOR_SOCKET', self.path), patch(
+            'django_audit_log.app_settings.AGGREGATOR_OVERFLOW_POLICY', 'block'
+        ), patch('django_audit_log.app_settings.AGGREGATOR_TIMEOUT', 3):
+            handler = AggregatorHandler()
+
+        self.assertEqual(handler.path, self.path)
+        self.assertEqual(handler.overflow_policy, 'block')
+        self.assertEqual(handler.timeout, 3)
+
+    def test_invalid(self):
+        with patch('django_audit_log.app_settings.AGGREGATOR_SOCKET', None):
+            with self.assertRaises(ValueError):
+                AggregatorHandler()
+        with self.assertRaises(ValueError):
+            AggregatorHandler(self.path, overflow_policy='sample')
+
+    @patch('django_audit_log.app_settings.LOGGER_NAME', 'test_aggregator_registry')
+    def test_registry(self):
+        registry = LoggerRegistry()
+        self.addCleanup(registry.reset)
+        with patch('django_audit_log.app_settings.AGGREGATOR_SOCKET', self.path):
+            with patch.object(DjangoAuditLogger, 'init_logger'):
+                audit_log = DjangoAuditLogger()
+            logger = registry.get_logger(audit_log)
+
+        handler, = [handler for handler in logger.handlers if isinstance(handler, AggregatorHandler)]
+        self.assertEqual(handler.path, self.path)
+
+
+class TestRunAggregatorCommand(AggregatorTestCase):
+
+    def test_command(self):
+        with patch(
+            'django_audit_log.management.commands.run_audit_log_aggregator.get_forward_handler',
+            return_value=self.target,
+        ), patch.object(LogAggregator, 'serve_forever', side_effect=KeyboardInterrupt), patch(
+            'signal.signal'
+        ) as mocked_signal:
+            call_command('run_audit_log_aggregator', '--socket', self.path)
+
+        self.assertTrue(mocked_signal.called)
+        # Stopped and cleaned up
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_command_requires_socket(self):
+        with patch('django_audit_log.app_settings.AGGREGATOR_SOCKET', None):
+            with self.assertRaises(CommandError):
+                call_command('run_audit_log_aggregator')
+
+    def test_command_already_running(self):
+        self.start_aggregator()
+        with self.assertRaises(CommandError):
+            call_command('run_audit_log_aggregator', '--socket', self.path)
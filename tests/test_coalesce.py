@@ -0,0 +1,150 @@
+import logging
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_audit_log import coalesce, delivery
+from django_audit_log.coalesce import AuditLogCoalescer
+from django_audit_log.middleware import AuditLogMiddleware
+from tests.utils import RecordingHandler, make_record
+
+
+class TestAuditLogCoalescer(TestCase):
+
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.logger = logging.getLogger('test_coalesce')
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+        self.coalescer = AuditLogCoalescer(window=60, max_keys=2)
+
+    def tearDown(self):
+        self.coalescer.close()
+        self.logger.removeHandler(self.handler)
+
+    def test_coalesced(self):
+        for created in (1000.0, 1010.0, 1020.5):
+            self.coalescer.add(self.logger, 'key', make_record(created=created, audit={}))
+        self.assertEqual(self.handler.records, [])
+
+        self.coalescer.flush()
+        record, = self.handler.records
+        self.assertEqual(record.created, 1000.0)
+        self.assertEqual(
+            record.audit['coalesced'],
+            {'count': 3, 'first': '1970-01-01T00:16:40+00:00', 'last': '1970-01-01T00:17:00.500000+00:00'},
+        )
+
+    def test_not_repeated(self):
+        self.coalescer.add(self.logger, 'key', make_record(created=1000.0, audit={}))
+        self.coalescer.add(self.logger, 'other key', make_record(created=1000.0, audit={}))
+        self.coalescer.flush()
+        self.assertEqual(len(self.handler.records), 2)
+        self.assertNotIn('coalesced', self.handler.records[0].audit)
+
+    def test_window_ended(self):
+        self.coalescer.add(self.logger, 'key', make_record('first', created=1000.0, audit={}))
+        self.coalescer.add(self.logger, 'key', make_record('second', created=1060.0, audit={}))
+        self.assertEqual([record.msg for record in self.handler.records], ['first'])
+
+    def test_flush_ended_windows(self):
+        self.coalescer.add(self.logger, 'key', make_record('first', created=1000.0, audit={}))
+        self.coalescer.add(self.logger, 'other key', make_record('second', created=1030.0, audit={}))
+        self.coalescer.flush(now=1070.0)
+        self.assertEqual([record.msg for record in self.handler.records], ['first'])
+
+    def test_least_recently_used_key_sent(self):
+        self.coalescer.add(self.logger, 'first', make_record('first', created=1000.0, audit={}))
+        self.coalescer.add(self.logger, 'second', make_record('second', created=1000.0, audit={}))
+        self.coalescer.add(self.logger, 'first', make_record('first', created=1001.0, audit={}))
+        self.coalescer.add(self.logger, 'third', make_record('third', created=1002.0, audit={}))
+        self.assertEqual([record.msg for record in self.handler.records], ['second'])
+
+    def test_timer(self):
+        coalescer = AuditLogCoalescer(window=0.05)
+        coalescer.add(self.logger, 'key', make_record(created=time.time(), audit={}))
+        for _ in range(200):
+            if self.handler.records:
+                break
+            time.sleep(0.01)
+        coalescer.close()
+        self.assertEqual(len(self.handler.records), 1)
+
+
+@override_settings(
+    ROOT_URLCONF='tests.urls',
+    AUDIT_LOG_HANDLER_CALLABLE_PATH='tests.utils.RecordingHandler',
+    AUDIT_LOG_COALESCE_WINDOW=60,
+)
+class TestMiddlewareCoalescing(TestCase):
+
+    def setUp(self):
+        self.request_factory = RequestFactory()
+        # A logger per test, the pytest log capture handlers stay attached to used loggers
+        self.logger_name = 'test_coalesce_%s' % self._testMethodName
+        settings = self.settings(AUDIT_LOG_LOGGER_NAME=self.logger_name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def request(self, method='get', path='/users/1/', status=200):
+        middleware = AuditLogMiddleware(lambda request: HttpResponse(status=status))
+        request = getattr(self.request_factory, method)(path)
+        request.user = AnonymousUser()
+        request.session = {}
+        middleware(request)
+        return request.audit_log
+
+    def get_records(self):
+        coalesce.get_coalescer().flush()
+        return logging.getLogger(self.logger_name).handlers[0].records
+
+    def test_reads_coalesced(self):
+        for _ in range(3):
+            self.request()
+        self.request(path='/health/')
+
+        records = self.get_records()
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].audit['coalesced']['count'], 3)
+        self.assertNotIn('coalesced', records[1].audit)
+
+    def test_detail_routes(self):
+        self.request(path='/users/1/')
+        self.request(path='/users/2/')
+        self.request(path='/users/2/?format=json')
+        self.assertEqual(len(self.get_records()), 3)
+
+    def test_unresolved_paths(self):
+        self.request(path='/missing/1/', status=404)
+        self.request(path='/missing/2/', status=404)
+        self.assertEqual(
+            [record.audit['http_request']['url'] for record in self.get_records()],
+            ['http://testserver/missing/1/', 'http://testserver/missing/2/'],
+        )
+
+    @override_settings(AUDIT_LOG_ASYNC_DELIVERY=True)
+    def test_sent_on_shutdown(self):
+        self.request()
+        self.request()
+        delivery.shutdown()
+
+        queue_handler = logging.getLogger(self.logger_name).handlers[0]
+        record, = queue_handler.target.records
+        self.assertEqual(record.audit['coalesced']['count'], 2)
+
+    def test_different_status(self):
+        self.request()
+        self.request(status=404)
+        self.assertEqual(len(self.get_records()), 2)
+
+    def test_writes_not_coalesced(self):
+        audit_log = self.request(method='post')
+        self.assertFalse(audit_log.coalescing)
+        self.assertEqual(len(self.get_records()), 1)
+
+    @override_settings(AUDIT_LOG_COALESCE_WINDOW=None)
+    def test_disabled(self):
+        self.assertFalse(self.request().coalescing)
+        self.assertIsNone(coalesce.get_coalescer())
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import threading
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from django_audit_log import delivery
+from django_audit_log.delivery import AuditLogLifespan, AuditLogQueueHandler, get_delivery_stats
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.registry import logger_registry
+from tests.utils import RecordingHandler, make_record
+
+
+class TestAuditLogQueueHandler(TestCase):
+
+    def test_emit_in_worker_thread(self):
+        target = RecordingHandler()
+        handler = AuditLogQueueHandler(target)
+        handler.handle(make_record('first'))
+        handler.handle(make_record('second'))
+        handler.close()
+
+        self.assertEqual(target.messages, ['first', 'second'])
+        self.assertNotIn(threading.current_thread(), target.threads)
+        self.assertEqual(handler.get_stats(), {'queued': 0, 'enqueued': 2, 'dropped': 0})
+
+    def test_record_is_not_formatted_on_enqueue(self):
+        block = threading.Event()
+        handler = AuditLogQueueHandler(RecordingHandler(block=block))
+        with patch.object(logging.Formatter, 'format') as mocked_format:
+            handler.handle(make_record())
+            mocked_format.assert_not_called()
+        block.set()
+        handler.close()
+
+    def test_flush(self):
+        target = RecordingHandler()
+        handler = AuditLogQueueHandler(target)
+        handler.handle(make_record())
+        handler.flush()
+        self.assertEqual(target.messages, ['test'])
+        handler.close()
+
+    def test_overflow_drop(self):
+        block = threading.Event()
+        target = RecordingHandler(block=block)
+        handler = AuditLogQueueHandler(target, maxsize=1)
+        for _ in range(5):
+            handler.handle(make_record())
+        self.assertGreaterEqual(handler.dropped, 3)
+        block.set()
+        handler.close()
+        self.assertEqual(len(target.messages) + handler.dropped, 5)
+
+    def test_overflow_block(self):
+        block = threading.Event()
+        target = RecordingHandler(block=block)
+        handler = AuditLogQueueHandler(target, maxsize=1, overflow_policy='block', block_timeout=0.01)
+        for _ in range(4):
+            handler.handle(make_record())
+        self.assertGreaterEqual(handler.dropped, 2)
+        block.set()
+        handler.close()
+        self.assertEqual(len(target.messages) + handler.dropped, 4)
+
+    @patch('django_audit_log.delivery.random.random')
+    def test_overflow_sample(self, mocked_random):
+        mocked_random.side_effect = [0.05, 0.5]
+        block = threading.Event()
+        target = RecordingHandler(block=block)
+        handler = AuditLogQueueHandler(
+            target, maxsize=10, overflow_policy='sample', sample_threshold=0, sample_rate=0.1
+        )
+        handler.handle(make_record('sampled in'))
+        handler.handle(make_record('sampled out'))
+        block.set()
+        handler.close()
+        self.assertEqual(target.messages, ['sampled in'])
+        self.assertEqual(handler.dropped, 1)
+
+    def test_handle_batch(self):
+        target = RecordingHandler()
+        target.handle_batch = Mock()
+        handler = AuditLogQueueHandler(target)
+        handler.handle_batch([make_record('first'), make_record('second')])
+        handler.close()
+
+        batch, = target.handle_batch.call_args[0]
+        self.assertEqual([record.msg for record in batch], ['first', 'second'])
+        self.assertEqual(handler.get_stats(), {'queued': 0, 'enqueued': 2, 'dropped': 0})
+
+    def test_handle_batch_emitted_together(self):
+        target = RecordingHandler()
+        handler = AuditLogQueueHandler(target)
+        handler.handle_batch([make_record('first'), make_record('second')])
+        handler.close()
+        self.assertEqual(target.messages, ['first', 'second'])
+
+    def test_handle_batch_overflow(self):
+        block = threading.Event()
+        target = RecordingHandler(block=block)
+        handler = AuditLogQueueHandler(target, maxsize=1)
+        for _ in range(3):
+            handler.handle_batch([make_record('first'), make_record('second')])
+        block.set()
+        handler.close()
+        # Whole batches are dropped
+        self.assertEqual(len(target.messages) % 2, 0)
+        self.assertEqual(len(target.messages) + handler.dropped, 6)
+
+    def test_shutdown(self):
+        target = RecordingHandler()
+        handler = AuditLogQueueHandler(target)
+        handler.handle(make_record())
+        self.assertIn(handler, delivery._queue_handlers)
+        delivery.shutdown()
+        self.assertEqual(target.messages, ['test'])
+        self.assertNotIn(handler, delivery._queue_handlers)
+
+    def test_get_delivery_stats(self):
+        handler = AuditLogQueueHandler(RecordingHandler())
+        handler.handle(make_record())
+        handler.flush()
+        self.assertGreaterEqual(get_delivery_stats()['enqueued'], 1)
+        handler.close()
+
+
+@override_settings(
+    AUDIT_LOG_ASYNC_DELIVERY=True,
+    AUDIT_LOG_LOGGER_NAME='test_delivery',
+    AUDIT_LOG_HANDLER_CALLABLE_PATH='tests.utils.RecordingHandler',
+    AUDIT_LOG_QUEUE_SIZE=5,
+)
+class TestAsyncDelivery(TestCase):
+
+    def test_send_log(self):
+        audit_log = DjangoAuditLogger()
+        queue_handler = audit_log.logger.handlers[-1]
+        self.assertIsInstance(queue_handler, AuditLogQueueHandler)
+        self.assertEqual(queue_handler.queue.maxsize, 5)
+
+        audit_log.info('test message').send_log()
+        logger_registry.reset()
+
+        self.assertEqual(len(queue_handler.target.messages), 1)
+        self.assertIn('"message": "test message"', queue_handler.target.messages[0])
+
+
+class TestAuditLogLifespan(TestCase):
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        with patch('django_audit_log.delivery.shutdown') as mocked_shutdown:
+            asyncio.run(AuditLogLifespan(app=None)({'type': 'lifespan'}, receive, send))
+            mocked_shutdown.assert_called_once_with()
+
+        self.assertEqual(sent, [{'type': 'lifespan.startup.complete'}, {'type': 'lifespan.shutdown.complete'}])
+
+    def test_passthrough(self):
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope)
+
+        asyncio.run(AuditLogLifespan(app)({'type': 'http'}, None, None))
+        self.assertEqual(calls, [{'type': 'http'}])
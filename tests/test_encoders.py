@@ -0,0 +1,135 @@
+import datetime
+import decimal
+import json
+import logging
+import uuid
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from audit_log.formatter import AuditLogFormatter
+from django.utils.functional import lazy
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from django_audit_log.encoders import ENCODERS, JSONEncoder, get_encoder
+from django_audit_log.formatter import AuditLogJSONFormatter
+
+
+def is_installed(encoder_class):
+    try:
+        encoder_class()
+    except ImportError:
+        return False
+    return True
+
+
+AVAILABLE_ENCODERS = [encoder_class.name for encoder_class in ENCODERS if is_installed(encoder_class)]
+
+lazy_str = lazy(lambda: 'lazy', str)
+
+
+class MissingEncoder(JSONEncoder):
+    name = 'missing'
+
+    def __init__(self):
+        raise ImportError("No module named 'missing'")
+
+
+class TestEncoders(TestCase):
+
+    def test_django_types(self):
+        value = {
+            'decimal': decimal.Decimal('1.10'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'datetime': datetime.datetime(2020, 1, 2, 3, 4, 5),
+            'date': datetime.date(2020, 1, 2),
+            'time': datetime.time(3, 4, 5),
+            'timedelta': datetime.timedelta(days=1, seconds=1),
+            'lazy': lazy_str(),
+            'set': {1},
+            'return_dict': ReturnDict({'key': 'value'}, serializer=None),
+            'return_list': ReturnList([1, 2], serializer=None),
+        }
+        expected = {
+            'decimal': '1.10',
+            'uuid': '12345678-1234-5678-1234-567812345678',
+            'datetime': '2020-01-02T03:04:05',
+            'date': '2020-01-02',
+            'time': '03:04:05',
+            'timedelta': 'P1DT00H00M01S',
+            'lazy': 'lazy',
+            'set': [1],
+            'return_dict': {'key': 'value'},
+            'return_list': [1, 2],
+        }
+        # Types the backends encode natively, in their own way
+        native = {
+            'msgspec': {'timedelta': 'P1DT1S'},
+        }
+        for name in AVAILABLE_ENCODERS:
+            with self.subTest(encoder=name):
+                encoder = get_encoder(name)
+                expected_encoded = dict(expected, **native.get(name, {}))
+                self.assertEqual(json.loads(encoder.dumps(value)), expected_encoded)
+                self.assertEqual(json.loads(encoder.encode(value)), expected_encoded)
+
+    def test_decimal_precision(self):
+        value = {
+            'price': decimal.Decimal('0.1000000000000000055511151231257827'),
+            'nested': [{'price': decimal.Decimal('1E+2')}, (decimal.Decimal('2.50'),)],
+        }
+        expected = {'price': '0.1000000000000000055511151231257827', 'nested': [{'price': '1E+2'}, ['2.50']]}
+        for name in AVAILABLE_ENCODERS:
+            with self.subTest(encoder=name):
+                self.assertEqual(json.loads(get_encoder(name).dumps(value)), expected)
+
+    def test_unsupported_type(self):
+        for name in AVAILABLE_ENCODERS:
+            with self.subTest(encoder=name):
+                with self.assertRaises(TypeError):
+                    get_encoder(name).dumps({'object': object()})
+
+    def test_get_encoder_preference(self):
+        self.assertEqual(get_encoder().name, AVAILABLE_ENCODERS[0])
+        self.assertIs(get_encoder(), get_encoder())
+
+    @patch('django_audit_log.app_settings.JSON_ENCODER', 'json')
+    def test_get_encoder_setting(self):
+        self.assertIsInstance(get_encoder(), JSONEncoder)
+        self.assertEqual(get_encoder().name, 'json')
+
+    def test_get_encoder_unknown(self):
+        with self.assertRaises(ValueError):
+            get_encoder('unknown')
+
+    @patch('django_audit_log.encoders._encoders', {})
+    @patch('django_audit_log.encoders.ENCODERS', [MissingEncoder, JSONEncoder])
+    def test_get_encoder_fallback(self):
+        self.assertEqual(get_encoder().name, 'json')
+        with self.assertRaises(ImportError):
+            get_encoder('missing')
+
+
+class TestAuditLogJSONFormatter(TestCase):
+
+    def make_record(self, **extra):
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, 'message', None, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_same_output_as_audit_log_formatter(self):
+        record = self.make_record(audit={'http_request': {'method': 'GET'}, 'results': [1, 'é'], 'type': 'INFO'})
+        expected = json.loads(AuditLogFormatter().format(record))
+        for name in AVAILABLE_ENCODERS:
+            with self.subTest(encoder=name):
+                self.assertEqual(json.loads(AuditLogJSONFormatter(encoder=name).format(record)), expected)
+
+    def test_missing_audit(self):
+        formatted = AuditLogJSONFormatter().format(self.make_record())
+        self.assertEqual(json.loads(formatted), {'audit': {'message': 'LogRecord misses audit attribute'}})
+
+    @skipUnless('orjson' in AVAILABLE_ENCODERS, 'orjson is not installed')
+    def test_django_types(self):
+        formatted = AuditLogJSONFormatter(encoder='orjson').format(
+            self.make_record(audit={'results': {'price': decimal.Decimal('9.99')}})
+        )
+        self.assertEqual(json.loads(formatted), {'audit': {'results': {'price': '9.99'}}})
@@ -0,0 +1,86 @@
+import re
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_audit_log.exempt import ExemptUrlMatcher
+
+
+class TestExemptUrlMatcher(TestCase):
+
+    def setUp(self):
+        self.request_factory = RequestFactory()
+
+    def assertExempt(self, matcher, path, exempt=True):
+        self.assertEqual(matcher.is_exempt(self.request_factory.get(path)), exempt, path)
+
+    def test_literal_patterns(self):
+        matcher = ExemptUrlMatcher([r'^health/', r'^foo/bar$', r'metrics$'])
+        self.assertEqual(matcher.prefixes, ('health/',))
+        self.assertEqual(matcher.exact, {'foo/bar'})
+        self.assertEqual(matcher.suffixes, ('metrics',))
+        self.assertEqual(matcher.regex, [])
+
+        self.assertExempt(matcher, '/health/')
+        self.assertExempt(matcher, '/health/db')
+        self.assertExempt(matcher, '/foo/bar')
+        self.assertExempt(matcher, '/foo/bar2', exempt=False)
+        self.assertExempt(matcher, '/api/metrics')
+        self.assertExempt(matcher, '/api/metrics/', exempt=False)
+        self.assertExempt(matcher, '/foo/health/', exempt=False)
+
+    def test_regex_patterns(self):
+        matcher = ExemptUrlMatcher([r'^static/.*\.css$', r'probe', r'^users/\d+/$'])
+        self.assertEqual(len(matcher.regex), 1)
+
+        self.assertExempt(matcher, '/static/css/main.css')
+        self.assertExempt(matcher, '/static/js/main.js', exempt=False)
+        self.assertExempt(matcher, '/k8s/probe/live')
+        self.assertExempt(matcher, '/users/1/')
+        self.assertExempt(matcher, '/users/me/', exempt=False)
+
+    def test_uncombinable_patterns(self):
+        matcher = ExemptUrlMatcher([r'^(?P<part>a)/$', r'^(?P<part>b)/$'])
+        self.assertEqual(len(matcher.regex), 2)
+        self.assertExempt(matcher, '/a/')
+        self.assertExempt(matcher, '/b/')
+        self.assertExempt(matcher, '/c/', exempt=False)
+
+    def test_numbered_backreferences(self):
+        patterns = [r'^(x)/', r'^(a)\1/$', r'^(b)?(?(1)c|d)/$', r'^\\1/$']
+        matcher = ExemptUrlMatcher(patterns)
+        # The patterns with a group reference are matched one by one
+        self.assertEqual(len(matcher.regex), 3)
+        for path, exempt in (('/aa/', True), ('/ax/', False), ('/bc/', True), ('/d/', True), ('/bd/', False)):
+            self.assertExempt(matcher, path, exempt=exempt)
+
+    def test_inline_flags(self):
+        matcher = ExemptUrlMatcher([r'(?i)^admin/', r'^API/'])
+        self.assertExempt(matcher, '/ADMIN/')
+        self.assertExempt(matcher, '/API/')
+        self.assertExempt(matcher, '/api/', exempt=False)
+
+    def test_same_decisions_as_search(self):
+        patterns = [r'foo/bar$', r'^health', r'^a.c/$', r'x|y']
+        matcher = ExemptUrlMatcher(patterns)
+        for path in ('/foo/bar', '/health/', '/abc/', '/a.c/', '/x', '/nothing/'):
+            expected = any(re.search(pattern, path.lstrip('/')) for pattern in patterns)
+            self.assertExempt(matcher, path, exempt=expected)
+
+    def test_cache(self):
+        matcher = ExemptUrlMatcher([r'^health/'])
+        for _ in range(3):
+            self.assertExempt(matcher, '/health/')
+        info = matcher._is_exempt_path.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 1))
+
+    def test_no_patterns(self):
+        matcher = ExemptUrlMatcher()
+        self.assertExempt(matcher, '/foo/', exempt=False)
+        self.assertEqual(matcher._is_exempt_path.cache_info().misses, 0)
+
+    @override_settings(ROOT_URLCONF='tests.urls')
+    def test_url_names(self):
+        matcher = ExemptUrlMatcher(url_names=['health'])
+        self.assertExempt(matcher, '/health/')
+        self.assertExempt(matcher, '/users/1/', exempt=False)
+        self.assertExempt(matcher, '/unknown/', exempt=False)
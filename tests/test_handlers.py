@@ -0,0 +1,259 @@
+import gzip
+import logging
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from django_audit_log import metrics
+from django_audit_log.handlers import (
+    BatchingHandler,
+    BatchingHTTPHandler,
+    get_forward_handler,
+    handle_batch,
+    make_formatted_record
+)
+from tests.utils import make_record
+
+
+class StubCollector(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+
+        server = self.server
+        server.connections.add(self.client_address)
+        server.requests += 1
+        if server.failures:
+            server.failures -= 1
+            self.send_response(server.failure_status)
+        else:
+            server.batches.append(body.decode().splitlines())
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestBatchingHTTPHandler(TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubCollector)
+        self.server.batches = []
+        self.server.connections = set()
+        self.server.failures = 0
+        self.server.failure_status = 503
+        self.server.requests = 0
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+        self.url = 'http://127.0.0.1:%d/logs' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_handler(self, **kwargs):
+        options = dict(url=self.url, batch_size=2, flush_interval=60, backoff=0)
+        options.update(kwargs)
+        handler = BatchingHTTPHandler(**options)
+        self.addCleanup(handler.close)
+        return handler
+
+    def emit(self, handler, *messages):
+        for message in messages:
+            handler.handle(logging.LogRecord('test', logging.INFO, __file__, 1, message, None, None))
+
+    def test_batch(self):
+        handler = self.make_handler()
+        self.emit(handler, 'log1', 'log2', 'log3', 'log4', 'log5')
+        handler.close()
+        self.assertEqual(self.server.batches, [['log1', 'log2'], ['log3', 'log4'], ['log5']])
+
+    def test_handle_batch(self):
+        handler = self.make_handler()
+        handler.handle_batch([make_record(message) for message in ('log1', 'log2', 'log3')])
+        handler.close()
+        self.assertEqual(self.server.batches, [['log1', 'log2'], ['log3']])
+
+    def test_size_triggered(self):
+        handler = self.make_handler()
+        with patch.object(handler, '_ship', wraps=handler._ship) as mocked_ship:
+            self.emit(handler, 'log1', 'log2')
+            self.assertTrue(wait_for(lambda: mocked_ship.call_count == 1))
+        self.assertTrue(wait_for(lambda: self.server.batches == [['log1', 'log2']]))
+
+    def test_time_triggered(self):
+        handler = self.make_handler(batch_size=100, flush_interval=0.01)
+        self.emit(handler, 'log1')
+        self.assertTrue(wait_for(lambda: self.server.batches == [['log1']]))
+
+    def test_connection_reuse(self):
+        handler = self.make_handler()
+        for i in range(3):
+            self.emit(handler, 'log%d' % i)
+            handler.flush()
+        self.assertEqual(len(self.server.batches), 3)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_without_gzip(self):
+        handler = self.make_handler(use_gzip=False)
+        self.emit(handler, 'log1')
+        handler.flush()
+        self.assertEqual(self.server.batches, [['log1']])
+
+    def test_retry(self):
+        self.server.failures = 2
+        handler = self.make_handler(max_retries=2)
+        self.emit(handler, 'log1')
+        handler.flush()
+        self.assertEqual(self.server.batches, [['log1']])
+
+    @patch('logging.Logger.error')
+    def test_client_error_not_retried(self, mocked_error):
+        spill_path = os.path.join(tempfile.mkdtemp(), 'spill.ndjson')
+        for status in (400, 429):
+            self.server.failures = 1
+            self.server.failure_status = status
+            self.server.requests = 0
+            handler = self.make_handler(max_retries=2, spill_path=spill_path)
+            self.emit(handler, 'log1')
+            with patch('django_audit_log.metrics.count') as mocked_count:
+                handler.flush()
+            self.assertEqual(self.server.requests, 1)
+            mocked_error.assert_called_with("Audit log endpoint rejected %s: %d", '/logs', status)
+            mocked_count.assert_called_once_with(metrics.FAILED, 1)
+        self.assertFalse(os.path.exists(spill_path))
+
+    @patch('django_audit_log.handlers.time.sleep')
+    def test_backoff(self, mocked_sleep):
+        self.server.failures = 3
+        handler = self.make_handler(max_retries=3, backoff=0.5)
+        self.emit(handler, 'log1')
+        handler.flush()
+        self.assertEqual([c[0][0] for c in mocked_sleep.call_args_list], [0.5, 1.0, 2.0])
+
+    def test_spill_and_resend(self):
+        spill_path = os.path.join(tempfile.mkdtemp(), 'spill.ndjson')
+        self.server.failures = 2
+        handler = self.make_handler(max_retries=0, spill_path=spill_path)
+
+        self.emit(handler, 'log1', 'log2')
+        handler.flush()
+        self.emit(handler, 'log3')
+        handler.flush()
+        with open(spill_path) as spill_file:
+            self.assertEqual(spill_file.read(), 'log1\nlog2\nlog3\n')
+
+        self.emit(handler, 'log4')
+        handler.flush()
+        self.assertEqual(self.server.batches, [['log4'], ['log1', 'log2'], ['log3']])
+        self.assertFalse(os.path.exists(spill_path))
+
+    def test_spill_resend_fails(self):
+        spill_path = os.path.join(tempfile.mkdtemp(), 'spill.ndjson')
+        with open(spill_path, 'w') as spill_file:
+            spill_file.write('log1\nlog2\nlog3\n')
+        handler = self.make_handler(max_retries=0, spill_path=spill_path)
+
+        self.server.failures = 1
+        handler._send_spilled()
+        self.assertEqual(self.server.batches, [])
+        with open(spill_path) as spill_file:
+            self.assertEqual(spill_file.read(), 'log1\nlog2\nlog3\n')
+
+    @patch('logging.Logger.error')
+    def test_endpoint_unavailable_without_spill(self, mocked_error):
+        handler = self.make_handler(url='http://127.0.0.1:1/logs', max_retries=0)
+        self.emit(handler, 'log1')
+        handler.flush()
+        mocked_error.assert_called_with("Dropped %d audit logs, endpoint unavailable", 1)
+
+    def test_url_required(self):
+        with self.assertRaises(ValueError):
+            BatchingHTTPHandler()
+
+    def test_ship_is_abstract(self):
+        with self.assertRaises(TypeError):
+            BatchingHandler(batch_size=2, flush_interval=60)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = []
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        super().acquire()
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestHandleBatch(TestCase):
+
+    def test_handle_batch(self):
+        logger = logging.getLogger('test_handle_batch')
+        logger.propagate = False
+        handler, error_handler = ListHandler(), ListHandler(logging.ERROR)
+        logger.addHandler(handler)
+        logger.addHandler(error_handler)
+        self.addCleanup(logger.removeHandler, handler)
+        self.addCleanup(logger.removeHandler, error_handler)
+
+        records = [make_record('log1'), make_record('log2', logging.ERROR)]
+        handle_batch(logger, records)
+        self.assertEqual(handler.records, records)
+        self.assertEqual(handler.acquired, 1)
+        self.assertEqual(error_handler.records, records[1:])
+
+    def test_handle_batch_method(self):
+        logger = logging.getLogger('test_handle_batch_method')
+        logger.propagate = False
+        handler = logging.Handler()
+        handler.handle_batch = Mock()
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        records = [make_record('log1'), make_record('log2')]
+        handle_batch(logger, records)
+        handler.handle_batch.assert_called_once_with(records)
+
+
+class TestForwardHandler(TestCase):
+
+    def test_get_forward_handler(self):
+        with patch('django_audit_log.app_settings.LOG_HANDLER_CALLABLE_PATH', 'logging.NullHandler'):
+            handler = get_forward_handler()
+        self.assertIsInstance(handler, logging.NullHandler)
+
+        # Passes the formatted logs through
+        record = make_formatted_record('{"audit": "%s"}')
+        self.assertEqual(handler.format(record), '{"audit": "%s"}')
+
+    def test_get_forward_handler_default(self):
+        handler = get_forward_handler()
+        self.assertIsInstance(handler, logging.StreamHandler)
+
+    @patch('django_audit_log.app_settings.LOGGER_NAME', 'forwarded')
+    def test_make_formatted_record(self):
+        record = make_formatted_record('log')
+        self.assertEqual(record.name, 'forwarded')
+        self.assertEqual(record.levelno, logging.INFO)
+        self.assertEqual(record.getMessage(), 'log')
+
+
+def wait_for(condition, timeout=5.0):
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        event.wait(0.01)
+    return condition()
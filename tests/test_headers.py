@@ -0,0 +1,70 @@
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+
+from django_audit_log.headers import REDACTED, ResponseHeaderCapture, get_response_header_capture
+from django_audit_log.logger import DjangoAuditLogger
+
+
+def make_response():
+    response = HttpResponse(content_type='application/json')
+    response['Content-Security-Policy'] = "default-src 'self'"
+    response['Link'] = '<https://localhost/page/2>; rel="next"'
+    response['X-Request-Id'] = '42'
+    return response
+
+
+class TestResponseHeaderCapture(TestCase):
+
+    def test_all(self):
+        headers = ResponseHeaderCapture().capture(make_response())
+        self.assertEqual(headers['Link'], '<https://localhost/page/2>; rel="next"')
+        self.assertEqual(headers['Content-Type'], 'application/json')
+
+    def test_include(self):
+        capture = ResponseHeaderCapture(include=['content-type', 'X-Request-Id', 'Location'])
+        self.assertEqual(capture.capture(make_response()), {'content-type': 'application/json', 'X-Request-Id': '42'})
+
+    def test_exclude(self):
+        capture = ResponseHeaderCapture(exclude=['content-security-policy', 'LINK'])
+        headers = capture.capture(make_response())
+        self.assertNotIn('Content-Security-Policy', headers)
+        self.assertNotIn('Link', headers)
+        self.assertEqual(headers['X-Request-Id'], '42')
+
+    def test_redact(self):
+        response = make_response()
+        response['Set-Cookie'] = 'sessionid=secret'
+        capture = ResponseHeaderCapture(redact=['set-cookie', 'x-request-id'])
+        headers = capture.capture(response)
+        self.assertEqual(headers['Set-Cookie'], REDACTED)
+        self.assertEqual(headers['X-Request-Id'], REDACTED)
+        self.assertEqual(headers['Content-Type'], 'application/json')
+
+        capture = ResponseHeaderCapture(include=['X-Request-Id'], redact=['X-REQUEST-ID'])
+        self.assertEqual(capture.capture(response), {'X-Request-Id': REDACTED})
+
+    @override_settings(
+        AUDIT_LOG_RESPONSE_HEADERS=['Content-Type'],
+        AUDIT_LOG_RESPONSE_HEADERS_EXCLUDE=['Link'],
+        AUDIT_LOG_RESPONSE_HEADERS_REDACT=['Content-Type'],
+    )
+    def test_settings(self):
+        capture = get_response_header_capture()
+        self.assertEqual(capture.include, ('Content-Type',))
+        self.assertEqual(capture.exclude, {'link'})
+        self.assertEqual(capture.redact, {'content-type'})
+        # Created once
+        self.assertIs(get_response_header_capture(), capture)
+
+    def test_settings_changed(self):
+        capture = get_response_header_capture()
+        with override_settings(AUDIT_LOG_RESPONSE_HEADERS=['Content-Type']):
+            self.assertIsNot(get_response_header_capture(), capture)
+            headers = DjangoAuditLogger()._get_headers_from_response(make_response())
+            self.assertEqual(headers, {'Content-Type': 'application/json'})
+
+    def test_default_redacts_cookies(self):
+        response = make_response()
+        response['Set-Cookie'] = 'sessionid=secret'
+        headers = DjangoAuditLogger()._get_headers_from_response(response)
+        self.assertEqual(headers['Set-Cookie'], REDACTED)
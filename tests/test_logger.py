@@ -1,10 +1,15 @@
+import asyncio
+import logging
 from unittest.mock import patch
 
-from django.contrib.auth.models import Group, User
-from django.http import HttpResponse
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.http import HttpResponse, StreamingHttpResponse
 from django.test import RequestFactory, TestCase
+from django.utils.functional import SimpleLazyObject
 from django.views import View
 
+from django_audit_log.delivery import AuditLogQueueHandler
 from django_audit_log.logger import DjangoAuditLogger
 
 
@@ -20,7 +25,7 @@ class TestLogger(TestCase):
     def test_get_logger_name_default(self):
         self.assertEqual(DjangoAuditLogger().get_logger_name(), 'audit_log')
 
-    @patch('django_audit_log.logger.AuditLogger.init_logger')
+    @patch('django_audit_log.logger.DjangoAuditLogger.init_logger')
     @patch('django_audit_log.app_settings.LOG_HANDLER_CALLABLE_PATH', 'tests.test_logger.get_log_handler')
     def test_get_log_handler(self, mocked_init_logger):
         self.assertEqual(DjangoAuditLogger().get_log_handler(), get_log_handler())
@@ -60,6 +65,47 @@ class TestLogger(TestCase):
         self.assertTrue('Allow' in audit_log.http_response['headers'])
         self.assertTrue('Content-Type' in audit_log.http_response['headers'])
 
+    def test_content_length(self):
+        audit_log = DjangoAuditLogger()
+        request = self.request_factory.post('/', data=b'{"name": "value"}', content_type='application/json')
+        audit_log.set_django_http_request(request)
+        self.assertEqual(audit_log.http_request['content_length'], 17)
+
+        audit_log.set_django_http_response(HttpResponse(b'content'))
+        self.assertEqual(audit_log.http_response['content_length'], 7)
+
+        response = StreamingHttpResponse(iter([b'content']))
+        audit_log.set_django_http_response(response)
+        self.assertIsNone(audit_log.http_response['content_length'])
+        response['Content-Length'] = '7'
+        audit_log.set_django_http_response(response)
+        self.assertEqual(audit_log.http_response['content_length'], 7)
+
+    def test_malformed_content_length(self):
+        audit_log = DjangoAuditLogger()
+        response = HttpResponse(b'content')
+        response['Content-Length'] = 'seven'
+        audit_log.set_django_http_response(response)
+        self.assertEqual(audit_log.http_response['content_length'], 7)
+
+        response = StreamingHttpResponse(iter([b'content']))
+        response['Content-Length'] = ''
+        audit_log.set_django_http_response(response)
+        self.assertIsNone(audit_log.http_response['content_length'])
+
+    def test_content_length_without_body(self):
+        audit_log = DjangoAuditLogger()
+        audit_log.set_django_http_request(self.request_factory.get('/'))
+        self.assertEqual(audit_log.http_request['content_length'], 0)
+
+    def test_set_django_http_timings(self):
+        audit_log = DjangoAuditLogger()
+        audit_log.set_django_http_response(HttpResponse())
+        audit_log.set_django_http_timings(duration_ns=2_500_000, view_ns=2_000_000)
+        self.assertEqual(audit_log.http_response['duration_ms'], 2.5)
+        self.assertEqual(audit_log.http_response['view_ms'], 2.0)
+        self.assertEqual(audit_log.http_response['audit_ms'], 0.5)
+
     def test_set_user_from_request(self):
         user = User.objects.create_user(username='username', email='username@host.com')
         group, _ = Group.objects.get_or_create(name='testgroup')
@@ -118,6 +164,150 @@ class TestLogger(TestCase):
         for header, expected_value in expected_headers.items():
             self.assertEqual(headers[header], expected_value)
 
+    def test_aset_user_from_request(self):
+        user = User.objects.create_user(username='username', email='username@host.com')
+        group, _ = Group.objects.get_or_create(name='testgroup')
+        group.user_set.add(user)
+
+        request = self.request_factory.get("/")
+        request.user = SimpleLazyObject(lambda: user)
+
+        audit_log = DjangoAuditLogger()
+        async_to_sync(audit_log.aset_user_from_request)(request, realm='testrealm')
+
+        self.assertEqual(audit_log.user['authenticated'], True)
+        self.assertEqual(audit_log.user['provider']['realm'], 'testrealm')
+        self.assertEqual(audit_log.user['email'], 'username@host.com')
+        self.assertEqual(audit_log.user['roles'], ['testgroup'])
+        self.assertEqual(audit_log.user['ip'], '127.0.0.1')
+        self.assertEqual(audit_log.user['username'], 'username')
+
+    def test_aset_user_from_request_anonymous(self):
+        request = self.request_factory.get("/")
+        request.user = AnonymousUser()
+        request.session = {'_auth_user_backend': 'test_backend'}
+
+        audit_log = DjangoAuditLogger()
+        asyncio.run(audit_log.aset_user_from_request(request))
+
+        self.assertEqual(audit_log.user['authenticated'], False)
+        self.assertEqual(audit_log.user['provider']['name'], 'test_backend')
+        self.assertEqual(audit_log.user['roles'], [])
+        self.assertEqual(audit_log.user['username'], '')
+
+    def test_aset_user_from_request_without_user(self):
+        request = self.request_factory.get("/")
+
+        audit_log = DjangoAuditLogger()
+        asyncio.run(audit_log.aset_user_from_request(request))
+
+        self.assertEqual(audit_log.user['authenticated'], False)
+        self.assertEqual(audit_log.user['roles'], [])
+
+    @patch('django_audit_log.logger.DjangoAuditLogger.send_log')
+    def test_asend_log(self, mocked_send_log):
+        audit_log = DjangoAuditLogger()
+        with patch.object(audit_log, 'logger') as mocked_logger:
+            mocked_logger.handlers = [logging.NullHandler()]
+            asyncio.run(audit_log.asend_log())
+        mocked_send_log.assert_called_with()
+
+    @patch('django_audit_log.logger.sync_to_async')
+    @patch('django_audit_log.logger.DjangoAuditLogger.send_log')
+    def test_asend_log_queued(self, mocked_send_log, mocked_sync_to_async):
+        audit_log = DjangoAuditLogger()
+        queue_handler = AuditLogQueueHandler(logging.NullHandler())
+        with patch.object(audit_log, 'logger') as mocked_logger:
+            mocked_logger.handlers = [queue_handler]
+            asyncio.run(audit_log.asend_log())
+        queue_handler.close()
+        mocked_send_log.assert_called_with()
+        mocked_sync_to_async.assert_not_called()
+
+
+@patch('django_audit_log.app_settings.LAZY_RECORD', True)
+class TestLazyLogger(TestCase):
+
+    def setUp(self):
+        self.request_factory = RequestFactory()
+        self.user = User.objects.create_user(username='username', email='username@host.com')
+        group, _ = Group.objects.get_or_create(name='testgroup')
+        group.user_set.add(self.user)
+
+    def test_set_django_http_request(self):
+        request = self.request_factory.get("/foo/bar", SERVER_NAME="localhost", HTTP_USER_AGENT='test_agent')
+        audit_log = DjangoAuditLogger()
+        with patch.object(request, 'build_absolute_uri', wraps=request.build_absolute_uri) as mocked_uri:
+            audit_log.set_django_http_request(request)
+            mocked_uri.assert_not_called()
+
+            self.assertEqual(audit_log.http_request['url'], 'http://localhost/foo/bar')
+            self.assertEqual(audit_log.http_request['user_agent'], 'test_agent')
+            mocked_uri.assert_called_once_with()
+
+    def test_set_user_from_request(self):
+        request = self.request_factory.get("/")
+        request.user = self.user
+
+        audit_log = DjangoAuditLogger()
+        with self.assertNumQueries(0):
+            audit_log.set_user_from_request(request, realm='testrealm')
+        with self.assertNumQueries(1):
+            self.assertEqual(audit_log.user['roles'], ['testgroup'])
+            self.assertEqual(audit_log.user['provider']['realm'], 'testrealm')
+
+    def test_set_user_overrides_deferred_user(self):
+        request = self.request_factory.get("/")
+        request.user = self.user
+
+        audit_log = DjangoAuditLogger()
+        audit_log.set_user_from_request(request)
+        audit_log.set_user(authenticated=False, provider='', email='')
+        with self.assertNumQueries(0):
+            self.assertEqual(audit_log.user['authenticated'], False)
+
+    def test_send_log(self):
+        request = self.request_factory.get("/", SERVER_NAME="localhost")
+        request.user = self.user
+
+        audit_log = DjangoAuditLogger()
+        audit_log.set_django_http_request(request)
+        audit_log.set_user_from_request(request)
+        with patch.object(audit_log, 'logger') as mocked_logger:
+            mocked_logger.isEnabledFor.return_value = True
+            audit_log.send_log()
+
+        extras = mocked_logger.log.call_args[1]['extra']['audit']
+        self.assertEqual(extras['http_request']['url'], 'http://localhost/')
+        self.assertEqual(extras['user']['roles'], ['testgroup'])
+
+    def test_send_log_disabled_level(self):
+        request = self.request_factory.get("/")
+        request.user = self.user
+
+        audit_log = DjangoAuditLogger().debug('not logged')
+        audit_log.set_user_from_request(request)
+        with self.assertNumQueries(0):
+            audit_log.send_log()
+            asyncio.run(audit_log.asend_log())
+
+    @patch('django_audit_log.logger.DjangoAuditLogger._set_user_from_request')
+    @patch('django_audit_log.logger.DjangoAuditLogger.send_log')
+    def test_asend_log(self, mocked_send_log, mocked_set_user):
+        request = self.request_factory.get("/")
+        request.user = AnonymousUser()
+
+        audit_log = DjangoAuditLogger()
+        async_to_sync(audit_log.aset_user_from_request)(request, realm='testrealm')
+        with patch.object(audit_log, 'logger') as mocked_logger:
+            mocked_logger.handlers = [logging.NullHandler()]
+            asyncio.run(audit_log.asend_log())
+
+        mocked_set_user.assert_not_called()
+        self.assertEqual(audit_log.user['authenticated'], False)
+        self.assertEqual(audit_log.user['provider']['realm'], 'testrealm')
+        mocked_send_log.assert_called_with()
+
 
 def get_log_handler():
     return 'test_handler'
@@ -0,0 +1,190 @@
+import asyncio
+import importlib.util
+import logging
+import socket
+import threading
+import time
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+
+import django
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_audit_log import metrics
+from django_audit_log.delivery import AuditLogQueueHandler
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.metrics import PrometheusSink, SnapshotSink, StatsdSink, TimedFormatter
+from django_audit_log.middleware import AuditLogMiddleware
+from django_audit_log.registry import logger_registry
+from tests.utils import RecordingHandler, make_record
+
+STAGES = {
+    'process_request',
+    'set_django_http_request',
+    'set_user_from_request',
+    'process_response',
+    'set_django_http_response',
+    'serialization',
+    'send_log',
+}
+
+
+@override_settings(
+    AUDIT_LOG_METRICS_SINK_CALLABLE_PATH='django_audit_log.metrics.SnapshotSink',
+    AUDIT_LOG_HANDLER_CALLABLE_PATH='tests.utils.RecordingHandler',
+)
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self.request_factory = RequestFactory()
+        self.middleware = AuditLogMiddleware(lambda request: HttpResponse())
+        # A logger per test, pytest attaches its capture handlers to the used loggers
+        logger_name = override_settings(AUDIT_LOG_LOGGER_NAME='test_metrics_%s' % self._testMethodName)
+        logger_name.enable()
+        self.addCleanup(logger_name.disable)
+        self.addCleanup(logger_registry.reset)
+
+    def test_middleware(self):
+        self.middleware(self.request_factory.get('/'))
+
+        snapshot = metrics.get_snapshot()
+        self.assertEqual(set(snapshot['timings']), STAGES)
+        self.assertEqual(snapshot['timings']['send_log']['count'], 1)
+        self.assertEqual(snapshot['counters'], {'emitted': 1})
+
+    @skipUnless(django.VERSION >= (3, 1), 'Async middleware requires Django 3.1 or later')
+    def test_async_middleware(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = AuditLogMiddleware(get_response)
+        asyncio.run(middleware(self.request_factory.get('/')))
+
+        self.assertEqual(set(metrics.get_snapshot()['timings']), STAGES)
+
+    def test_queue(self):
+        block = threading.Event()
+        target = RecordingHandler()
+        target.emit = lambda record: block.wait()
+        handler = AuditLogQueueHandler(target, maxsize=2)
+        self.addCleanup(handler.close)
+        self.addCleanup(block.set)
+        handler.handle(make_record())
+        while handler.queue.qsize():
+            time.sleep(0.01)  # taken off the queue by the (blocked) worker thread
+        for _ in range(3):
+            handler.handle(make_record())
+
+        snapshot = metrics.get_snapshot()
+        self.assertEqual(snapshot['queue_depth'], 2)
+        self.assertEqual(snapshot['counters'], {'dropped': 1})
+
+    def test_queue_drained(self):
+        block = threading.Event()
+        handler = AuditLogQueueHandler(RecordingHandler(block=block))
+        self.addCleanup(handler.close)
+        for _ in range(3):
+            handler.handle(make_record())
+        self.assertGreater(metrics.get_snapshot()['queue_depth'], 0)
+
+        block.set()
+        handler.flush()
+        self.assertEqual(metrics.get_snapshot()['queue_depth'], 0)
+
+    def test_settings_changed(self):
+        sink = metrics.get_sink()
+        self.assertIsInstance(sink, SnapshotSink)
+        with override_settings(AUDIT_LOG_METRICS_SINK_CALLABLE_PATH=None):
+            self.assertIsNone(metrics.get_sink())
+            self.assertIsNone(metrics.get_snapshot())
+        self.assertIsNot(metrics.get_sink(), sink)
+
+
+class TestDisabled(TestCase):
+
+    def test_not_timed(self):
+        with patch('time.perf_counter') as mocked_perf_counter:
+            AuditLogMiddleware(lambda request: HttpResponse())(RequestFactory().get('/'))
+        mocked_perf_counter.assert_not_called()
+
+    @override_settings(AUDIT_LOG_LOGGER_NAME='test_metrics_disabled')
+    def test_formatter_not_wrapped(self):
+        self.addCleanup(logger_registry.reset)
+        handler = DjangoAuditLogger().logger.handlers[-1]
+        self.assertNotIsInstance(handler.formatter, TimedFormatter)
+
+
+class TestSnapshotSink(TestCase):
+
+    def test_snapshot(self):
+        sink = SnapshotSink()
+        sink.timing('send_log', 0.001)
+        sink.timing('send_log', 0.003)
+        sink.count('emitted')
+        sink.count('failed', 5)
+        sink.queue_depth(3)
+
+        self.assertEqual(
+            sink.snapshot(),
+            {
+                'timings': {'send_log': {'count': 2, 'total': 0.004, 'mean': 0.002, 'max': 0.003}},
+                'counters': {'emitted': 1, 'failed': 5},
+                'queue_depth': 3,
+            },
+        )
+        sink.reset()
+        self.assertEqual(sink.snapshot(), {'timings': {}, 'counters': {}, 'queue_depth': 0})
+
+
+class TestStatsdSink(TestCase):
+
+    def test_send(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(1)
+        self.addCleanup(server.close)
+
+        sink = StatsdSink('127.0.0.1', server.getsockname()[1], prefix='audit')
+        sink.timing('send_log', 0.0015)
+        sink.count('dropped', 2)
+        sink.queue_depth(7)
+
+        self.assertEqual(
+            [server.recv(1024) for _ in range(3)],
+            [b'audit.stage.send_log:1.500|ms', b'audit.logs.dropped:2|c', b'audit.queue_depth:7|g'],
+        )
+
+    def test_unavailable(self):
+        sink = StatsdSink('127.0.0.1', 8125)
+        sink._socket = Mock(sendto=Mock(side_effect=OSError))
+        sink.count('emitted')
+        sink._socket.sendto.assert_called_once_with(b'django_audit_log.logs.emitted:1|c', ('127.0.0.1', 8125))
+
+
+@skipUnless(importlib.util.find_spec('prometheus_client'), 'prometheus_client is not installed')
+class TestPrometheusSink(TestCase):
+
+    def test_collectors(self):
+        from prometheus_client import REGISTRY
+
+        sink = PrometheusSink(prefix='test_audit_log')
+        sink.timing('send_log', 0.001)
+        sink.count('emitted')
+        sink.queue_depth(3)
+        # Created once per process
+        PrometheusSink(prefix='test_audit_log').count('emitted')
+
+        self.assertEqual(REGISTRY.get_sample_value('test_audit_log_logs_total', {'outcome': 'emitted'}), 2)
+        self.assertEqual(REGISTRY.get_sample_value('test_audit_log_stage_seconds_count', {'stage': 'send_log'}), 1)
+        self.assertEqual(REGISTRY.get_sample_value('test_audit_log_queue_depth'), 3)
+
+
+class TestTimedFormatter(TestCase):
+
+    def test_format(self):
+        sink = SnapshotSink()
+        formatter = TimedFormatter(logging.Formatter('%(message)s!'))
+        with patch('django_audit_log.metrics.get_sink', return_value=sink):
+            self.assertEqual(formatter.format(make_record()), 'test!')
+        self.assertEqual(sink.snapshot()['timings']['serialization']['count'], 1)
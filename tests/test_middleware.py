@@ -1,10 +1,22 @@
+import asyncio
 from unittest.mock import patch
 
-from django.test import RequestFactory, TestCase
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.functional import SimpleLazyObject
 from django.views import View
 
 from audit_log.logger import AuditLogger
+from django_audit_log.logger import DjangoAuditLogger
 from django_audit_log.middleware import AuditLogMiddleware
+from django_audit_log.policy import AuditLogPolicy, SamplingRule
+
+try:
+    from django.core.exceptions import SynchronousOnlyOperation
+except ImportError:  # Django < 3.0
+    class SynchronousOnlyOperation(Exception):
+        pass
 
 
 class TestMiddleware(TestCase):
@@ -79,6 +91,25 @@ class TestMiddleware(TestCase):
         mocked_instance.set_django_http_response.assert_called_with(response)
         mocked_instance.send_log.assert_called_with()
 
+    @patch.object(DjangoAuditLogger, 'send_log')
+    def test_process_response_timings(self, mocked_send_log):
+        """
+        Assert that the request duration and the time spent in the view and on
+        the audit log are added to the response section
+        """
+        request = self.request_factory.get('/')
+        with patch('django_audit_log.middleware.time.monotonic_ns', side_effect=[1000, 4000]):
+            self.middleware.process_request(request)
+        with patch('django_audit_log.middleware.time.monotonic_ns', side_effect=[10000, 12000]):
+            self.middleware.process_response(request, HttpResponse(b'content'))
+
+        http_response = request.audit_log.http_response
+        self.assertEqual(http_response['duration_ms'], 0.011)
+        self.assertEqual(http_response['view_ms'], 0.006)
+        self.assertEqual(http_response['audit_ms'], 0.005)
+        self.assertEqual(http_response['content_length'], 7)
+        mocked_send_log.assert_called_with()
+
     @patch('django_audit_log.middleware.DjangoAuditLogger')
     def test_process_response_without_audit_log(self, mocked_audit_log):
         """
@@ -97,6 +128,51 @@ class TestMiddleware(TestCase):
         mocked_instance.set_http_response.assert_not_called()
         mocked_instance.send_log.assert_not_called()
 
+    @patch('django_audit_log.middleware.DjangoAuditLogger')
+    def test_process_request_sampled_out(self, mocked_audit_log):
+        """
+        Assert that the audit log is not created for requests that are sampled out
+        """
+        self.middleware.policy = AuditLogPolicy(default_rate=0.0)
+        request = self.request_factory.get('/')
+        self.middleware.process_request(request)
+        self.assertFalse(hasattr(request, 'audit_log'))
+
+        self.middleware.process_response(request, HttpResponse())
+        mocked_audit_log.assert_not_called()
+
+    @patch('django_audit_log.middleware.DjangoAuditLogger')
+    def test_process_response_sampled_out_error(self, mocked_audit_log):
+        """
+        Assert that the audit log is created for the response when a sampled out request
+        has to be logged after all
+        """
+        self.middleware.policy = AuditLogPolicy(default_rate=0.0)
+        request = self.request_factory.get('/')
+        self.middleware.process_request(request)
+
+        response = HttpResponse(status=500)
+        self.middleware.process_response(request, response)
+
+        mocked_instance = mocked_audit_log.return_value
+        mocked_instance.set_django_http_request.assert_called_with(request)
+        mocked_instance.set_user_from_request.assert_called_with(request)
+        mocked_instance.set_django_http_response.assert_called_with(response)
+        mocked_instance.send_log.assert_called_with()
+
+    @patch('django_audit_log.middleware.DjangoAuditLogger')
+    def test_process_response_deferred(self, mocked_audit_log):
+        """
+        Assert that the audit log is not sent when the response is sampled out
+        """
+        self.middleware.policy = AuditLogPolicy(rules=[SamplingRule(rate=0.0, status=200)])
+        request = self.request_factory.get('/')
+        self.middleware.process_request(request)
+        self.assertTrue(hasattr(request, 'audit_log'))
+
+        self.middleware.process_response(request, HttpResponse())
+        mocked_audit_log.return_value.send_log.assert_not_called()
+
     @patch('django_audit_log.middleware.app_settings.EXEMPT_URLS', [r'foo/bar$'])
     def test_exempt_request(self):
         middleware = AuditLogMiddleware()   # we must initialize here because we override app_settings
@@ -106,3 +182,114 @@ class TestMiddleware(TestCase):
 
         request = self.request_factory.get('/foo/bar2')
         self.assertFalse(middleware.exempt_request(request))
+
+    @override_settings(ROOT_URLCONF='tests.urls')
+    @patch('django_audit_log.middleware.app_settings.EXEMPT_URL_NAMES', ['health'])
+    def test_exempt_request_url_name(self):
+        middleware = AuditLogMiddleware()   # we must initialize here because we override app_settings
+
+        self.assertTrue(middleware.exempt_request(self.request_factory.get('/health/')))
+        self.assertFalse(middleware.exempt_request(self.request_factory.get('/users/1/')))
+
+
+class TestAsyncMiddleware(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.request_factory = RequestFactory()
+
+        async def get_response(request):
+            return HttpResponse('async')
+
+        self.middleware = AuditLogMiddleware(get_response)
+
+    def test_async_capable(self):
+        self.assertTrue(AuditLogMiddleware.async_capable)
+        self.assertTrue(AuditLogMiddleware.sync_capable)
+        self.assertTrue(asyncio.iscoroutinefunction(self.middleware.__acall__))
+
+    @patch('django_audit_log.logger.sync_to_async')
+    @patch('django_audit_log.logger.DjangoAuditLogger.send_log')
+    def test_acall(self, mocked_send_log, mocked_sync_to_async):
+        """
+        Assert that the audit log is attached and sent without running the hooks in a thread.
+        """
+        request = self.request_factory.get('/')
+        asend_log_calls = []
+
+        async def asend_log(audit_log):
+            asend_log_calls.append(audit_log)
+
+        with patch.object(AuditLogMiddleware, 'process_request') as mocked_process_request, \
+                patch.object(AuditLogMiddleware, 'process_response') as mocked_process_response, \
+                patch('django_audit_log.logger.DjangoAuditLogger.asend_log', new=asend_log):
+            response = asyncio.run(self.middleware.__acall__(request))
+            mocked_process_request.assert_not_called()
+            mocked_process_response.assert_not_called()
+            self.assertEqual(asend_log_calls, [request.audit_log])
+
+        self.assertEqual(response.content, b'async')
+        self.assertTrue(isinstance(request.audit_log, AuditLogger))
+        self.assertEqual(request.audit_log.http_response['status_code'], 200)
+        mocked_sync_to_async.assert_not_called()
+
+    @patch('django_audit_log.middleware.DjangoAuditLogger')
+    def test_aprocess_request_already_attached(self, mocked_audit_log):
+        request = self.request_factory.get('/')
+        request.audit_log = 'test'
+        asyncio.run(self.middleware.aprocess_request(request))
+        self.assertEqual(request.audit_log, 'test')
+        mocked_audit_log.assert_not_called()
+
+    @patch('django_audit_log.middleware.app_settings.EXEMPT_URLS', [r'foo/bar$'])
+    def test_aprocess_request_exempt(self):
+        middleware = AuditLogMiddleware(self.middleware.get_response)
+        request = self.request_factory.get('/foo/bar')
+        asyncio.run(middleware.aprocess_request(request))
+        self.assertFalse(hasattr(request, 'audit_log'))
+
+    def test_aprocess_response_without_audit_log(self):
+        request = self.request_factory.get('/')
+        response = HttpResponse()
+        self.assertIs(asyncio.run(self.middleware.aprocess_response(request, response)), response)
+
+    @patch('django_audit_log.middleware.DjangoAuditLogger')
+    def test_aprocess_request_awaited_user(self, mocked_audit_log):
+        """
+        Assert that the policy uses the user loaded with request.auser() instead of the lazy request.user.
+        """
+        mocked_audit_log.return_value.aset_user_from_request.side_effect = async_noop
+        self.middleware.policy = AuditLogPolicy(default_rate=0.0, always_log=['authenticated'])
+        user = User(username='john')
+
+        async def auser():
+            return user
+
+        def load_user():
+            raise SynchronousOnlyOperation("You cannot call this from an async context")
+
+        request = self.request_factory.get('/')
+        request.user = SimpleLazyObject(load_user)
+        request.auser = auser
+        asyncio.run(self.middleware.aprocess_request(request))
+        self.assertIs(request._audit_log_user, user)
+        self.assertIs(request.audit_log, mocked_audit_log.return_value)
+
+    @patch('django_audit_log.middleware.DjangoAuditLogger')
+    def test_aprocess_response_sampled_out_error(self, mocked_audit_log):
+        self.middleware.policy = AuditLogPolicy(default_rate=0.0)
+        mocked_instance = mocked_audit_log.return_value
+        mocked_instance.aset_user_from_request.side_effect = async_noop
+        mocked_instance.asend_log.side_effect = async_noop
+
+        request = self.request_factory.get('/')
+        asyncio.run(self.middleware.aprocess_request(request))
+        self.assertFalse(hasattr(request, 'audit_log'))
+
+        asyncio.run(self.middleware.aprocess_response(request, HttpResponse(status=404)))
+        mocked_instance.aset_user_from_request.assert_called_with(request)
+        mocked_instance.asend_log.assert_called_with()
+
+
+async def async_noop(*args, **kwargs):
+    pass
@@ -0,0 +1,146 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_audit_log.policy import (
+    SAMPLED_DEFERRED,
+    SAMPLED_IN,
+    SAMPLED_OUT,
+    AuditLogPolicy,
+    SamplingRule,
+    TokenBucketRateLimiter,
+    get_policy
+)
+
+
+@override_settings(ROOT_URLCONF='tests.urls')
+class TestSamplingRule(TestCase):
+
+    def setUp(self):
+        self.request_factory = RequestFactory()
+
+    def test_matches_request_url_name(self):
+        rule = SamplingRule(rate=0.5, url_name='health')
+        self.assertTrue(rule.matches_request(self.request_factory.get('/health/')))
+        self.assertFalse(rule.matches_request(self.request_factory.get('/users/1/')))
+        self.assertFalse(rule.matches_request(self.request_factory.get('/unknown/')))
+
+    def test_matches_request_method(self):
+        rule = SamplingRule(rate=0.5, method=['get', 'head'])
+        self.assertTrue(rule.matches_request(self.request_factory.get('/')))
+        self.assertFalse(rule.matches_request(self.request_factory.post('/')))
+
+    def test_matches_status(self):
+        rule = SamplingRule(rate=0.5, status=200)
+        self.assertTrue(rule.matches_status(200))
+        self.assertFalse(rule.matches_status(201))
+        self.assertTrue(SamplingRule(rate=0.5).matches_status(500))
+
+
+class TestTokenBucketRateLimiter(TestCase):
+
+    @patch('django_audit_log.policy.time.monotonic')
+    def test_allow(self, mocked_monotonic):
+        mocked_monotonic.return_value = 100.0
+        limiter = TokenBucketRateLimiter(rate=2, per=10)
+        self.assertTrue(limiter.allow('1.2.3.4'))
+        self.assertTrue(limiter.allow('1.2.3.4'))
+        self.assertFalse(limiter.allow('1.2.3.4'))
+        self.assertTrue(limiter.allow('2.3.4.5'))
+
+        mocked_monotonic.return_value = 105.0
+        self.assertTrue(limiter.allow('1.2.3.4'))
+        self.assertFalse(limiter.allow('1.2.3.4'))
+
+    def test_max_clients(self):
+        limiter = TokenBucketRateLimiter(rate=1, per=60, max_clients=2)
+        for ip in ('1.1.1.1', '2.2.2.2', '3.3.3.3'):
+            limiter.allow(ip)
+        self.assertEqual(list(limiter._buckets), ['2.2.2.2', '3.3.3.3'])
+
+
+@override_settings(ROOT_URLCONF='tests.urls')
+class TestAuditLogPolicy(TestCase):
+
+    def setUp(self):
+        self.request_factory = RequestFactory()
+
+    def test_log_everything(self):
+        policy = AuditLogPolicy()
+        self.assertTrue(policy.log_everything)
+        self.assertEqual(policy.sample_request(self.request_factory.get('/')), SAMPLED_IN)
+
+    @patch('django_audit_log.policy.random.random', return_value=0.5)
+    def test_sample_request_rule(self, mocked_random):
+        policy = AuditLogPolicy(rules=[SamplingRule(rate=0.1, url_name='health'), SamplingRule(rate=0.9)])
+        self.assertEqual(policy.sample_request(self.request_factory.get('/health/')), SAMPLED_OUT)
+        self.assertEqual(policy.sample_request(self.request_factory.get('/users/1/')), SAMPLED_IN)
+
+    @patch('django_audit_log.policy.random.random', return_value=0.5)
+    def test_sample_request_default_rate(self, mocked_random):
+        policy = AuditLogPolicy(default_rate=0.1)
+        self.assertEqual(policy.sample_request(self.request_factory.get('/')), SAMPLED_OUT)
+
+    @patch('django_audit_log.policy.random.random', return_value=0.5)
+    def test_sample_request_always_log_write(self, mocked_random):
+        policy = AuditLogPolicy(default_rate=0.0)
+        self.assertEqual(policy.sample_request(self.request_factory.post('/')), SAMPLED_IN)
+        self.assertEqual(policy.sample_request(self.request_factory.get('/')), SAMPLED_OUT)
+
+    def test_sample_request_always_log_authenticated(self):
+        policy = AuditLogPolicy(default_rate=0.0, always_log=['authenticated'])
+        self.assertTrue(policy.requires_user)
+
+        request = self.request_factory.get('/')
+        request.user = User(username='username')
+        self.assertEqual(policy.sample_request(request), SAMPLED_IN)
+
+        request.user = AnonymousUser()
+        self.assertEqual(policy.sample_request(request), SAMPLED_OUT)
+
+    def test_sample_request_rate_limit(self):
+        policy = AuditLogPolicy(rate_limiter=TokenBucketRateLimiter(rate=1, per=60))
+        self.assertEqual(policy.sample_request(self.request_factory.get('/')), SAMPLED_IN)
+        self.assertEqual(policy.sample_request(self.request_factory.get('/')), SAMPLED_OUT)
+        self.assertEqual(policy.sample_request(self.request_factory.get('/', REMOTE_ADDR='1.2.3.4')), SAMPLED_IN)
+
+    def test_sample_request_deferred(self):
+        policy = AuditLogPolicy(rules=[SamplingRule(rate=0.1, status=200)])
+        self.assertEqual(policy.sample_request(self.request_factory.get('/')), SAMPLED_DEFERRED)
+
+    @patch('django_audit_log.policy.random.random', return_value=0.5)
+    def test_sample_response_deferred(self, mocked_random):
+        policy = AuditLogPolicy(rules=[SamplingRule(rate=0.1, status=200)], always_log=[])
+        request = self.request_factory.get('/')
+        self.assertFalse(policy.sample_response(request, HttpResponse(status=200), SAMPLED_DEFERRED))
+        self.assertTrue(policy.sample_response(request, HttpResponse(status=201), SAMPLED_DEFERRED))
+
+    def test_sample_response_always_log_error(self):
+        policy = AuditLogPolicy(default_rate=0.0)
+        request = self.request_factory.get('/')
+        self.assertTrue(policy.sample_response(request, HttpResponse(status=500), SAMPLED_OUT))
+        self.assertFalse(policy.sample_response(request, HttpResponse(status=200), SAMPLED_OUT))
+        self.assertTrue(policy.sample_response(request, HttpResponse(status=200), SAMPLED_IN))
+
+    @override_settings(
+        AUDIT_LOG_SAMPLING_RATE=0.5,
+        AUDIT_LOG_SAMPLING_RULES=[{'url_name': 'health', 'rate': 0.0}],
+        AUDIT_LOG_ALWAYS_LOG=['error'],
+        AUDIT_LOG_RATE_LIMIT=(10, 60),
+    )
+    def test_from_settings(self):
+        policy = get_policy()
+        self.assertEqual(policy.default_rate, 0.5)
+        self.assertEqual(policy.rules[0].url_names, {'health'})
+        self.assertEqual(policy.always_log, {'error'})
+        self.assertEqual(policy.rate_limiter.capacity, 10)
+
+    @override_settings(AUDIT_LOG_POLICY_CALLABLE_PATH='tests.test_policy.get_test_policy')
+    def test_get_policy_callable(self):
+        self.assertEqual(get_policy().default_rate, 0.25)
+
+
+def get_test_policy():
+    return AuditLogPolicy(default_rate=0.25)
@@ -0,0 +1,171 @@
+import logging
+import tracemalloc
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.middleware import AuditLogMiddleware
+from django_audit_log.record import HttpRequestSection, HttpResponseSection, UserSection, intern_method
+
+
+class DiscardingHandler(logging.Handler):
+    def emit(self, record):
+        pass
+
+
+class DictAuditLogger(DjangoAuditLogger):
+    """
+    The sections as plain dicts, the baseline of the allocations.
+    """
+
+    def set_http_request(self, method, url, user_agent=''):
+        self.http_request = {'method': method, 'url': url, 'user_agent': user_agent}
+        return self
+
+    def set_http_response(self, status_code, reason, headers=None):
+        self.http_response = {'status_code': status_code, 'reason': reason, 'headers': headers}
+        return self
+
+    def set_user(self, authenticated, provider, email, roles=None, ip='', realm='', username=''):
+        self.user = {
+            'authenticated': authenticated,
+            'email': email,
+            'username': username,
+            'roles': roles,
+            'ip': ip,
+            'provider': {'name': provider, 'realm': realm},
+        }
+        return self
+
+    def set_filter(self, object_name, kwargs):
+        self.filter = {'object': object_name, 'kwargs': kwargs}
+        return self
+
+
+class TestSection(TestCase):
+
+    def test_dict_access(self):
+        section = HttpResponseSection(200, 'OK', {'Content-Type': 'text/html'})
+        self.assertEqual(section['status_code'], 200)
+        self.assertEqual(section.get('reason'), 'OK')
+        self.assertIn('headers', section)
+
+        self.assertNotIn('bytes_sent', section)
+        self.assertIsNone(section.get('bytes_sent'))
+        with self.assertRaises(KeyError):
+            section['bytes_sent']
+
+        section['bytes_sent'] = 10
+        section.update(duration_ms=1.5)
+        self.assertEqual(section['bytes_sent'], 10)
+        self.assertEqual(section.duration_ms, 1.5)
+
+    def test_as_dict(self):
+        section = HttpResponseSection(200, 'OK')
+        section['content_length'] = 0
+        self.assertEqual(
+            section.as_dict(), {'status_code': 200, 'reason': 'OK', 'headers': None, 'content_length': 0}
+        )
+
+    def test_nested(self):
+        section = UserSection(True, 'backend', 'john@example.com', ['admin'], '127.0.0.1', 'realm', 'john')
+        self.assertEqual(section['provider']['realm'], 'realm')
+        self.assertEqual(
+            section.as_dict(),
+            {
+                'authenticated': True,
+                'email': 'john@example.com',
+                'username': 'john',
+                'roles': ['admin'],
+                'ip': '127.0.0.1',
+                'provider': {'name': 'backend', 'realm': 'realm'},
+            },
+        )
+
+    def test_extra_keys(self):
+        section = HttpRequestSection('GET', 'http://localhost/')
+        self.assertFalse(hasattr(section, '_extra'))
+        section['route'] = 'users'
+        self.assertIn('route', section)
+        self.assertEqual(section['route'], 'users')
+        self.assertEqual(section.as_dict()['route'], 'users')
+        with self.assertRaises(KeyError):
+            section['missing']
+
+    def test_equal(self):
+        section = HttpRequestSection('GET', 'http://localhost/')
+        self.assertEqual(section, {'method': 'GET', 'url': 'http://localhost/', 'user_agent': 'unknown'})
+        self.assertEqual(section, HttpRequestSection('GET', 'http://localhost/'))
+        self.assertNotEqual(section, HttpRequestSection('POST', 'http://localhost/'))
+
+    def test_intern_method(self):
+        method = ''.join(['G', 'E', 'T'])
+        self.assertIs(intern_method(method), intern_method(''.join(['G', 'E', 'T'])))
+        self.assertIsNone(intern_method(None))
+
+    def test_sent_as_dicts(self):
+        audit_log = DjangoAuditLogger()
+        audit_log.set_http_request('GET', 'http://localhost/', 'agent')
+        audit_log.set_http_response(200, 'OK', {})
+        audit_log.set_user(authenticated=False, provider='', email='')
+        audit_log.set_filter('User', {'pk': 1})
+
+        extras = audit_log._get_extras('INFO')
+        for key in ('http_request', 'http_response', 'user', 'filter'):
+            self.assertIs(type(extras[key]), dict)
+        self.assertEqual(extras['filter'], {'object': 'User', 'kwargs': {'pk': 1}})
+        self.assertEqual(extras['user']['provider'], {'name': '', 'realm': ''})
+
+
+class TestAllocations(TestCase):
+
+    def measure(self, create, number=200):
+        tracemalloc.start()
+        try:
+            objects = [create() for _ in range(number)]
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del objects
+        return size / number
+
+    def test_section_smaller_than_dict(self):
+        section = self.measure(lambda: HttpRequestSection('GET', 'http://localhost/', 'agent'))
+        dictionary = self.measure(lambda: {'method': 'GET', 'url': 'http://localhost/', 'user_agent': 'agent'})
+        self.assertLess(section, dictionary * 0.6)
+
+    @override_settings(
+        AUDIT_LOG_LOGGER_NAME='test_record_allocations',
+        AUDIT_LOG_HANDLER_CALLABLE_PATH='tests.test_record.DiscardingHandler',
+    )
+    def test_bytes_per_audited_request(self):
+        # Bytes kept per audited request (the audit log and its sections) by
+        # the request, compared to the same log with dict sections
+        sections = self.measure_requests()
+        with patch('django_audit_log.middleware.DjangoAuditLogger', DictAuditLogger):
+            dictionaries = self.measure_requests()
+        self.assertLess(sections, dictionaries * 0.9)
+
+    def measure_requests(self, number=100):
+        middleware = AuditLogMiddleware(lambda request: HttpResponse(b'content'))
+        request_factory = RequestFactory()
+
+        def make_request():
+            request = request_factory.get('/', SERVER_NAME='localhost')
+            request.user = AnonymousUser()
+            request.session = {}
+            return request
+
+        middleware(make_request())  # warm up the caches
+        requests = [make_request() for _ in range(number)]
+
+        tracemalloc.start()
+        try:
+            for request in requests:
+                middleware(request)
+            return tracemalloc.get_traced_memory()[0] / number
+        finally:
+            tracemalloc.stop()
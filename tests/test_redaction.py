@@ -0,0 +1,93 @@
+from django.test import TestCase, override_settings
+
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.redaction import REDACTED, Redactor, get_redactor
+
+LOG = {
+    'user': {'username': 'john', 'email': 'john@example.com'},
+    'filter': {'object': 'User', 'kwargs': {'email': 'john@example.com'}},
+    'results': [
+        {'id': 1, 'password': 'x', 'profile': {'iban': 'NL91ABNA0417164300', 'city': 'Amsterdam'}},
+        {'id': 2, 'password': 'y', 'profile': {'iban': None, 'city': 'Utrecht'}},
+    ],
+    'message': 'List User',
+}
+
+
+class TestRedactor(TestCase):
+
+    def test_paths(self):
+        redactor = Redactor(['user.email', 'results.*.password', 'results.*.profile.iban'])
+        redacted = redactor.redact(LOG)
+
+        self.assertEqual(redacted['user'], {'username': 'john', 'email': REDACTED})
+        self.assertEqual(
+            redacted['results'][0],
+            {'id': 1, 'password': REDACTED, 'profile': {'iban': REDACTED, 'city': 'Amsterdam'}},
+        )
+        self.assertEqual(redacted['results'][1]['password'], REDACTED)
+        # The original is not modified
+        self.assertEqual(LOG['user']['email'], 'john@example.com')
+        self.assertEqual(LOG['results'][0]['password'], 'x')
+
+    def test_untouched_subtrees_are_shared(self):
+        redacted = Redactor(['user.email']).redact(LOG)
+        self.assertIsNot(redacted, LOG)
+        self.assertIsNot(redacted['user'], LOG['user'])
+        self.assertIs(redacted['filter'], LOG['filter'])
+        self.assertIs(redacted['results'], LOG['results'])
+
+    def test_nothing_redacted(self):
+        self.assertIs(Redactor(['user.password', 'results.*.secret']).redact(LOG), LOG)
+        self.assertIs(Redactor(patterns=[r'\d{16}']).redact(LOG), LOG)
+
+    def test_wildcard(self):
+        redactor = Redactor(['*.email', 'results.*'])
+        redacted = redactor.redact(LOG)
+        self.assertEqual(redacted['user']['email'], REDACTED)
+        self.assertEqual(redacted['filter'], LOG['filter'])
+        self.assertEqual(redacted['results'], [REDACTED, REDACTED])
+
+    def test_patterns(self):
+        redactor = Redactor(patterns=[r'NL\d{2}[A-Z]{4}\d{10}', r'[\w.]+@example\.com'])
+        redacted = redactor.redact(LOG)
+        self.assertEqual(redacted['user']['email'], REDACTED)
+        self.assertEqual(redacted['filter']['kwargs']['email'], REDACTED)
+        self.assertEqual(redacted['results'][0]['profile']['iban'], REDACTED)
+        self.assertIs(redacted['results'][1], LOG['results'][1])
+
+        self.assertEqual(Redactor(patterns=[r'\d{4}']).redact('pin 1234, code 5678'), 'pin [redacted], code [redacted]')
+
+    def test_path(self):
+        redactor = Redactor(['filter.kwargs.email', 'results'])
+        self.assertEqual(redactor.redact({'email': 'john@example.com'}, 'filter.kwargs'), {'email': REDACTED})
+        self.assertEqual(redactor.redact([1, 2], 'results'), REDACTED)
+
+    def test_tuple(self):
+        self.assertEqual(Redactor(['*.password']).redact(({'password': 'x'},)), [{'password': REDACTED}])
+
+    def test_mask(self):
+        self.assertEqual(Redactor(['password'], mask='***').redact({'password': 'x'}), {'password': '***'})
+
+    def test_create(self):
+        self.assertIsNone(Redactor.create())
+        self.assertIsInstance(Redactor.create(['password']), Redactor)
+
+
+class TestSettings(TestCase):
+
+    def test_no_rules(self):
+        self.assertIsNone(get_redactor())
+
+    @override_settings(AUDIT_LOG_REDACT_PATHS=['user.email'], AUDIT_LOG_REDACT_PATTERNS=[r'secret'])
+    def test_logger(self):
+        audit_log = DjangoAuditLogger()
+        audit_log.set_user(
+            authenticated=True, provider='', email='john@example.com', roles=[], ip='127.0.0.1', realm=''
+        )
+        audit_log.info('a secret message')
+
+        extras = audit_log._get_extras('INFO')
+        self.assertEqual(extras['user']['email'], REDACTED)
+        self.assertEqual(extras['message'], 'a [redacted] message')
+        self.assertEqual(audit_log.user['email'], 'john@example.com')
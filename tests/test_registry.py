@@ -0,0 +1,78 @@
+import logging
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from django_audit_log import app_settings
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.registry import LoggerRegistry, logger_registry
+
+HANDLER_PATH = 'tests.test_registry.get_log_handler'
+
+
+class TestLoggerRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = LoggerRegistry()
+
+    def tearDown(self):
+        self.registry.reset()
+
+    @patch('django_audit_log.app_settings.LOGGER_NAME', 'test_registry_configure')
+    @patch('django_audit_log.app_settings.LOG_HANDLER_CALLABLE_PATH', HANDLER_PATH)
+    def test_get_logger_configures_once(self):
+        with patch('tests.test_registry.get_log_handler', wraps=get_log_handler) as mocked_handler:
+            with patch.object(DjangoAuditLogger, 'init_logger'):
+                audit_log1 = DjangoAuditLogger()
+                audit_log2 = DjangoAuditLogger()
+
+            logger1 = self.registry.get_logger(audit_log1)
+            logger2 = self.registry.get_logger(audit_log2)
+
+        self.assertIs(logger1, logger2)
+        self.assertEqual(mocked_handler.call_count, 1)
+        self.assertIsInstance(logger1.handlers[0], logging.NullHandler)
+        self.assertFalse(logger1.propagate)
+
+    @patch('django_audit_log.app_settings.LOGGER_NAME', 'test_registry_reset')
+    @patch('django_audit_log.app_settings.LOG_HANDLER_CALLABLE_PATH', HANDLER_PATH)
+    def test_reset(self):
+        with patch.object(DjangoAuditLogger, 'init_logger'):
+            audit_log = DjangoAuditLogger()
+        logger = self.registry.get_logger(audit_log)
+        handler = logger.handlers[0]
+
+        self.registry.reset()
+
+        self.assertNotIn(handler, logger.handlers)
+        self.assertTrue(handler.closed)
+        self.assertIsInstance(self.registry.get_logger(audit_log).handlers[0], logging.NullHandler)
+        self.assertIsNot(logger.handlers[0], handler)
+
+    def test_audit_loggers_share_logger(self):
+        self.assertIs(DjangoAuditLogger().logger, DjangoAuditLogger().logger)
+
+    def test_setting_changed_resets_registry(self):
+        with patch.object(logger_registry, 'reset') as mocked_reset:
+            with override_settings(AUDIT_LOG_LOGGER_NAME='test_override'):
+                self.assertEqual(app_settings.LOGGER_NAME, 'test_override')
+            self.assertEqual(mocked_reset.call_count, 2)
+        self.assertEqual(app_settings.LOGGER_NAME, None)
+
+    def test_unrelated_setting_changed(self):
+        with patch.object(logger_registry, 'reset') as mocked_reset:
+            with override_settings(SOME_OTHER_SETTING=True):
+                pass
+            mocked_reset.assert_not_called()
+
+
+class ClosableHandler(logging.NullHandler):
+    closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def get_log_handler():
+    return ClosableHandler()
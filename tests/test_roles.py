@@ -0,0 +1,143 @@
+import asyncio
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.roles import get_roles_from_cache, get_roles_from_claim, get_roles_from_groups
+
+
+@override_settings(AUDIT_LOG_ROLES_CALLABLE_PATH='django_audit_log.roles.get_roles_from_cache')
+class TestRoles(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/')
+        self.user = User.objects.create_user(username='username')
+        self.group = Group.objects.create(name='group1')
+        self.group.user_set.add(self.user)
+
+    def test_get_roles_from_groups(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_roles_from_groups(self.request, self.user), ['group1'])
+
+    def test_get_roles_from_groups_prefetched(self):
+        user = User.objects.prefetch_related('groups').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles_from_groups(self.request, user), ['group1'])
+
+    def test_get_roles_from_claim_auth(self):
+        self.request.auth = {'roles': ['role1', 'role2']}
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles_from_claim(self.request, self.user), ['role1', 'role2'])
+
+    @patch('django_audit_log.app_settings.ROLES_CLAIM', 'groups')
+    def test_get_roles_from_claim_session(self):
+        self.request.auth = 'not a token payload'
+        self.request.session = {'groups': ('role1',)}
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles_from_claim(self.request, self.user), ['role1'])
+
+    def test_get_roles_from_claim_fallback(self):
+        self.request.session = {}
+        self.assertEqual(get_roles_from_claim(self.request, self.user), ['group1'])
+
+    def test_get_roles_from_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_roles_from_cache(self.request, self.user), ['group1'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles_from_cache(self.request, self.user), ['group1'])
+
+    def test_get_roles_from_cache_anonymous(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_roles_from_cache(self.request, AnonymousUser()), [])
+
+    def test_cache_invalidated_on_add(self):
+        get_roles_from_cache(self.request, self.user)
+        self.user.groups.add(Group.objects.create(name='group2'))
+        self.assertEqual(get_roles_from_cache(self.request, self.user), ['group1', 'group2'])
+
+    def test_cache_invalidated_on_reverse_add(self):
+        get_roles_from_cache(self.request, self.user)
+        Group.objects.create(name='group2').user_set.add(self.user)
+        self.assertEqual(get_roles_from_cache(self.request, self.user), ['group1', 'group2'])
+
+    def test_cache_invalidated_on_remove(self):
+        get_roles_from_cache(self.request, self.user)
+        self.user.groups.remove(self.group)
+        self.assertEqual(get_roles_from_cache(self.request, self.user), [])
+
+    def test_cache_invalidated_on_clear(self):
+        get_roles_from_cache(self.request, self.user)
+        self.user.groups.clear()
+        self.assertEqual(get_roles_from_cache(self.request, self.user), [])
+
+    def test_cache_invalidated_on_reverse_clear(self):
+        get_roles_from_cache(self.request, self.user)
+        self.group.user_set.clear()
+        self.assertEqual(get_roles_from_cache(self.request, self.user), [])
+
+    def test_cache_invalidated_on_group_rename(self):
+        get_roles_from_cache(self.request, self.user)
+        self.group.name = 'renamed'
+        self.group.save()
+        self.assertEqual(get_roles_from_cache(self.request, self.user), ['renamed'])
+
+    def test_cache_invalidated_on_group_delete(self):
+        get_roles_from_cache(self.request, self.user)
+        self.group.delete()
+        self.assertEqual(get_roles_from_cache(self.request, self.user), [])
+
+    def test_cache_signals_disconnected(self):
+        get_roles_from_cache(self.request, self.user)
+        with override_settings(AUDIT_LOG_ROLES_CALLABLE_PATH=None):
+            self.group.name = 'renamed'
+            with self.assertNumQueries(1):  # no query for the members of the group
+                self.group.save()
+        self.assertEqual(get_roles_from_cache(self.request, self.user), ['group1'])
+
+
+class TestLoggerRoles(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.user = User.objects.create_user(username='username')
+
+    def test_get_roles_default(self):
+        with patch('django_audit_log.logger.get_roles_from_groups', return_value=['group']) as mocked:
+            self.assertEqual(DjangoAuditLogger().get_roles(self.request, self.user), ['group'])
+            mocked.assert_called_with(self.request, self.user)
+
+    @patch('django_audit_log.app_settings.ROLES_CALLABLE_PATH', 'tests.test_roles.get_roles')
+    def test_get_roles_callable(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(DjangoAuditLogger().get_roles(self.request, self.user), ['username'])
+
+    @patch('django_audit_log.app_settings.ROLES_CALLABLE_PATH', 'tests.test_roles.get_roles')
+    def test_set_user_from_request_callable(self):
+        self.request.user = self.user
+        audit_log = DjangoAuditLogger().set_user_from_request(self.request)
+        self.assertEqual(audit_log.user['roles'], ['username'])
+
+    def test_aget_roles_prefetched(self):
+        user = User.objects.prefetch_related('groups').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(asyncio.run(DjangoAuditLogger().aget_roles(self.request, user)), [])
+
+    @patch('django_audit_log.app_settings.ROLES_CALLABLE_PATH', 'tests.test_roles.aget_roles')
+    def test_aget_roles_coroutine_callable(self):
+        self.assertEqual(asyncio.run(DjangoAuditLogger().aget_roles(self.request, self.user)), ['async'])
+
+    @patch('django_audit_log.app_settings.ROLES_CALLABLE_PATH', 'tests.test_roles.get_roles')
+    def test_aget_roles_callable(self):
+        self.assertEqual(asyncio.run(DjangoAuditLogger().aget_roles(self.request, self.user)), ['username'])
+
+
+def get_roles(request, user):
+    return [user.username]
+
+
+async def aget_roles(request, user):
+    return ['async']
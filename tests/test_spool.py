@@ -0,0 +1,238 @@
+import io
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.registry import LoggerRegistry
+from django_audit_log.spool import HEADER, SpoolDrain, SpoolHandler, SpoolWriter, read_segment
+from tests.utils import RecordingHandler
+
+
+class SpoolTestCase(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def make_writer(self, segment_size=1024, fsync_interval=0):
+        writer = SpoolWriter(self.path, segment_size, fsync_interval)
+        self.addCleanup(writer.close)
+        return writer
+
+    def segments(self):
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith('.seg')
+        )
+
+
+class TestSpoolWriter(SpoolTestCase):
+
+    def test_append(self):
+        writer = self.make_writer()
+        writer.append(b'first')
+        writer.append(b'second')
+
+        segment, = self.segments()
+        self.assertEqual(os.path.getsize(segment), 1024)  # preallocated
+        records, offset, complete = read_segment(segment, 0)
+        self.assertEqual(records, [b'first', b'second'])
+        self.assertEqual(offset, 2 * HEADER.size + len(b'firstsecond'))
+        self.assertFalse(complete)  # the writer may append more records
+
+        records, offset, complete = read_segment(segment, offset)
+        self.assertEqual(records, [])
+
+    def test_close_completes_segment(self):
+        writer = self.make_writer()
+        writer.append(b'first')
+        writer.close()
+
+        segment, = self.segments()
+        records, _, complete = read_segment(segment, 0)
+        self.assertEqual(records, [b'first'])
+        self.assertTrue(complete)
+        with self.assertRaises(ValueError):
+            writer.append(b'second')
+
+    def test_rotate(self):
+        writer = self.make_writer(segment_size=64)
+        for i in range(10):
+            writer.append(b'record %d' % i)
+
+        segments = self.segments()
+        self.assertGreater(len(segments), 1)
+        records = []
+        for segment in segments:
+            segment_records, _, complete = read_segment(segment, 0)
+            records.extend(segment_records)
+            self.assertEqual(complete, segment != segments[-1])
+        self.assertEqual(records, [b'record %d' % i for i in range(10)])
+
+    def test_rotate_large_record(self):
+        writer = self.make_writer(segment_size=64)
+        writer.append(b'x' * 100)
+
+        segment = self.segments()[-1]
+        self.assertGreater(os.path.getsize(segment), 100)
+        self.assertEqual(read_segment(segment, 0)[0], [b'x' * 100])
+
+    def test_sync(self):
+        writer = self.make_writer(segment_size=64, fsync_interval=60)
+        for i in range(10):
+            writer.append(b'record %d' % i)
+        self.assertTrue(writer._retired)
+        writer.sync()
+        self.assertEqual(writer._retired, [])
+        self.assertFalse(writer._dirty)
+
+    def test_sync_thread(self):
+        writer = self.make_writer(fsync_interval=0.01)
+        writer.append(b'first')
+        with patch.object(writer, 'sync', wraps=writer.sync) as sync:
+            writer._stopped.wait(0.1)
+        self.assertTrue(sync.called)
+
+    def test_incomplete_record(self):
+        writer = self.make_writer()
+        writer.append(b'first')
+        writer.append(b'second')
+        # Simulate a record of which the length is written, but the payload is not (completely)
+        writer._mmap[HEADER.size + 5 + HEADER.size] = ord('X')
+
+        records, offset, complete = read_segment(self.segments()[0], 0)
+        self.assertEqual(records, [b'first'])
+        self.assertEqual(offset, HEADER.size + 5)
+        self.assertFalse(complete)
+
+    def test_dead_writer(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        segment = os.path.join(self.path, '%020d-%d.seg' % (1, process.pid))
+        with open(segment, 'wb') as file:
+            file.write(HEADER.pack(3, 0) + b'abc' + bytes(64))
+
+        # Garbage left by the writer that died
+        records, offset, complete = read_segment(segment, 0)
+        self.assertEqual(records, [])
+        self.assertTrue(complete)
+
+
+class TestSpoolHandler(SpoolTestCase):
+
+    def test_emit(self):
+        handler = SpoolHandler(self.path, segment_size=1024, fsync_interval=0)
+        self.addCleanup(handler.close)
+        handler.setFormatter(logging.Formatter('formatted %(message)s'))
+        handler.handle(logging.LogRecord('test', logging.INFO, __file__, 1, 'log', None, None))
+
+        self.assertEqual(read_segment(self.segments()[0], 0)[0], [b'formatted log'])
+
+    def test_requires_path(self):
+        with patch('django_audit_log.app_settings.SPOOL_PATH', None):
+            with self.assertRaises(ValueError):
+                SpoolHandler()
+
+    @patch('django_audit_log.app_settings.LOGGER_NAME', 'test_spool_registry')
+    @patch('django_audit_log.app_settings.SPOOL_FSYNC_INTERVAL', 0)
+    def test_registry(self):
+        registry = LoggerRegistry()
+        self.addCleanup(registry.reset)
+        with patch('django_audit_log.app_settings.SPOOL_PATH', self.path):
+            with patch.object(DjangoAuditLogger, 'init_logger'):
+                audit_log = DjangoAuditLogger()
+            logger = registry.get_logger(audit_log)
+
+        handler, = [handler for handler in logger.handlers if isinstance(handler, SpoolHandler)]
+        self.assertEqual(handler.writer.path, self.path)
+
+    def test_settings(self):
+        with patch('django_audit_log.app_settings.SPOOL_PATH', self.path), patch(
+            'django_audit_log.app_settings.SPOOL_SEGMENT_SIZE', 2048
+        ), patch('django_audit_log.app_settings.SPOOL_FSYNC_INTERVAL', 0):
+            handler = SpoolHandler()
+        self.addCleanup(handler.close)
+        self.assertEqual(handler.writer.path, self.path)
+        self.assertEqual(handler.writer.segment_size, 2048)
+
+
+class TestSpoolDrain(SpoolTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.handler = RecordingHandler()
+
+    def test_drain(self):
+        writer = self.make_writer(segment_size=64)
+        for i in range(10):
+            writer.append(b'record %d' % i)
+
+        drain = SpoolDrain(self.path, self.handler, batch_size=3)
+        self.assertEqual(drain.drain(), 10)
+        self.assertEqual(self.handler.messages, ['record %d' % i for i in range(10)])
+        # The completed segments are removed, the offset in the active segment is stored
+        active, = self.segments()
+        self.assertTrue(os.path.exists(active + '.offset'))
+
+        writer.append(b'record 10')
+        self.assertEqual(drain.drain(), 1)
+        self.assertEqual(self.handler.messages[-1], 'record 10')
+
+        writer.close()
+        self.assertEqual(drain.drain(), 0)
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_resume(self):
+        writer = self.make_writer()
+        writer.append(b'first')
+        SpoolDrain(self.path, RecordingHandler()).drain()
+        writer.append(b'second')
+
+        # e.g. the drain process was restarted
+        SpoolDrain(self.path, self.handler).drain()
+        self.assertEqual(self.handler.messages, ['second'])
+
+    def test_record(self):
+        writer = self.make_writer()
+        writer.append('{"audit": "%s ü"}'.encode())
+        handler = RecordingHandler()
+
+        with patch('django_audit_log.app_settings.LOGGER_NAME', 'spooled'):
+            SpoolDrain(self.path, handler).drain()
+
+        record, = handler.records
+        self.assertEqual(record.name, 'spooled')
+        self.assertEqual(record.levelno, logging.INFO)
+        self.assertEqual(handler.format(record), '{"audit": "%s ü"}')
+
+    def test_missing_directory(self):
+        drain = SpoolDrain(os.path.join(self.path, 'missing'), self.handler)
+        self.assertEqual(drain.drain(), 0)
+
+    def test_command(self):
+        writer = self.make_writer()
+        writer.append(b'first')
+        writer.close()
+
+        stderr = io.StringIO()
+        with patch(
+            'django_audit_log.management.commands.drain_audit_log_spool.get_forward_handler',
+            return_value=self.handler,
+        ):
+            call_command('drain_audit_log_spool', '--once', '--path', self.path, stderr=stderr)
+
+        self.assertEqual(self.handler.messages, ['first'])
+        self.assertIn('Forwarded 1 audit logs', stderr.getvalue())
+
+    def test_command_requires_path(self):
+        with patch('django_audit_log.app_settings.SPOOL_PATH', None):
+            with self.assertRaises(CommandError):
+                call_command('drain_audit_log_spool', '--once')
@@ -0,0 +1,124 @@
+import asyncio
+import io
+from unittest.mock import Mock, patch
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+
+from django_audit_log.logger import DjangoAuditLogger
+from django_audit_log.middleware import AuditLogMiddleware
+from django_audit_log.streaming import AsyncAuditedStream, AuditedStream
+
+CHUNKS = [b'a' * 10, b'b' * 20, b'c' * 30]
+
+
+@patch.object(DjangoAuditLogger, 'send_log')
+class TestStreamingResponse(TestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.middleware = AuditLogMiddleware()
+        self.request = RequestFactory().get('/')
+
+    def get_response(self, response):
+        self.middleware.process_request(self.request)
+        return self.middleware.process_response(self.request, response)
+
+    def test_sent_when_closed(self, send_log):
+        response = self.get_response(StreamingHttpResponse(iter(CHUNKS)))
+        send_log.assert_not_called()
+
+        self.assertEqual(list(response), CHUNKS)
+        send_log.assert_not_called()
+
+        response.close()
+        send_log.assert_called_once()
+        http_response = self.request.audit_log.http_response
+        self.assertEqual(http_response['status_code'], 200)
+        self.assertEqual(http_response['bytes_sent'], 60)
+        self.assertGreaterEqual(http_response['time_to_last_byte_ms'], 0)
+
+        response.close()
+        send_log.assert_called_once()
+
+    def test_chunks_not_copied(self, send_log):
+        response = self.get_response(StreamingHttpResponse(iter(CHUNKS)))
+        for chunk, expected in zip(response, CHUNKS):
+            self.assertIs(chunk, expected)
+
+    def test_closed_early(self, send_log):
+        response = self.get_response(StreamingHttpResponse(iter(CHUNKS)))
+        next(iter(response))
+        response.close()
+        send_log.assert_called_once()
+        self.assertEqual(self.request.audit_log.http_response['bytes_sent'], 10)
+
+    def test_file_response(self, send_log):
+        response = self.get_response(FileResponse(io.BytesIO(b'x' * 100)))
+        file_to_stream = response.file_to_stream
+        self.assertIsNotNone(file_to_stream)
+
+        # Sent by the server with wsgi.file_wrapper, without iterating the response
+        response.close()
+        send_log.assert_called_once()
+        self.assertEqual(self.request.audit_log.http_response['bytes_sent'], 100)
+        self.assertTrue(file_to_stream.closed)
+
+    def test_file_response_iterated(self, send_log):
+        response = self.get_response(FileResponse(io.BytesIO(b'x' * 100)))
+        self.assertEqual(b''.join(response), b'x' * 100)
+        response.close()
+        self.assertEqual(self.request.audit_log.http_response['bytes_sent'], 100)
+
+    def test_file_response_malformed_content_length(self, send_log):
+        response = FileResponse(io.BytesIO(b'x' * 100))
+        response['Content-Length'] = 'unknown'
+        response = self.get_response(response)
+        self.assertEqual(b''.join(response), b'x' * 100)
+        response.close()
+        self.assertEqual(self.request.audit_log.http_response['bytes_sent'], 100)
+
+    def test_not_streaming(self, send_log):
+        self.get_response(HttpResponse(b'content'))
+        send_log.assert_called_once()
+        self.assertNotIn('bytes_sent', self.request.audit_log.http_response)
+
+    def test_async(self, send_log):
+        async def get_response(request):
+            return StreamingHttpResponse(iter(CHUNKS))
+
+        middleware = AuditLogMiddleware(get_response)
+        response = asyncio.run(middleware.__acall__(self.request))
+        send_log.assert_not_called()
+
+        self.assertEqual(b''.join(response), b''.join(CHUNKS))
+        response.close()
+        send_log.assert_called_once()
+        self.assertEqual(self.request.audit_log.http_response['bytes_sent'], 60)
+
+
+class TestAsyncAuditedStream(TestCase):
+
+    def test_aiter(self):
+        async def content():
+            for chunk in CHUNKS:
+                yield chunk
+
+        async def consume(stream):
+            return [chunk async for chunk in stream]
+
+        audit_log = Mock(http_response={})
+        stream = AsyncAuditedStream(content(), audit_log, 0)
+        self.assertEqual(asyncio.run(consume(stream)), CHUNKS)
+
+        stream.close()
+        audit_log.send_log.assert_called_once()
+        self.assertEqual(audit_log.http_response['bytes_sent'], 60)
+
+    def test_time_to_last_byte(self):
+        audit_log = Mock(http_response={})
+        stream = AuditedStream(iter(CHUNKS), audit_log, 1_000_000)
+        with patch('django_audit_log.streaming.time.monotonic_ns', return_value=3_500_000):
+            list(stream)
+        stream.close()
+        self.assertEqual(audit_log.http_response['time_to_last_byte_ms'], 2.5)
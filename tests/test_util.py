@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 from django.http import HttpRequest
 
-from django_audit_log.util import get_client_ip, import_callable
+from django_audit_log.util import get_client_ip, import_callable, parse_content_length
 
 
 class TestUtil(TestCase):
@@ -31,3 +31,8 @@ class TestUtil(TestCase):
 
 def callable_for_test():
     return 'success'
+
+    def test_parse_content_length(self):
+        self.assertEqual(parse_content_length('17'), 17)
+        self.assertIsNone(parse_content_length('17 bytes'))
+        self.assertIsNone(parse_content_length(None))
@@ -0,0 +1,12 @@
+from django.http import HttpResponse
+from django.urls import path
+
+
+def view(request):
+    return HttpResponse()
+
+
+urlpatterns = [
+    path('health/', view, name='health'),
+    path('users/<int:pk>/', view, name='user-detail'),
+]
@@ -0,0 +1,29 @@
+import logging
+import threading
+
+
+class RecordingHandler(logging.Handler):
+    """
+    Keeps the handled records and their formatted messages. With `block`, an
+    event, emit waits until the event is set.
+    """
+
+    def __init__(self, block=None):
+        super().__init__()
+        self.block = block
+        self.records = []
+        self.messages = []
+        self.threads = []
+
+    def emit(self, record):
+        if self.block is not None:
+            self.block.wait()
+        self.threads.append(threading.current_thread())
+        self.records.append(record)
+        self.messages.append(self.format(record))
+
+
+def make_record(msg='test', level=logging.INFO, name='test', **attributes):
+    record = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    record.__dict__.update(attributes)
+    return record